@@ -0,0 +1,82 @@
+#!/usr/bin/python
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure the time taken to send many small AMP commands between two
+connected protocols, and to encode and decode their arguments.
+"""
+
+from __future__ import print_function
+
+import time
+
+from timer import timeit
+from twisted.internet.task import Clock
+from twisted.protocols import amp
+from twisted.test.proto_helpers import StringTransport
+
+ITERATIONS = 100000
+
+
+class Dispatch(amp.Command):
+    arguments = [(b'job', amp.Integer()),
+                 (b'name', amp.Unicode()),
+                 (b'payload', amp.String()),
+                 (b'urgent', amp.Boolean())]
+    response = [(b'accepted', amp.Boolean())]
+
+
+
+class Worker(amp.AMP):
+    @Dispatch.responder
+    def dispatch(self, job, name, payload, urgent):
+        return {'accepted': True}
+
+
+
+def connect():
+    client, server = Worker(), Worker()
+    clientTransport, serverTransport = StringTransport(), StringTransport()
+    client.makeConnection(clientTransport)
+    server.makeConnection(serverTransport)
+    return client, clientTransport, server, serverTransport
+
+
+
+def roundTrip(client, clientTransport, server, serverTransport, clock,
+              calls):
+    for i in range(calls):
+        client.callRemote(Dispatch, job=i, name=u'job', payload=b'x' * 20,
+                          urgent=False)
+    clock.advance(0)
+    server.dataReceived(clientTransport.value())
+    clientTransport.clear()
+    clock.advance(0)
+    client.dataReceived(serverTransport.value())
+    serverTransport.clear()
+
+
+
+objects = {'job': 12345, 'name': u'job', 'payload': b'x' * 20,
+           'urgent': False}
+box = Dispatch.makeArguments(objects, None)
+elapsed = timeit(Dispatch.makeArguments, ITERATIONS, objects, None)
+print("makeArguments: %10d cps" % (ITERATIONS / elapsed,))
+elapsed = timeit(Dispatch.parseArguments, ITERATIONS, box, None)
+print("parseArguments: %10d cps" % (ITERATIONS / elapsed,))
+elapsed = timeit(box.serialize, ITERATIONS)
+print("serialize: %10d cps" % (ITERATIONS / elapsed,))
+
+for batching in (False, True):
+    clock = Clock()
+    connection = connect()
+    if batching:
+        connection[0].startBatching(clock)
+        connection[2].startBatching(clock)
+    before = time.time()
+    for i in range(ITERATIONS // 1000):
+        roundTrip(*(connection + (clock, 1000)))
+    after = time.time()
+    print("commands answered, batching %-5s: %10d cps" % (
+        batching, ITERATIONS / (after - before)))
@@ -1,11 +1,29 @@
 #!/usr/bin/python
 from __future__ import print_function
 
+import time
+
 from timer import timeit
-from twisted.spread.banana import b1282int
+from twisted.spread.banana import b1282int, encode, decode
 
 ITERATIONS = 100000
 
 for length in (1, 5, 10, 50, 100):
-    elapsed = timeit(b1282int, ITERATIONS, "\xff" * length)
+    elapsed = timeit(b1282int, ITERATIONS, b"\xff" * length)
     print("b1282int %3d byte string: %10d cps" % (length, ITERATIONS / elapsed))
+
+for totalSize in (2 ** 20, 10 * 2 ** 20):
+    for itemSize in (100, 1000):
+        encoded = encode([b"x" * itemSize] * (totalSize // itemSize))
+        before = time.time()
+        decode(encoded)
+        after = time.time()
+        print("decode %8d byte list of %4d byte strings: %f seconds" % (
+            totalSize, itemSize, after - before))
+
+for name, items in [("ints", list(range(100000))),
+                    ("strings", [b"x" * 20] * 100000)]:
+    before = time.time()
+    encode(items)
+    after = time.time()
+    print("encode list of 100000 %s: %f seconds" % (name, after - before))
@@ -75,7 +75,7 @@ def instantiateAddCallbacksNoResult(n):
     d = defer.Deferred()
     def f(result):
         return result
-    for i in xrange(n):
+    for i in range(n):
         d.addCallback(f)
         d.addErrback(f)
         d.addBoth(f)
@@ -90,7 +90,7 @@ def instantiateAddCallbacksBeforeResult(n):
     d = defer.Deferred()
     def f(result):
         return result
-    for i in xrange(n):
+    for i in range(n):
         d.addCallback(f)
         d.addErrback(f)
         d.addBoth(f)
@@ -108,7 +108,7 @@ def instantiateAddCallbacksAfterResult(n):
     def f(result):
         return result
     d.callback(1)
-    for i in xrange(n):
+    for i in range(n):
         d.addCallback(f)
         d.addErrback(f)
         d.addBoth(f)
@@ -126,7 +126,7 @@ def pauseUnpause(n):
         return result
     d.callback(1)
     d.pause()
-    for i in xrange(n):
+    for i in range(n):
         d.addCallback(f)
         d.addErrback(f)
         d.addBoth(f)
@@ -134,6 +134,65 @@ def pauseUnpause(n):
     d.unpause()
 pauseUnpause = benchmarkNFunc(20, ns)(pauseUnpause)
 
+def succeedAddCallback():
+    """
+    Add a callback to a L{defer.Deferred} which already has a result, as
+    returned by L{defer.succeed}.
+    """
+    defer.succeed(1).addCallback(lambda result: result)
+succeedAddCallback = benchmarkFunc(100000)(succeedAddCallback)
+
+def maybeDeferredSynchronous():
+    """
+    Call a function which returns a plain value with L{defer.maybeDeferred}.
+    """
+    defer.maybeDeferred(lambda: 1)
+maybeDeferredSynchronous = benchmarkFunc(100000)(maybeDeferredSynchronous)
+
+def callbackChain():
+    """
+    Add a few callbacks to a L{defer.Deferred} and then give it a result.
+    """
+    def f(result):
+        return result
+    d = defer.Deferred()
+    d.addCallback(f)
+    d.addCallback(f)
+    d.addErrback(f)
+    d.callback(1)
+callbackChain = benchmarkFunc(100000)(callbackChain)
+
+def chainedDeferred():
+    """
+    Return a L{defer.Deferred} without a result from a callback, and then give
+    it a result, so that the result is passed back to the outer
+    L{defer.Deferred}.
+    """
+    inner = defer.Deferred()
+    outer = defer.Deferred()
+    outer.addCallback(lambda result: inner)
+    outer.addCallback(lambda result: result)
+    outer.callback(1)
+    inner.callback(2)
+chainedDeferred = benchmarkFunc(100000)(chainedDeferred)
+
+def errbackTrap():
+    """
+    Give a L{defer.Deferred} a failure which an errback traps.
+    """
+    d = defer.Deferred()
+    d.addErrback(lambda f: f.trap(ZeroDivisionError))
+    d.errback(ZeroDivisionError())
+errbackTrap = benchmarkFunc(100000)(errbackTrap)
+
+def gatherFired(n):
+    """
+    Wait for the given number of L{defer.Deferred}s which already have results
+    with L{defer.gatherResults}.
+    """
+    defer.gatherResults([defer.succeed(i) for i in range(n)])
+gatherFired = benchmarkNFunc(1000, [10, 100])(gatherFired)
+
 def benchmark():
     """
     Run all of the benchmarks registered in the benchmarkFuncs list
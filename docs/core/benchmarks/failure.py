@@ -5,6 +5,7 @@ from __future__ import print_function
 
 import random
 from twisted.python import failure
+from twisted.internet import defer
 
 random.seed(10050)
 O = [0, 20, 40, 60, 80, 10, 30, 50, 70, 90]
@@ -14,7 +15,7 @@ def pickVal():
     return random.choice([None, 1, 'Hello', [], {1: 1}, (1, 2, 3)])
 
 def makeLocals(n):
-    return ';'.join(['x%d = %s' % (i, pickVal()) for i in range(n)])
+    return ';'.join(['x%d = %r' % (i, pickVal()) for i in range(n)])
 
 for nLocals in O:
     for i in range(DEPTH):
@@ -23,7 +24,7 @@ def deepFailure%d_%d():
     %s
     deepFailure%d_%d()
 """ % (nLocals, i, makeLocals(nLocals), nLocals, i + 1)
-    exec(s)
+        exec(s)
 
     exec("""
 def deepFailure%d_%d():
@@ -66,3 +67,19 @@ for i in O:
 
 # for i in O:
 #     print('string failing', i, timeit(fail_str, 1, i))
+
+def errbackAndTrap(n):
+    for i in R:
+        d = defer.Deferred()
+        d.addErrback(lambda f: f.trap(ZeroDivisionError))
+        try:
+            eval('deepFailure%d_0' % n)()
+        except:
+            d.errback()
+
+for lazy in (False, True):
+    failure.setLazyTracebacks(lazy)
+    for i in (0, 40):
+        print('errback and trap, lazy tracebacks', lazy, 'locals', i,
+              len(R) / timeit(errbackAndTrap, 1, i), 'cps')
+failure.setLazyTracebacks(False)
@@ -0,0 +1,80 @@
+#!/usr/bin/python
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how fast Deferreds and asyncio futures are converted into each other,
+and how fast coroutines run as asyncio tasks by ensureDeferred complete.
+
+This benchmark needs Python 3.5 or later, for asyncio and async/await.
+"""
+
+from __future__ import print_function
+
+from asyncio import new_event_loop
+
+from timer import timeit
+from twisted.internet import defer
+
+ITERATIONS = 100000
+
+loop = new_event_loop()
+
+
+
+def fromDoneFutures(n):
+    for i in range(n):
+        future = loop.create_future()
+        future.set_result(i)
+        defer.Deferred.fromFuture(future)
+
+
+
+def fromPendingFutures(n):
+    futures = []
+    for i in range(n):
+        future = loop.create_future()
+        defer.Deferred.fromFuture(future)
+        futures.append(future)
+    for future in futures:
+        future.set_result(None)
+    loop.call_soon(loop.stop)
+    loop.run_forever()
+
+
+
+def asFutures(n):
+    for i in range(n):
+        defer.succeed(i).asFuture(loop)
+
+
+
+async def awaitDeferreds(n):
+    for i in range(n):
+        await defer.succeed(i).asFuture(loop)
+
+
+
+async def nothing():
+    pass
+
+
+
+def tasks(n):
+    deferreds = [defer.ensureDeferred(nothing(), loop=loop) for i in range(n)]
+    loop.run_until_complete(deferreds[-1].asFuture(loop))
+
+
+
+for name, f, args in [
+    ("fromFuture, done future", fromDoneFutures, (ITERATIONS,)),
+    ("fromFuture, pending future", fromPendingFutures, (ITERATIONS,)),
+    ("asFuture, fired Deferred", asFutures, (ITERATIONS,)),
+    ("await asFuture() in a task",
+     lambda n: loop.run_until_complete(awaitDeferreds(n)), (ITERATIONS,)),
+    ("ensureDeferred as a task", tasks, (ITERATIONS,)),
+]:
+    elapsed = timeit(f, 1, *args)
+    print("%s: %10d per second" % (name, args[0] / elapsed))
+
+loop.close()
@@ -0,0 +1,80 @@
+#!/usr/bin/python
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how fast inlineCallbacks generators and coroutines run by
+ensureDeferred get through their yields and awaits.
+
+This benchmark needs Python 3.5 or later, for async/await.
+"""
+
+from __future__ import print_function
+
+from timer import timeit
+from twisted.internet import defer
+
+AWAITS = 1000000
+
+
+async def awaitFired(n):
+    d = defer.succeed(None)
+    for i in range(n):
+        await d
+
+
+
+async def awaitSucceed(n):
+    for i in range(n):
+        await defer.succeed(i)
+
+
+
+async def awaitPending(n, pending):
+    for i in range(n):
+        d = defer.Deferred()
+        pending.append(d)
+        await d
+
+
+
+@defer.inlineCallbacks
+def yieldSucceed(n):
+    for i in range(n):
+        yield defer.succeed(i)
+
+
+
+@defer.inlineCallbacks
+def leaf(i):
+    yield defer.succeed(i)
+    defer.returnValue(i)
+
+
+
+@defer.inlineCallbacks
+def yieldNested(n):
+    for i in range(n):
+        yield leaf(i)
+
+
+
+def runPending(n):
+    pending = []
+    defer.ensureDeferred(awaitPending(n, pending))
+    while pending:
+        pending.pop().callback(None)
+
+
+
+for name, f, args in [
+    ("await fired Deferred", lambda n: defer.ensureDeferred(awaitFired(n)),
+     (AWAITS,)),
+    ("await succeed()", lambda n: defer.ensureDeferred(awaitSucceed(n)),
+     (AWAITS,)),
+    ("await pending Deferred", runPending, (AWAITS,)),
+    ("yield succeed()", yieldSucceed, (AWAITS,)),
+    ("yield nested inlineCallbacks", yieldNested, (AWAITS // 10,)),
+]:
+    elapsed = timeit(f, 1, *args)
+    print("%s: %10d per second" % (name, args[0] / elapsed))
@@ -0,0 +1,93 @@
+#!/usr/bin/python
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure the time taken to read a JSON log file with
+L{twisted.logger.eventsFromJSONLogFile} and with
+L{twisted.logger.eventsFromMappedJSONLogFile}, with and without filters and
+split across several worker processes.
+"""
+
+from __future__ import print_function
+
+import multiprocessing
+import os
+import tempfile
+import time
+
+from twisted.logger import (
+    Logger, LogLevel, jsonFileLogObserver, eventsFromJSONLogFile,
+    eventsFromMappedJSONLogFile, jsonLogFileShards,
+)
+
+EVENTS = 200000
+PROCESSES = 4
+
+
+def writeLog(path):
+    with open(path, "w") as outFile:
+        observer = jsonFileLogObserver(outFile)
+        levels = list(LogLevel.iterconstants())
+        for i in range(EVENTS):
+            log = Logger(namespace="benchmark.%d" % (i % 10,),
+                         observer=observer)
+            log.emit(levels[i % len(levels)], "Got data: {data!r}.",
+                     data=u"x" * 40)
+
+
+
+def countEvents(path, **kwargs):
+    with open(path, "rb") as inFile:
+        return sum(1 for event in eventsFromMappedJSONLogFile(inFile, **kwargs))
+
+
+
+def countShard(args):
+    path, (start, end) = args
+    return countEvents(path, minimumLevel=LogLevel.error, start=start,
+                       end=end)
+
+
+
+def measure(name, function, *args, **kwargs):
+    before = time.time()
+    count = function(*args, **kwargs)
+    after = time.time()
+    print("%-42s %7d events: %f seconds" % (name, count, after - before))
+
+
+
+def readStream(path):
+    with open(path, "rb") as inFile:
+        return sum(1 for event in eventsFromJSONLogFile(inFile))
+
+
+
+def readParallel(path):
+    with open(path, "rb") as inFile:
+        shards = jsonLogFileShards(inFile, PROCESSES)
+    pool = multiprocessing.Pool(PROCESSES)
+    try:
+        return sum(pool.map(countShard, [(path, shard) for shard in shards]))
+    finally:
+        pool.close()
+        pool.join()
+
+
+
+if __name__ == '__main__':
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        writeLog(path)
+        measure("eventsFromJSONLogFile", readStream, path)
+        measure("eventsFromMappedJSONLogFile", countEvents, path)
+        measure("mapped, namespace filter", countEvents, path,
+                namespace="benchmark.3")
+        measure("mapped, error level filter", countEvents, path,
+                minimumLevel=LogLevel.error)
+        measure("mapped, error level filter, %d processes" % (PROCESSES,),
+                readParallel, path)
+    finally:
+        os.remove(path)
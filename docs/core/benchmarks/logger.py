@@ -0,0 +1,49 @@
+#!/usr/bin/python
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure the cost of L{twisted.logger.Logger} calls at a log level which
+L{twisted.logger.globalLogLevelPredicate} disables, compared with calls at an
+enabled level which are delivered to an observer, and the cost of rendering
+events as text and as JSON.
+"""
+
+from __future__ import print_function
+
+from timer import timeit
+from twisted.logger import (
+    Logger, LogLevel, globalLogLevelPredicate, globalLogPublisher,
+    formatEvent, formatEventAsClassicLogText, eventAsJSON,
+)
+
+ITERATIONS = 100000
+
+events = []
+globalLogPublisher.addObserver(events.append)
+log = Logger(namespace="benchmark")
+
+
+def emit(level):
+    log.emit(level, "Got data: {data!r}.", data=b"x" * 20)
+
+
+elapsed = timeit(emit, ITERATIONS, LogLevel.debug)
+print("enabled debug emit, no level set: %10d cps" % (ITERATIONS / elapsed,))
+
+globalLogLevelPredicate.setLogLevelForNamespace("benchmark", LogLevel.info)
+del events[:]
+elapsed = timeit(emit, ITERATIONS, LogLevel.debug)
+assert not events
+print("disabled debug emit:              %10d cps" % (ITERATIONS / elapsed,))
+elapsed = timeit(emit, ITERATIONS, LogLevel.info)
+print("enabled info emit:                %10d cps" % (ITERATIONS / elapsed,))
+
+event = events[0]
+del events[:]
+for name, render in [("formatEvent", formatEvent),
+                     ("formatEventAsClassicLogText",
+                      formatEventAsClassicLogText),
+                     ("eventAsJSON", eventAsJSON)]:
+    elapsed = timeit(render, ITERATIONS // 10, dict(event))
+    print("%-27s       %10d cps" % (name, ITERATIONS // 10 / elapsed))
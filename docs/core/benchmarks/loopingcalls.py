@@ -0,0 +1,79 @@
+#!/usr/bin/python
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how much CPU time the reactor spends running many LoopingCalls with
+the same interval, such as one heartbeat per connection, when each schedules
+itself and when they are run by a LoopingCallScheduler.
+
+Run with no arguments for LoopingCalls which each use callLater, or with
+"grouped" or "coarse" for a LoopingCallScheduler without and with a
+resolution.  The reactor can only be run once, so each needs its own process.
+"""
+
+from __future__ import division, print_function
+
+import os
+import random
+import sys
+
+from twisted.internet import reactor, task
+
+CALLS = 10000
+INTERVAL = 0.1
+DURATION = 3
+
+
+
+def cpuTime():
+    times = os.times()
+    return times[0] + times[1]
+
+
+
+def run(name, scheduler):
+    """
+    Start C{CALLS} LoopingCalls at random times within one interval, run the
+    reactor for C{DURATION} seconds, and report the CPU time used per call.
+    """
+    count = [0]
+    def heartbeat():
+        count[0] += 1
+
+    calls = []
+    def startOne():
+        call = task.LoopingCall(heartbeat)
+        call.scheduler = scheduler
+        call.start(INTERVAL, now=False)
+        calls.append(call)
+    for i in range(CALLS):
+        reactor.callLater(random.random() * INTERVAL, startOne)
+
+    def measure():
+        count[0] = 0
+        started = cpuTime()
+        def stop():
+            used = cpuTime() - started
+            for call in calls:
+                call.stop()
+            print("%s: %d calls, %.2f microseconds of CPU per call" % (
+                name, count[0], used / count[0] * 1e6))
+            reactor.stop()
+        reactor.callLater(DURATION, stop)
+    reactor.callLater(INTERVAL * 2, measure)
+    reactor.run()
+
+
+
+def main():
+    if sys.argv[1:] == ["grouped"]:
+        run("LoopingCallScheduler()", task.LoopingCallScheduler())
+    elif sys.argv[1:] == ["coarse"]:
+        run("LoopingCallScheduler(resolution=0.01)",
+            task.LoopingCallScheduler(resolution=0.01))
+    else:
+        run("callLater", None)
+
+if __name__ == '__main__':
+    main()
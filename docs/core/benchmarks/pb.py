@@ -0,0 +1,103 @@
+#!/usr/bin/python
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure the time taken by Perspective Broker calls which carry a large list
+or a L{twisted.spread.util.Stream} argument, over a TCP connection on the
+loopback interface.
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from twisted.internet import reactor, defer
+from twisted.spread import pb, util
+
+
+class Collector(pb.Root):
+    def remote_collect(self, items):
+        return len(items)
+
+
+    def remote_echo(self, value):
+        return value
+
+
+    def remote_stream(self, stream):
+        return stream.collect().addCallback(len)
+
+
+
+@defer.inlineCallbacks
+def benchmark(root, totalSize, itemSize, calls):
+    items = [b'x' * itemSize] * (totalSize // itemSize)
+    before = time.time()
+    for i in range(calls):
+        count = yield root.callRemote("collect", items)
+    after = time.time()
+    assert count == len(items), (count, len(items))
+    print('totalSize:', totalSize, end=' ')
+    print('itemSize:', itemSize, end=' ')
+    print('calls:', calls, end=' ')
+    print('Time per call:', (after - before) / calls)
+
+
+
+@defer.inlineCallbacks
+def benchmarkStream(root, totalSize, chunkSize):
+    chunk = b'x' * chunkSize
+    before = time.time()
+    size = yield root.callRemote(
+        "stream", util.Stream(chunk for i in range(totalSize // chunkSize)))
+    after = time.time()
+    assert size == totalSize, (size, totalSize)
+    print('stream totalSize:', totalSize, end=' ')
+    print('chunkSize:', chunkSize, end=' ')
+    print('Time:', after - before)
+
+
+
+@defer.inlineCallbacks
+def benchmarkPipelined(root, calls, batching):
+    if batching:
+        root.broker.startBatching()
+    before = time.time()
+    yield defer.gatherResults(
+        [root.callRemote("echo", i) for i in range(calls)])
+    after = time.time()
+    root.broker.stopBatching()
+    print('pipelined calls:', calls, end=' ')
+    print('batching:', batching, end=' ')
+    print('Calls per second:', calls / (after - before))
+
+
+
+@defer.inlineCallbacks
+def main():
+    port = reactor.listenTCP(0, pb.PBServerFactory(Collector()),
+                             interface='127.0.0.1')
+    factory = pb.PBClientFactory()
+    reactor.connectTCP('127.0.0.1', port.getHost().port, factory)
+    root = yield factory.getRootObject()
+    try:
+        for totalSize in (2 ** 20, 10 * 2 ** 20):
+            for itemSize in (100, 1000, 10000):
+                yield benchmark(root, totalSize, itemSize, 5)
+        for batching in (False, True):
+            yield benchmarkPipelined(root, 10000, batching)
+        for totalSize in (10 * 2 ** 20, 100 * 2 ** 20):
+            yield benchmarkStream(root, totalSize, 2 ** 16)
+    finally:
+        factory.disconnect()
+        yield port.stopListening()
+
+
+
+if __name__ == '__main__':
+    d = main()
+    d.addErrback(lambda f: f.printTraceback(sys.stderr))
+    d.addBoth(lambda ignored: reactor.stop())
+    reactor.run()
@@ -20,8 +20,32 @@ def test_performance():
     clock.advance(1000000)
 
 
+
+def cooperatorThroughput(n, weights, **kwargs):
+    """
+    Run C{n} units of work through a L{task.Cooperator}, split between tasks
+    with the given weights, with a scheduler which runs each step at once.
+    """
+    steps = []
+    coop = task.Cooperator(scheduler=steps.append, **kwargs)
+    perTask = n // len(weights)
+    for weight in weights:
+        coop.cooperate(iter(range(perTask)), weight=weight)
+    while steps:
+        steps.pop()()
+
+
+
 def main():
     print("LoopingCall large advance takes", timeit(test_performance, iter=1))
+    units = 1000000
+    for name, kwargs in [
+            ("default", dict(weights=[1] * 10)),
+            ("weighted", dict(weights=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10])),
+            ("latency", dict(weights=[1] * 10, latency=0.01)),
+    ]:
+        elapsed = timeit(cooperatorThroughput, 1, units, **kwargs)
+        print("Cooperator, %s: %10d units per second" % (name, units / elapsed))
 
 if __name__ == '__main__':
     main()
@@ -22,11 +22,11 @@ import traceback
 import types
 import warnings
 from sys import exc_info, version_info
-from functools import wraps
+from functools import wraps, partial
 from incremental import Version
 
 # Twisted imports
-from twisted.python.compat import cmp, comparable
+from twisted.python.compat import cmp, comparable, _PY3
 from twisted.python import lockfile, failure
 from twisted.logger import Logger
 from twisted.python.deprecate import warnAboutFunction, deprecated
@@ -85,7 +85,13 @@ def succeed(result):
     @rtype: L{Deferred}
     """
     d = Deferred()
-    d.callback(result)
+    if d.debug or isinstance(result, (Deferred, failure.Failure)):
+        d.callback(result)
+    else:
+        # Nothing can have been added to a new Deferred's callbacks, so there
+        # is nothing to run.
+        d.called = True
+        d.result = result
     return d
 
 
@@ -238,24 +244,26 @@ class Deferred:
     @ivar _chainedTo: If this L{Deferred} is waiting for the result of another
         L{Deferred}, this is a reference to the other Deferred.  Otherwise,
         L{None}.
-    """
 
-    called = False
-    paused = False
-    _debugInfo = None
-    _suppressAlreadyCalled = False
+    @ivar callbacks: The callbacks and errbacks which have not yet been run,
+        oldest first.  Each is a 6-L{tuple} of a callback, its positional
+        arguments and its keyword arguments (or L{None}), followed by an
+        errback, its positional arguments and its keyword arguments (or
+        L{None}).
+    @type callbacks: L{list}
+    """
 
-    # Are we currently running a user-installed callback?  Meant to prevent
-    # recursive running of callbacks when a reentrant call to add a callback is
-    # used.
-    _runningCallbacks = False
+    # The attributes every Deferred has are kept in slots, but instances
+    # still get a __dict__ (created only when first used), since code sets
+    # attributes of its own, such as debug, on Deferreds.
+    __slots__ = ('called', 'paused', 'result', 'callbacks', '_canceller',
+                 '_debugInfo', '_suppressAlreadyCalled', '_runningCallbacks',
+                 '_chainedTo', '__dict__', '__weakref__')
 
     # Keep this class attribute for now, for compatibility with code that
     # sets it directly.
     debug = False
 
-    _chainedTo = None
-
     def __init__(self, canceller=None):
         """
         Initialize a L{Deferred}.
@@ -280,8 +288,17 @@ class Deferred:
         @type canceller: a 1-argument callable which takes a L{Deferred}. The
             return result is ignored.
         """
+        self.called = False
+        self.paused = False
         self.callbacks = []
         self._canceller = canceller
+        self._debugInfo = None
+        self._suppressAlreadyCalled = False
+        # Are we currently running a user-installed callback?  Meant to
+        # prevent recursive running of callbacks when a reentrant call to add
+        # a callback is used.
+        self._runningCallbacks = False
+        self._chainedTo = None
         if self.debug:
             self._debugInfo = DebugInfo()
             self._debugInfo.creator = traceback.format_stack()[:-1]
@@ -300,9 +317,9 @@ class Deferred:
         """
         assert callable(callback)
         assert errback is None or callable(errback)
-        cbs = ((callback, callbackArgs, callbackKeywords),
-               (errback or (passthru), errbackArgs, errbackKeywords))
-        self.callbacks.append(cbs)
+        self.callbacks.append(
+            (callback, callbackArgs or (), callbackKeywords,
+             errback or passthru, errbackArgs or (), errbackKeywords))
 
         if self.called:
             self._runCallbacks()
@@ -315,8 +332,12 @@ class Deferred:
 
         See L{addCallbacks}.
         """
-        return self.addCallbacks(callback, callbackArgs=args,
-                                 callbackKeywords=kw)
+        assert callable(callback)
+        self.callbacks.append((callback, args, kw, passthru, (), None))
+
+        if self.called:
+            self._runCallbacks()
+        return self
 
 
     def addErrback(self, errback, *args, **kw):
@@ -325,9 +346,12 @@ class Deferred:
 
         See L{addCallbacks}.
         """
-        return self.addCallbacks(passthru, errback,
-                                 errbackArgs=args,
-                                 errbackKeywords=kw)
+        assert callable(errback)
+        self.callbacks.append((passthru, (), None, errback, args, kw))
+
+        if self.called:
+            self._runCallbacks()
+        return self
 
 
     def addBoth(self, callback, *args, **kw):
@@ -337,9 +361,12 @@ class Deferred:
 
         See L{addCallbacks}.
         """
-        return self.addCallbacks(callback, callback,
-                                 callbackArgs=args, errbackArgs=args,
-                                 callbackKeywords=kw, errbackKeywords=kw)
+        assert callable(callback)
+        self.callbacks.append((callback, args, kw, callback, args, kw))
+
+        if self.called:
+            self._runCallbacks()
+        return self
 
 
     def addTimeout(self, timeout, clock, onTimeoutCancel=None):
@@ -562,15 +589,21 @@ class Deferred:
             self._debugInfo.invoker = traceback.format_stack()[:-2]
         self.called = True
         self.result = result
-        self._runCallbacks()
+        if (self.callbacks or self.paused or self._debugInfo is not None or
+                isinstance(result, failure.Failure)):
+            self._runCallbacks()
+        else:
+            # There is nothing for _runCallbacks to do except forget what this
+            # Deferred was chained to.
+            self._chainedTo = None
 
 
     def _continuation(self):
         """
-        Build a tuple of callback and errback with L{_CONTINUE}.
+        Build a callback and errback entry with L{_CONTINUE}.
         """
-        return ((_CONTINUE, (self,), None),
-                (_CONTINUE, (self,), None))
+        args = (self,)
+        return (_CONTINUE, args, None, _CONTINUE, args, None)
 
 
     def _runCallbacks(self):
@@ -621,12 +654,13 @@ class Deferred:
 
             finished = True
             current._chainedTo = None
-            while current.callbacks:
-                item = current.callbacks.pop(0)
-                callback, args, kw = item[
-                    isinstance(current.result, failure.Failure)]
-                args = args or ()
-                kw = kw or {}
+            callbacks = current.callbacks
+            while callbacks:
+                item = callbacks.pop(0)
+                if isinstance(current.result, failure.Failure):
+                    callback, args, kw = item[3], item[4], item[5]
+                else:
+                    callback, args, kw = item[0], item[1], item[2]
 
                 # Avoid recursion if we can.
                 if callback is _CONTINUE:
@@ -648,7 +682,11 @@ class Deferred:
                 try:
                     current._runningCallbacks = True
                     try:
-                        current.result = callback(current.result, *args, **kw)
+                        if kw:
+                            current.result = callback(
+                                current.result, *args, **kw)
+                        else:
+                            current.result = callback(current.result, *args)
                         if current.result is current:
                             warnAboutFunction(
                                 callback,
@@ -697,17 +735,77 @@ class Deferred:
                     if current._debugInfo is None:
                         current._debugInfo = DebugInfo()
                     current._debugInfo.failResult = current.result
-                else:
+                elif current._debugInfo is not None:
                     # Clear out any Failure in the _debugInfo, since the result
                     # is no longer a Failure.
-                    if current._debugInfo is not None:
-                        current._debugInfo.failResult = None
+                    current._debugInfo.failResult = None
 
                 # This Deferred is done, pop it from the chain and move back up
                 # to the Deferred which supplied us with our result.
                 chain.pop()
 
 
+    def asFuture(self, loop):
+        """
+        Adapt this L{Deferred} into an C{asyncio.Future} which is bound to
+        C{loop}.
+
+        The future is given this L{Deferred}'s result as soon as there is one;
+        if this L{Deferred} already has a result, the future is done before
+        this method returns.  Cancelling the future cancels this L{Deferred}.
+
+        @note: Converting a L{Deferred} to a future consumes both its result
+            and its errors, so this method implicitly converts C{self} into a
+            L{Deferred} firing with L{None}, regardless of what its result
+            previously would have been.
+
+        @param loop: The asyncio event loop to bind the future to.
+        @type loop: C{asyncio.AbstractEventLoop}
+
+        @return: A future which will have the result of this L{Deferred}.
+        @rtype: C{asyncio.Future}
+        """
+        try:
+            createFuture = loop.create_future
+        except AttributeError:
+            # Event loops only have create_future since Python 3.5.2.
+            from asyncio import Future
+            future = Future(loop=loop)
+        else:
+            future = createFuture()
+        cancel = partial(_cancelFromFuture, self)
+        future.add_done_callback(cancel)
+        self.addCallbacks(_succeedFuture, _failFuture,
+                          callbackArgs=(future, cancel),
+                          errbackArgs=(future, cancel))
+        return future
+
+
+    @classmethod
+    def fromFuture(cls, future):
+        """
+        Adapt an C{asyncio.Future} to a L{Deferred}.
+
+        If the future is already done, the L{Deferred} has its outcome before
+        this method returns, rather than after a trip through the event loop.
+        A cancelled future is reported as a L{CancelledError}, and cancelling
+        the L{Deferred} cancels the future.
+
+        @param future: The future to adapt.
+        @type future: C{asyncio.Future}
+
+        @return: A L{Deferred} which will fire with the future's result, or
+            fail with its exception.
+        @rtype: L{Deferred}
+        """
+        d = cls(partial(_cancelFuture, future))
+        if future.done():
+            _fireFromFuture(d, future)
+        else:
+            future.add_done_callback(partial(_fireFromFuture, d))
+        return d
+
+
     def __str__(self):
         """
         Return a string representation of this C{Deferred}.
@@ -750,6 +848,23 @@ class Deferred:
     __await__ = __iter__
     __next__ = send
 
+    if _PY3:
+        # Awaiting a Deferred that already has a result is common, and a
+        # generator hands the result back to the awaiting coroutine without
+        # the StopIteration that send has to raise.  Only Python 3 generators
+        # can return a value, hence the exec.
+        exec("""def __await__(self):
+        while self.paused or not self.called:
+            yield self
+        result = self.result
+        if isinstance(result, failure.Failure):
+            # Clear the failure on debugInfo so it doesn't raise "unhandled
+            # exception"
+            self._debugInfo.failResult = None
+            raise result.value
+        return result
+""")
+
 
 
 def _cancelledToTimedOutError(value, timeout):
@@ -775,7 +890,102 @@ def _cancelledToTimedOutError(value, timeout):
 
 
 
-def ensureDeferred(coro):
+def _succeedFuture(result, future, cancel):
+    """
+    Give a future created by L{Deferred.asFuture} its L{Deferred}'s result,
+    unless the future has been cancelled.
+
+    @param result: The result of the L{Deferred}.
+
+    @param future: The future.
+    @type future: C{asyncio.Future}
+
+    @param cancel: The future's done callback which cancels the L{Deferred};
+        it is removed, since the L{Deferred} has fired.
+    """
+    if not future.cancelled():
+        future.remove_done_callback(cancel)
+        future.set_result(result)
+
+
+
+def _failFuture(reason, future, cancel):
+    """
+    Give a future created by L{Deferred.asFuture} its L{Deferred}'s
+    exception, unless the future has been cancelled.
+
+    @param reason: The failure of the L{Deferred}.
+    @type reason: L{failure.Failure}
+
+    @param future: The future.
+    @type future: C{asyncio.Future}
+
+    @param cancel: The future's done callback which cancels the L{Deferred};
+        it is removed, since the L{Deferred} has fired.
+    """
+    if not future.cancelled():
+        future.remove_done_callback(cancel)
+        future.set_exception(reason.value)
+
+
+
+def _cancelFromFuture(deferred, future):
+    """
+    Cancel the L{Deferred} adapted by L{Deferred.asFuture} if its future has
+    been cancelled.
+
+    @param deferred: The L{Deferred}.
+    @type deferred: L{Deferred}
+
+    @param future: The future, which is done.
+    @type future: C{asyncio.Future}
+    """
+    if future.cancelled():
+        deferred.cancel()
+
+
+
+def _cancelFuture(future, deferred):
+    """
+    Cancel the future adapted by L{Deferred.fromFuture} when its L{Deferred}
+    is cancelled.
+
+    @param future: The future.
+    @type future: C{asyncio.Future}
+
+    @param deferred: The L{Deferred}, which will be failed with
+        L{CancelledError} by L{Deferred.cancel}.
+    @type deferred: L{Deferred}
+    """
+    future.cancel()
+
+
+
+def _fireFromFuture(deferred, future):
+    """
+    Give a L{Deferred} created by L{Deferred.fromFuture} the outcome of its
+    future, unless the L{Deferred} has already been cancelled.
+
+    @param deferred: The L{Deferred}.
+    @type deferred: L{Deferred}
+
+    @param future: The future, which is done.
+    @type future: C{asyncio.Future}
+    """
+    if deferred.called:
+        return
+    if future.cancelled():
+        deferred.errback(failure.Failure(CancelledError()))
+        return
+    exception = future.exception()
+    if exception is None:
+        deferred.callback(future.result())
+    else:
+        deferred.errback(failure.Failure(exception))
+
+
+
+def ensureDeferred(coro, loop=None):
     """
     Schedule the execution of a coroutine that awaits/yields from L{Deferred}s,
     wrapping it in a L{Deferred} that will fire on success/failure of the
@@ -806,10 +1016,20 @@ def ensureDeferred(coro):
 
         react(main)
 
+    If C{loop} is given, the coroutine is instead scheduled directly as a
+    task on that asyncio event loop, and the L{Deferred} fires with the
+    task's outcome, as with L{Deferred.fromFuture}.  Such a coroutine is run
+    by asyncio, so it must await asyncio futures rather than L{Deferred}s,
+    converting any L{Deferred}s it needs with L{Deferred.asFuture}.
+
     @param coro: The coroutine object to schedule, or a L{Deferred}.
     @type coro: A Python 3.5+ C{async def} C{coroutine}, a Python 3.3+
         C{yield from} using L{types.GeneratorType}, or a L{Deferred}.
 
+    @param loop: An asyncio event loop to run C{coro} on as a task, or
+        L{None} to run it with L{Deferred}s.
+    @type loop: C{asyncio.AbstractEventLoop}
+
     @rtype: L{Deferred}
     """
     from types import GeneratorType
@@ -818,6 +1038,8 @@ def ensureDeferred(coro):
         from asyncio import iscoroutine
 
         if iscoroutine(coro) or isinstance(coro, GeneratorType):
+            if loop is not None:
+                return Deferred.fromFuture(loop.create_task(coro))
             return _inlineCallbacks(None, coro, Deferred())
 
     elif version_info >= (3, 3, 0):
@@ -1277,6 +1499,31 @@ def returnValue(val):
 
 
 
+def _gotResultInlineCallbacks(r, waiting, g, deferred):
+    """
+    Resume the generator driven by L{_inlineCallbacks} with the result of the
+    L{Deferred} it yielded, or, if that result arrives while
+    L{_inlineCallbacks} is still waiting for it, hand it over.
+
+    @param r: The result of the yielded L{Deferred}.
+
+    @param waiting: The C{waiting} list of the L{_inlineCallbacks} call which
+        added this callback.
+    @type waiting: L{list}
+
+    @param g: The generator.
+
+    @param deferred: The L{Deferred} for the result of the generator.
+    @type deferred: L{Deferred}
+    """
+    if waiting[0]:
+        waiting[0] = False
+        waiting[1] = r
+    else:
+        _inlineCallbacks(r, g, deferred)
+
+
+
 def _inlineCallbacks(result, g, deferred):
     """
     See L{inlineCallbacks}.
@@ -1284,7 +1531,9 @@ def _inlineCallbacks(result, g, deferred):
     # This function is complicated by the need to prevent unbounded recursion
     # arising from repeatedly yielding immediately ready deferreds.  This while
     # loop and the waiting variable solve that by manually unfolding the
-    # recursion.
+    # recursion.  A yielded Deferred which already has a result is not waited
+    # for at all; its result is taken (as the callback added to it would) and
+    # the generator resumed straight away.
 
     waiting = [True, # waiting for result?
                None] # result
@@ -1347,14 +1596,17 @@ def _inlineCallbacks(result, g, deferred):
 
         if isinstance(result, Deferred):
             # a deferred was yielded, get the result.
-            def gotResult(r):
-                if waiting[0]:
-                    waiting[0] = False
-                    waiting[1] = r
-                else:
-                    _inlineCallbacks(r, g, deferred)
-
-            result.addBoth(gotResult)
+            if (result.called and not result.paused and
+                    not result._runningCallbacks):
+                r = result.result
+                result.result = None
+                # Make sure _debugInfo's failure state is updated.
+                if result._debugInfo is not None:
+                    result._debugInfo.failResult = None
+                result = r
+                continue
+
+            result.addBoth(_gotResultInlineCallbacks, waiting, g, deferred)
             if waiting[0]:
                 # Haven't called back yet, set flag so that we get reinvoked
                 # and return from the loop
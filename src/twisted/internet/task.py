@@ -13,6 +13,9 @@ __metaclass__ = type
 import sys
 import time
 import warnings
+from heapq import heappop, heappush
+from itertools import count
+from math import ceil
 
 from zope.interface import implementer
 
@@ -56,10 +59,18 @@ class LoopingCall:
     @type _runAtStart: C{bool}
     @ivar _runAtStart: A flag indicating whether the 'now' argument was passed
         to L{LoopingCall.start}.
+
+    @type scheduler: L{LoopingCallScheduler} or L{None}
+    @ivar scheduler: If not L{None}, the L{LoopingCallScheduler} which runs
+        this call, on one timer shared with the other calls it runs with the
+        same C{clock} and interval, instead of scheduling each iteration with
+        C{clock}'s C{callLater}.  Like C{clock}, this ought to be set before
+        calling L{start}.
     """
 
     call = None
     running = False
+    scheduler = None
     _deferred = None
     interval = None
     _runAtStart = False
@@ -223,22 +234,49 @@ class LoopingCall:
             self._scheduleFrom(self.starttime)
 
     def __call__(self):
-        def cb(result):
-            if self.running:
-                self._scheduleFrom(self.clock.seconds())
-            else:
-                d, self._deferred = self._deferred, None
-                d.callback(self)
+        self.call = None
+        try:
+            result = self.f(*self.a, **self.kw)
+            if not isinstance(result, (defer.Deferred, Failure)):
+                # The common case of a synchronous function is handled
+                # without wrapping its result in a Deferred.
+                self._iterationSucceeded(result)
+                return
+        except:
+            result = Failure(captureVars=defer.Deferred.debug)
+        if isinstance(result, defer.Deferred):
+            result.addCallback(self._iterationSucceeded)
+            result.addErrback(self._iterationFailed)
+        else:
+            self._iterationFailed(result)
+
 
-        def eb(failure):
-            self.running = False
+    def _iterationSucceeded(self, result):
+        """
+        Schedule the next iteration after a successful one, or, if this
+        L{LoopingCall} has been stopped, fire the L{Deferred} returned by
+        L{start}.
+
+        @param result: The result of the iteration, which is ignored.
+        """
+        if self.running:
+            self._scheduleFrom(self.clock.seconds())
+        else:
             d, self._deferred = self._deferred, None
-            d.errback(failure)
+            d.callback(self)
 
-        self.call = None
-        d = defer.maybeDeferred(self.f, *self.a, **self.kw)
-        d.addCallback(cb)
-        d.addErrback(eb)
+
+    def _iterationFailed(self, failure):
+        """
+        Stop after a failed iteration, and errback the L{Deferred} returned by
+        L{start} with the failure.
+
+        @param failure: The failure.
+        @type failure: L{Failure}
+        """
+        self.running = False
+        d, self._deferred = self._deferred, None
+        d.errback(failure)
 
 
     def _scheduleFrom(self, when):
@@ -273,7 +311,10 @@ class LoopingCall:
             # Finally, if everything else is normal, we just return the
             # computed delay.
             return untilNextInterval
-        self.call = self.clock.callLater(howLong(), self)
+        if self.scheduler is not None and self.interval:
+            self.call = self.scheduler._callAt(when + howLong(), self)
+        else:
+            self.call = self.clock.callLater(howLong(), self)
 
 
     def __repr__(self):
@@ -292,6 +333,257 @@ class LoopingCall:
 
 
 
+class _GroupedCall(object):
+    """
+    A pending iteration of a L{LoopingCall} which is run by a
+    L{LoopingCallScheduler}.  This has the parts of L{IDelayedCall} which
+    L{LoopingCall} uses.
+
+    @ivar time: The time at which the iteration is due.
+    @type time: C{float}
+
+    @ivar loopingCall: The L{LoopingCall} to run, or L{None} once it has been
+        run or cancelled.
+    @type loopingCall: L{LoopingCall} or L{None}
+
+    @ivar group: The group which will run the iteration.
+    @type group: L{_IntervalGroup}
+    """
+    __slots__ = ('time', 'loopingCall', 'group')
+
+    def __init__(self, time, loopingCall, group):
+        self.time = time
+        self.loopingCall = loopingCall
+        self.group = group
+
+
+    def getTime(self):
+        """
+        @return: The time at which the iteration is due.
+        @rtype: C{float}
+        """
+        return self.time
+
+
+    def active(self):
+        """
+        @return: C{True} if the iteration has been neither run nor cancelled.
+        @rtype: C{bool}
+        """
+        return self.loopingCall is not None
+
+
+    def cancel(self):
+        """
+        Cancel the iteration.  Cancelling an iteration which has already been
+        run or cancelled does nothing.
+        """
+        if self.loopingCall is not None:
+            self.loopingCall = None
+            self.group._cancelled()
+
+
+
+class _IntervalGroup(object):
+    """
+    The L{LoopingCall}s of a L{LoopingCallScheduler} which have the same clock
+    and interval, and the one delayed call on that clock which runs them.
+
+    Pending iterations are kept in a heap ordered by the time at which they
+    are due, and then by the order in which they were scheduled.  Cancelled
+    iterations are left in the heap until they reach the top of it.
+
+    @ivar _key: The key of this group in its scheduler's C{_groups}.
+    @type _key: 2-L{tuple} of L{IReactorTime} provider and C{float}
+
+    @ivar _heap: The pending iterations, as C{(time, sequence, call)} tuples.
+    @type _heap: L{list}
+
+    @ivar _live: The number of iterations in C{_heap} which have been neither
+        run nor cancelled.
+    @type _live: C{int}
+
+    @ivar _timer: The delayed call which will run the iterations which are
+        due, or L{None}.
+    @type _timer: L{IDelayedCall} provider or L{None}
+
+    @ivar _running: C{True} while iterations are being run.
+    @type _running: C{bool}
+    """
+
+    def __init__(self, scheduler, clock, interval):
+        """
+        @param scheduler: The scheduler this group belongs to.
+        @type scheduler: L{LoopingCallScheduler}
+
+        @param clock: The clock shared by the group's L{LoopingCall}s.
+        @type clock: L{IReactorTime} provider
+
+        @param interval: The interval shared by the group's L{LoopingCall}s.
+        @type interval: C{float}
+        """
+        self._scheduler = scheduler
+        self._clock = clock
+        self._key = (clock, interval)
+        self._heap = []
+        self._live = 0
+        self._timer = None
+        self._running = False
+
+
+    def add(self, when, loopingCall):
+        """
+        Schedule an iteration of a L{LoopingCall}.
+
+        @param when: The time at which the iteration is due.
+        @type when: C{float}
+
+        @param loopingCall: The L{LoopingCall} to run.
+        @type loopingCall: L{LoopingCall}
+
+        @return: The pending iteration.
+        @rtype: L{_GroupedCall}
+        """
+        call = _GroupedCall(when, loopingCall, self)
+        heappush(self._heap, (when, next(self._scheduler._sequence), call))
+        self._live += 1
+        if not self._running and (
+                self._timer is None or
+                self._scheduler._wakeTime(when) < self._timer.getTime()):
+            self._schedule()
+        return call
+
+
+    def _cancelled(self):
+        """
+        Note that one of this group's iterations has been cancelled, and stop
+        the timer if none are left.
+        """
+        self._live -= 1
+        if not self._live and not self._running:
+            del self._heap[:]
+            self._schedule()
+
+
+    def _schedule(self):
+        """
+        Set the timer for the earliest pending iteration, or, if there are
+        none, stop it and remove this group from its scheduler.
+        """
+        heap = self._heap
+        while heap and heap[0][2].loopingCall is None:
+            heappop(heap)
+        if not heap:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            del self._scheduler._groups[self._key]
+            return
+        delay = max(
+            0, self._scheduler._wakeTime(heap[0][0]) - self._clock.seconds())
+        if self._timer is None:
+            self._timer = self._clock.callLater(delay, self._run)
+        else:
+            self._timer.reset(delay)
+
+
+    def _run(self):
+        """
+        Run every iteration which is due, and then set the timer for the next.
+        """
+        self._timer = None
+        self._running = True
+        now = self._clock.seconds()
+        heap = self._heap
+        try:
+            while heap and heap[0][0] <= now:
+                call = heappop(heap)[2]
+                loopingCall = call.loopingCall
+                if loopingCall is not None:
+                    call.loopingCall = None
+                    self._live -= 1
+                    loopingCall()
+        finally:
+            self._running = False
+            self._schedule()
+
+
+
+class LoopingCallScheduler(object):
+    """
+    Run many L{LoopingCall}s on a few timers.
+
+    L{LoopingCall}s whose L{scheduler<LoopingCall.scheduler>} is a
+    L{LoopingCallScheduler} are grouped by their clock and interval, and each
+    group has a single delayed call on its clock, which runs every iteration
+    due in the group whenever it goes off.  This saves the clock (usually the
+    reactor) from keeping and sorting a delayed call for each L{LoopingCall},
+    which adds up when there are thousands of them, such as one heartbeat per
+    connection.
+
+    The time at which each iteration is due is worked out by the
+    L{LoopingCall} in the usual way, so the intervals of a L{LoopingCall} do
+    not drift, and L{LoopingCall.withCount} counts calls the same way, however
+    it is scheduled.
+
+    @ivar resolution: If not zero, iterations are run at the first multiple
+        of C{resolution} seconds at or after the time they are due, so that
+        iterations due at nearby times are run together.  Iterations are
+        never run early, so this may delay each of them by up to
+        C{resolution}.
+    @type resolution: C{float}
+    """
+
+    def __init__(self, resolution=0):
+        """
+        @param resolution: See L{LoopingCallScheduler.resolution}.
+        @type resolution: C{float}
+        """
+        if resolution < 0:
+            raise ValueError("resolution must be >= 0")
+        self.resolution = resolution
+        self._groups = {}
+        self._sequence = count()
+
+
+    def _wakeTime(self, when):
+        """
+        Work out when a timer should go off to run an iteration.
+
+        @param when: The time at which the iteration is due.
+        @type when: C{float}
+
+        @return: The time at which to run the iteration.
+        @rtype: C{float}
+        """
+        resolution = self.resolution
+        if not resolution:
+            return when
+        return max(when, ceil(when / resolution) * resolution)
+
+
+    def _callAt(self, when, loopingCall):
+        """
+        Schedule the next iteration of a L{LoopingCall}.
+
+        @param when: The time at which the iteration is due.
+        @type when: C{float}
+
+        @param loopingCall: The L{LoopingCall}, which must have a non-zero
+            interval.
+        @type loopingCall: L{LoopingCall}
+
+        @return: The pending iteration.
+        @rtype: L{_GroupedCall}
+        """
+        key = (loopingCall.clock, loopingCall.interval)
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _IntervalGroup(self, *key)
+        return group.add(when, loopingCall)
+
+
+
 class SchedulerError(Exception):
     """
     The operation could not be completed because the scheduler or one of its
@@ -359,6 +651,7 @@ class _Timer(object):
 
 
 
+_MINIMUM_SLICE_FRACTION = 0.1
 _EPSILON = 0.00000001
 def _defaultScheduler(x):
     from twisted.internet import reactor
@@ -399,13 +692,30 @@ class CooperativeTask(object):
         C{StopIteration}.
 
     @type _completionState: L{TaskFinished}
+
+    @ivar weight: The number of units of work this task does each time its
+        turn comes round, relative to the other tasks of its L{Cooperator}.
+    @type weight: C{int}
+
+    @ivar cpuTime: The total time, in seconds, which this task's iterator has
+        spent doing units of work.  Since the iterator runs in the reactor
+        thread, this is the time it has taken away from the reactor.
+    @type cpuTime: C{float}
+
+    @ivar workUnits: The number of units of work this task has done.
+    @type workUnits: C{int}
     """
 
-    def __init__(self, iterator, cooperator):
+    def __init__(self, iterator, cooperator, weight=1):
         """
         A private constructor: to create a new L{CooperativeTask}, see
         L{Cooperator.cooperate}.
         """
+        if weight < 1:
+            raise ValueError("weight must be at least 1, not %r" % (weight,))
+        self.weight = weight
+        self.cpuTime = 0.0
+        self.workUnits = 0
         self._iterator = iterator
         self._cooperator = cooperator
         self._deferreds = []
@@ -560,12 +870,20 @@ class Cooperator(object):
 
     Multiple L{Cooperator}s do not cooperate with each other, so for most
     cases you should use the L{global cooperator<task.cooperate>}.
+
+    Tasks take turns, doing as many units of work as their
+    L{weight<CooperativeTask.weight>} each turn, and the L{Cooperator} keeps
+    count of the L{time<CooperativeTask.cpuTime>} each of them spends working.
     """
 
+    _lastTickEnd = None
+
     def __init__(self,
                  terminationPredicateFactory=_Timer,
                  scheduler=_defaultScheduler,
-                 started=True):
+                 started=True,
+                 latency=None,
+                 seconds=time.time):
         """
         Create a scheduler-like object to which iterators may be added.
 
@@ -582,9 +900,23 @@ class Cooperator(object):
         @param started: A boolean which indicates whether iterators should be
         stepped as soon as they are added, or if they will be queued up until
         L{Cooperator.start} is called.
+
+        @param latency: If not L{None}, the longest time, in seconds, that the
+        reactor should go between handling I/O, which is used instead of
+        C{terminationPredicateFactory} to decide when each step ends.  Each
+        step is given whatever is left of C{latency} after the time the
+        reactor spent on other work since the last step, but never less than
+        a tenth of it, so that tasks make progress however busy the reactor
+        is.
+
+        @param seconds: A no-argument callable returning the current time in
+        seconds, used to measure how long tasks spend working and, when
+        C{latency} is given, to time steps.
         """
         self._tasks = []
         self._metarator = iter(())
+        self._latency = latency
+        self._seconds = seconds
         self._terminationPredicateFactory = terminationPredicateFactory
         self._scheduler = scheduler
         self._delayedCall = None
@@ -592,7 +924,7 @@ class Cooperator(object):
         self._started = started
 
 
-    def coiterate(self, iterator, doneDeferred=None):
+    def coiterate(self, iterator, doneDeferred=None, weight=1):
         """
         Add an iterator to the list of iterators this L{Cooperator} is
         currently running.
@@ -604,24 +936,33 @@ class Cooperator(object):
             the completion deferred.  It is suggested that you use the default,
             which creates a new Deferred for you.
 
+        @param weight: The number of units of work to do each time the task's
+            turn comes round.
+
         @return: a Deferred that will fire when the iterator finishes.
         """
         if doneDeferred is None:
             doneDeferred = defer.Deferred()
-        CooperativeTask(iterator, self).whenDone().chainDeferred(doneDeferred)
+        CooperativeTask(iterator, self, weight).whenDone().chainDeferred(
+            doneDeferred)
         return doneDeferred
 
 
-    def cooperate(self, iterator):
+    def cooperate(self, iterator, weight=1):
         """
         Start running the given iterator as a long-running cooperative task, by
         calling next() on it as a periodic timed event.
 
         @param iterator: the iterator to invoke.
 
+        @param weight: The number of units of work to do each time the task's
+            turn comes round.  A task with a weight of 3 gets three times as
+            many turns at its iterator as a task with a weight of 1.
+        @type weight: C{int}
+
         @return: a L{CooperativeTask} object representing this task.
         """
-        return CooperativeTask(iterator, self)
+        return CooperativeTask(iterator, self, weight)
 
 
     def _addTask(self, task):
@@ -648,17 +989,62 @@ class Cooperator(object):
             self._delayedCall = None
 
 
+    def _sliceEnd(self, now):
+        """
+        Work out when a step which starts now should end to keep to this
+        L{Cooperator}'s latency.
+
+        @param now: The current time.
+        @type now: C{float}
+
+        @return: The time at which the step should end.
+        @rtype: C{float}
+        """
+        latency = self._latency
+        budget = latency
+        if self._lastTickEnd is not None:
+            budget -= now - self._lastTickEnd
+        return now + max(budget, latency * _MINIMUM_SLICE_FRACTION)
+
+
     def _tasksWhileNotStopped(self):
         """
         Yield all L{CooperativeTask} objects in a loop as long as this
-        L{Cooperator}'s termination condition has not been met.
+        L{Cooperator}'s termination condition has not been met, each as many
+        times in a row as its weight, and add the time taken by the work done
+        for each to its C{cpuTime}.
         """
-        terminator = self._terminationPredicateFactory()
+        seconds = self._seconds
+        started = seconds()
+        terminator = None
+        if self._latency is not None:
+            end = self._sliceEnd(started)
+        elif (self._terminationPredicateFactory is _Timer and
+                seconds is time.time):
+            # The default termination condition reads the same clock as the
+            # accounting below, so check its deadline here instead of
+            # reading the clock twice for every unit of work.
+            end = started + _Timer.MAX_SLICE
+        else:
+            terminator = self._terminationPredicateFactory()
         while self._tasks:
             for t in self._metarator:
-                yield t
-                if terminator():
-                    return
+                units = t.weight
+                while True:
+                    yield t
+                    now = seconds()
+                    t.cpuTime += now - started
+                    t.workUnits += 1
+                    started = now
+                    if terminator is None:
+                        if now >= end:
+                            return
+                    elif terminator():
+                        return
+                    units -= 1
+                    if (units < 1 or t._pauseCount or
+                            t._completionState is not None):
+                        break
             self._metarator = iter(self._tasks)
 
 
@@ -669,6 +1055,8 @@ class Cooperator(object):
         self._delayedCall = None
         for taskObj in self._tasksWhileNotStopped():
             taskObj._oneWorkUnit()
+        if self._latency is not None:
+            self._lastTickEnd = self._seconds()
         self._reschedule()
 
 
@@ -721,7 +1109,7 @@ class Cooperator(object):
 
 _theCooperator = Cooperator()
 
-def coiterate(iterator):
+def coiterate(iterator, weight=1):
     """
     Cooperatively iterate over the given iterator, dividing runtime between it
     and all other iterators which have been passed to this function and not yet
@@ -729,13 +1117,16 @@ def coiterate(iterator):
 
     @param iterator: the iterator to invoke.
 
+    @param weight: The number of units of work to do each time the task's
+        turn comes round.
+
     @return: a Deferred that will fire when the iterator finishes.
     """
-    return _theCooperator.coiterate(iterator)
+    return _theCooperator.coiterate(iterator, weight=weight)
 
 
 
-def cooperate(iterator):
+def cooperate(iterator, weight=1):
     """
     Start running the given iterator as a long-running cooperative task, by
     calling next() on it as a periodic timed event.
@@ -748,9 +1139,12 @@ def cooperate(iterator):
 
     @param iterator: the iterator to invoke.
 
+    @param weight: The number of units of work to do each time the task's
+        turn comes round.
+
     @return: a L{CooperativeTask} object representing this task.
     """
-    return _theCooperator.cooperate(iterator)
+    return _theCooperator.cooperate(iterator, weight)
 
 
 
@@ -938,7 +1332,7 @@ def react(main, argv=(), _reactor=None):
 
 
 __all__ = [
-    'LoopingCall',
+    'LoopingCall', 'LoopingCallScheduler',
 
     'Clock',
 
@@ -37,6 +37,13 @@ second example, it would be C{some.module.Foo}.
     are not otherwise parameterized will point to by default.
 @type globalLogPublisher: L{LogPublisher}
 
+@var globalLogLevelPredicate: The L{LogLevelFilterPredicate} which sets the
+    minimum log level of L{Logger} instances that emit to
+    L{globalLogPublisher}.  Events below the level set for a logger's
+    namespace are discarded before they are built.  By default, no events are
+    discarded.
+@type globalLogLevelPredicate: L{LogLevelFilterPredicate}
+
 @var globalLogBeginner: The L{LogBeginner} used to activate the main log
     observer, whether it's a log file, or an observer pointing at stderr.
 @type globalLogBeginner: L{LogBeginner}
@@ -65,6 +72,9 @@ __all__ = [
     # From ._file
     "FileLogObserver", "textFileLogObserver",
 
+    # From ._batching
+    "BatchingLogObserver", "OverflowPolicy",
+
     # From ._filter
     "PredicateResult", "ILogFilterPredicate",
     "FilteringLogObserver", "LogLevelFilterPredicate",
@@ -79,11 +89,13 @@ __all__ = [
     "LegacyLogObserverWrapper",
 
     # From ._global
-    "globalLogPublisher", "globalLogBeginner", "LogBeginner",
+    "globalLogPublisher", "globalLogLevelPredicate", "globalLogBeginner",
+    "LogBeginner",
 
     # From ._json
     "eventAsJSON", "eventFromJSON",
     "jsonFileLogObserver", "eventsFromJSONLogFile",
+    "eventsFromMappedJSONLogFile", "jsonLogFileShards",
 ]
 
 from ._levels import InvalidLogLevelError, LogLevel
@@ -102,6 +114,8 @@ from ._buffer import LimitedHistoryLogObserver
 
 from ._file import FileLogObserver, textFileLogObserver
 
+from ._batching import BatchingLogObserver, OverflowPolicy
+
 from ._filter import (
     PredicateResult, ILogFilterPredicate, FilteringLogObserver,
     LogLevelFilterPredicate
@@ -114,10 +128,12 @@ from ._io import LoggingFile
 from ._legacy import LegacyLogObserverWrapper
 
 from ._global import (
-    globalLogPublisher, globalLogBeginner, LogBeginner
+    globalLogPublisher, globalLogLevelPredicate, globalLogBeginner,
+    LogBeginner
 )
 
 from ._json import (
     eventAsJSON, eventFromJSON,
-    jsonFileLogObserver, eventsFromJSONLogFile
+    jsonFileLogObserver, eventsFromJSONLogFile,
+    eventsFromMappedJSONLogFile, jsonLogFileShards
 )
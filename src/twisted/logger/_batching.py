@@ -0,0 +1,414 @@
+# -*- test-case-name: twisted.logger.test.test_batching -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Log observer that delivers events to another observer from a background
+thread, in batches.
+"""
+
+import atexit
+import threading
+from collections import deque
+from itertools import count
+from weakref import ref
+
+from zope.interface import implementer
+
+from constantly import NamedConstant, Names
+
+from ._levels import LogLevel
+from ._logger import Logger
+from ._observer import ILogObserver
+from ._file import FileLogObserver
+
+
+_DEFAULT_QUEUE_MAXIMUM = 10000
+_levelsByPriority = list(LogLevel.iterconstants())
+
+
+
+class OverflowPolicy(Names):
+    """
+    What a L{BatchingLogObserver} does with an event when its queue is full.
+
+    @cvar dropLowest: Make room by discarding the oldest queued event with the
+        lowest log level, if that level is lower than the new event's;
+        otherwise, discard the new event.
+
+    @cvar block: Wait for the writer thread to make room.
+
+    @cvar sample: Once the queue is half full, accept only one in every
+        C{sampleRate} events, and discard all events while it is full.
+    """
+    dropLowest = NamedConstant()
+    block = NamedConstant()
+    sample = NamedConstant()
+
+
+
+def _priorityForEvent(event):
+    """
+    Determine the priority of an event's log level, treating events with no
+    (or an unknown) log level as L{LogLevel.info}.
+
+    @param event: An event.
+    @type event: L{dict}
+
+    @return: A priority, as returned by L{LogLevel._priorityForLevel}.
+    @rtype: L{int}
+    """
+    try:
+        return LogLevel._levelPriorities[event["log_level"]]
+    except (KeyError, TypeError):
+        return LogLevel._levelPriorities[LogLevel.info]
+
+
+
+class _EventQueue(object):
+    """
+    A bounded, thread-safe queue of events which applies an L{OverflowPolicy}
+    when it is full.
+
+    Events are kept in a separate L{deque} for each log level, tagged with a
+    sequence number so that they can be taken out in the order in which they
+    were put in.
+
+    @ivar dropped: The number of events discarded at each log level since
+        they were last returned by L{get}.
+    @type dropped: L{dict} mapping L{LogLevel} to L{int}
+    """
+
+    def __init__(self, size, overflow, batchSize, sampleRate):
+        """
+        @param size: The maximum number of events to queue.
+        @type size: L{int}
+
+        @param overflow: What to do when the queue is full.
+        @type overflow: L{OverflowPolicy}
+
+        @param batchSize: The number of queued events at which a waiting
+            L{get} is woken.
+        @type batchSize: L{int}
+
+        @param sampleRate: For L{OverflowPolicy.sample}, one in how many
+            events to keep once the queue is half full.
+        @type sampleRate: L{int}
+        """
+        self._size = size
+        self._overflow = overflow
+        self._batchSize = batchSize
+        self._sampleRate = sampleRate
+        self._condition = threading.Condition()
+        self._queues = [deque() for level in _levelsByPriority]
+        self._length = 0
+        self._sequence = count()
+        self._sampled = 0
+        self._closed = False
+        self._finished = False
+        self.dropped = {}
+
+
+    def _drop(self, priority):
+        """
+        Count an event at the given priority as dropped.
+
+        @param priority: The priority of the dropped event.
+        @type priority: L{int}
+        """
+        level = _levelsByPriority[priority]
+        self.dropped[level] = self.dropped.get(level, 0) + 1
+
+
+    def put(self, event):
+        """
+        Add an event to the queue, or discard it (or another event) according
+        to the overflow policy.
+
+        @param event: An event.
+        @type event: L{dict}
+
+        @return: L{False} if the queue has been finished and the event was
+            neither queued nor dropped, otherwise L{True}.
+        @rtype: L{bool}
+        """
+        priority = _priorityForEvent(event)
+        with self._condition:
+            if self._finished:
+                return False
+            if self._length >= self._size // 2:
+                if self._overflow is OverflowPolicy.block:
+                    while self._length >= self._size and not self._closed:
+                        self._condition.wait()
+                elif self._overflow is OverflowPolicy.sample:
+                    self._sampled += 1
+                    if (self._length >= self._size or
+                            self._sampled % self._sampleRate):
+                        self._drop(priority)
+                        return True
+                elif self._length >= self._size:
+                    for lowest in range(priority):
+                        if self._queues[lowest]:
+                            self._queues[lowest].popleft()
+                            self._length -= 1
+                            self._drop(lowest)
+                            break
+                    else:
+                        self._drop(priority)
+                        return True
+
+            self._queues[priority].append((next(self._sequence), event))
+            self._length += 1
+            if self._length == self._batchSize:
+                self._condition.notify_all()
+            return True
+
+
+    def get(self, timeout):
+        """
+        Take up to C{batchSize} events out of the queue, waiting for up to
+        C{timeout} seconds for that many to arrive.
+
+        @param timeout: The longest time to wait, in seconds.
+        @type timeout: L{float}
+
+        @return: The events, oldest first, and the number of events dropped
+            at each log level since the last call.
+        @rtype: 2-L{tuple} of L{list} of L{dict} and L{dict}
+        """
+        with self._condition:
+            if self._length < self._batchSize and not self._closed:
+                self._condition.wait(timeout)
+
+            batch = []
+            queues = [queue for queue in self._queues if queue]
+            while len(queues) > 1 and len(batch) < self._batchSize:
+                oldest = min(queues, key=lambda queue: queue[0][0])
+                batch.append(oldest.popleft()[1])
+                if not oldest:
+                    queues.remove(oldest)
+            if queues:
+                [queue] = queues
+                while queue and len(batch) < self._batchSize:
+                    batch.append(queue.popleft()[1])
+
+            self._length -= len(batch)
+            if batch and self._overflow is OverflowPolicy.block:
+                self._condition.notify_all()
+            dropped, self.dropped = self.dropped, {}
+            return batch, dropped
+
+
+    def close(self):
+        """
+        Wake up everything waiting on this queue, and stop L{put} from
+        blocking.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+    def finish(self):
+        """
+        Close the queue and stop L{put} from adding any more events to it.
+        Events already queued can still be taken out with L{get}.
+        """
+        with self._condition:
+            self._closed = True
+            self._finished = True
+            self._condition.notify_all()
+
+
+    def __len__(self):
+        return self._length
+
+
+
+def _stopAtExit(observerRef):
+    """
+    Stop a L{BatchingLogObserver}, if it still exists, when the process
+    exits.
+
+    @param observerRef: A weak reference to the observer.
+    @type observerRef: L{weakref.ref}
+    """
+    observer = observerRef()
+    if observer is not None:
+        observer.stop()
+
+
+
+@implementer(ILogObserver)
+class BatchingLogObserver(object):
+    """
+    L{ILogObserver} that hands events to a background thread through a
+    bounded queue, and delivers them to another observer from that thread in
+    batches, so that a slow observer (such as a L{FileLogObserver} writing to
+    a stalled disk) does not hold up the thread doing the logging.
+
+    The writer thread delivers whatever is queued every C{flushInterval}
+    seconds, or as soon as C{batchSize} events are queued.  When the wrapped
+    observer is a L{FileLogObserver}, each batch is formatted and written to
+    the file with a single C{write} and C{flush}.
+
+    When events are dropped, either because the queue was full or because the
+    wrapped observer raised an exception, the writer thread reports how many
+    were dropped at each log level with a L{LogLevel.warn} event, which is
+    delivered to the wrapped observer.
+
+    The writer thread is a daemon thread, so it does not keep the process
+    running.  L{stop} should be called once the observer is no longer needed,
+    for example from a C{"shutdown"} system event trigger of the reactor, to
+    make sure every queued event has been delivered.  As a last resort,
+    observers which have not been stopped are stopped when the Python
+    interpreter exits normally, using L{atexit}; events still queued are lost
+    if the process is killed or ends with L{os._exit}.
+
+    Events are formatted and written by the writer thread, some time after
+    they were emitted, so a mutable value in an event (such as a L{list} or
+    L{dict}) which is changed after the event is emitted may be written with
+    its new contents.  Emit copies of values which are going to change.
+
+    @ivar dropped: The total number of events which have been dropped.
+    @type dropped: L{int}
+
+    @ivar log: The logger used to report dropped events.
+    @type log: L{Logger}
+    """
+
+    def __init__(
+        self, observer, size=_DEFAULT_QUEUE_MAXIMUM,
+        overflow=OverflowPolicy.dropLowest, batchSize=1000,
+        flushInterval=0.5, sampleRate=10
+    ):
+        """
+        @param observer: The observer to deliver events to.
+        @type observer: L{ILogObserver}
+
+        @param size: The maximum number of events to queue.
+        @type size: L{int}
+
+        @param overflow: What to do with events when the queue is full.
+        @type overflow: L{OverflowPolicy}
+
+        @param batchSize: The largest number of events to deliver at once.
+        @type batchSize: L{int}
+
+        @param flushInterval: The longest time, in seconds, for which an event
+            is queued before the writer thread delivers it.
+        @type flushInterval: L{float}
+
+        @param sampleRate: For L{OverflowPolicy.sample}, one in how many
+            events to keep once the queue is half full.
+        @type sampleRate: L{int}
+        """
+        self._observer = observer
+        if isinstance(observer, FileLogObserver):
+            self._deliver = observer._writeEvents
+        else:
+            self._deliver = self._deliverEach
+        self._queue = _EventQueue(size, overflow, batchSize, sampleRate)
+        self._flushInterval = flushInterval
+        self._stopped = False
+        self._synchronous = False
+        self._lock = threading.RLock()
+        self.dropped = 0
+        self.log = Logger(observer=observer, source=self)
+        self._thread = threading.Thread(
+            target=self._run, name="BatchingLogObserver"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(_stopAtExit, ref(self))
+
+
+    def __call__(self, event):
+        """
+        Queue an event for delivery by the writer thread.  Once L{stop} has
+        delivered every queued event, the event is delivered immediately
+        instead.
+
+        @param event: An event.
+        @type event: L{dict}
+        """
+        if not self._synchronous and self._queue.put(event):
+            return
+        # The queue is finished: wait for stop to deliver what was left in
+        # it, so that events are delivered in order and one at a time.
+        with self._lock:
+            self._observer(event)
+
+
+    def _deliverEach(self, events):
+        """
+        Deliver a batch of events to the wrapped observer one at a time.
+
+        @param events: The events to deliver.
+        @type events: L{list} of L{dict}
+        """
+        observer = self._observer
+        for event in events:
+            observer(event)
+
+
+    def _writeBatch(self):
+        """
+        Deliver one batch of queued events to the wrapped observer, and report
+        any events which have been dropped.
+
+        @return: The number of events delivered.
+        @rtype: L{int}
+        """
+        batch, dropped = self._queue.get(self._flushInterval)
+        if batch:
+            try:
+                self._deliver(batch)
+            except Exception:
+                for event in batch:
+                    level = _levelsByPriority[_priorityForEvent(event)]
+                    dropped[level] = dropped.get(level, 0) + 1
+        if dropped:
+            total = sum(dropped.values())
+            self.dropped += total
+            try:
+                self.log.warn(
+                    "Dropped {count} log events.",
+                    count=total,
+                    dropped=dict(
+                        (level.name, n) for (level, n) in dropped.items()
+                    ),
+                )
+            except Exception:
+                pass
+        return len(batch)
+
+
+    def _run(self):
+        """
+        Deliver batches of events until L{stop} is called, and then deliver
+        whatever is left in the queue.
+        """
+        while not self._stopped:
+            self._writeBatch()
+        while self._writeBatch():
+            pass
+
+
+    def stop(self):
+        """
+        Stop the writer thread, after it has delivered every queued event.
+        Events observed after this are delivered to the wrapped observer
+        synchronously.
+        """
+        self._stopped = True
+        self._queue.close()
+        self._thread.join()
+        # Events may have been queued after the writer thread's last batch.
+        # Deliver them here, with any events observed in the meantime
+        # waiting for the lock.
+        with self._lock:
+            self._queue.finish()
+            self._synchronous = True
+            while self._writeBatch():
+                pass
@@ -60,6 +60,23 @@ class FileLogObserver(object):
             self._outFile.flush()
 
 
+    def _writeEvents(self, events):
+        """
+        Write several events to the file with a single C{write} and C{flush}.
+
+        @param events: The events to write.
+        @type events: L{list} of L{dict}
+        """
+        text = u"".join(self.formatEvent(event) or u"" for event in events)
+
+        if self._encoding is not None:
+            text = text.encode(self._encoding)
+
+        if text:
+            self._outFile.write(text)
+            self._outFile.flush()
+
+
 
 def textFileLogObserver(outFile, timeFormat=timeFormatRFC3339):
     """
@@ -142,14 +142,28 @@ class LogLevelFilterPredicate(object):
     the log level for the event's namespace.
 
     Events that not not have a log level or namespace are also dropped.
+
+    @ivar _levelCache: A mapping of namespaces to the log level computed for
+        them by L{logLevelForNamespace}; emptied whenever log levels change.
+    @type _levelCache: L{dict}
+
+    @ivar _generation: A counter which is incremented whenever log levels
+        change, so that callers which cache the result of
+        L{logLevelForNamespace} (such as L{Logger}) can tell when their cached
+        value is stale.
+    @type _generation: L{int}
     """
 
+    _levelCacheSize = 1000
+
     def __init__(self, defaultLogLevel=LogLevel.info):
         """
         @param defaultLogLevel: The default minimum log level.
         @type defaultLogLevel: L{LogLevel}
         """
         self._logLevelsByNamespace = {}
+        self._levelCache = {}
+        self._generation = 0
         self.defaultLogLevel = defaultLogLevel
         self.clearLogLevels()
 
@@ -167,6 +181,30 @@ class LogLevelFilterPredicate(object):
             namespace.
         @type namespace: L{str} (native string)
 
+        @return: The log level for the specified namespace.
+        @rtype: L{LogLevel}
+        """
+        try:
+            return self._levelCache[namespace]
+        except KeyError:
+            pass
+
+        level = self._lookupLogLevel(namespace)
+        if len(self._levelCache) >= self._levelCacheSize:
+            self._levelCache.clear()
+        self._levelCache[namespace] = level
+        return level
+
+
+    def _lookupLogLevel(self, namespace):
+        """
+        Determine the log level for the given namespace by walking up its
+        dotted parents, without consulting the cache.
+
+        @param namespace: A logging namespace, or L{None} for the default
+            namespace.
+        @type namespace: L{str} (native string)
+
         @return: The log level for the specified namespace.
         @rtype: L{LogLevel}
         """
@@ -205,6 +243,7 @@ class LogLevelFilterPredicate(object):
             self._logLevelsByNamespace[namespace] = level
         else:
             self._logLevelsByNamespace[None] = level
+        self._levelsChanged()
 
 
     def clearLogLevels(self):
@@ -213,6 +252,15 @@ class LogLevelFilterPredicate(object):
         """
         self._logLevelsByNamespace.clear()
         self._logLevelsByNamespace[None] = self.defaultLogLevel
+        self._levelsChanged()
+
+
+    def _levelsChanged(self):
+        """
+        Invalidate cached log levels after a change to the configured levels.
+        """
+        self._levelCache.clear()
+        self._generation += 1
 
 
     def __call__(self, event):
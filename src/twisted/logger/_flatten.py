@@ -15,6 +15,9 @@ from twisted.python.compat import unicode
 
 aFormatter = Formatter()
 
+_compiledFormats = {}
+_compiledFormatsSize = 1000
+
 
 
 class KeyFlattener(object):
@@ -64,6 +67,140 @@ class KeyFlattener(object):
 
 
 
+class CallMapping(object):
+    """
+    Read-only mapping that turns a C{()}-suffix in key names into an invocation
+    of the key rather than a lookup of the key.
+
+    Implementation support for L{formatWithCall
+    <twisted.logger._format.formatWithCall>}.
+    """
+    def __init__(self, submapping):
+        """
+        @param submapping: Another read-only mapping which will be used to look
+            up items.
+        """
+        self._submapping = submapping
+
+
+    def __getitem__(self, key):
+        """
+        Look up an item in the submapping for this L{CallMapping}, calling it
+        if C{key} ends with C{"()"}.
+        """
+        callit = key.endswith(u"()")
+        realKey = key[:-2] if callit else key
+        value = self._submapping[realKey]
+        if callit:
+            value = value()
+        return value
+
+
+
+class _CompiledFormat(object):
+    """
+    A PEP-3101 format string, parsed once so that it can be rendered many
+    times with the C{()} call syntax of L{formatWithCall
+    <twisted.logger._format.formatWithCall>}.
+
+    Obtain instances with L{compileFormat} rather than constructing them
+    directly, so that they are shared.
+
+    @ivar fields: The result of L{string.Formatter.parse} on the format
+        string.
+    @type fields: L{tuple} of 4-L{tuple}s
+
+    @ivar _steps: For each of C{fields}, the literal text, the field name, the
+        key to look up if the field name is a plain name (or L{None} if it
+        uses attribute or item access), whether to call the value, the
+        conversion, and the format spec (a L{_CompiledFormat} if it has nested
+        fields).
+    @type _steps: L{tuple} of 6-L{tuple}s
+    """
+
+    def __init__(self, formatString):
+        """
+        @param formatString: A PEP-3101 format string.
+        @type formatString: L{unicode}
+        """
+        self.fields = tuple(aFormatter.parse(formatString))
+        steps = []
+        for literalText, fieldName, formatSpec, conversion in self.fields:
+            key = callit = None
+            if fieldName is not None:
+                if fieldName.endswith(u"()"):
+                    key, callit = fieldName[:-2], True
+                else:
+                    key, callit = fieldName, False
+                if not key or "." in key or "[" in key or key[0].isdigit():
+                    key = None
+                if "{" in formatSpec:
+                    formatSpec = compileFormat(formatSpec)
+            steps.append(
+                (literalText, fieldName, key, callit, conversion, formatSpec)
+            )
+        self._steps = tuple(steps)
+
+
+    def render(self, mapping):
+        """
+        Render this format with the values in C{mapping}, calling those whose
+        field names end in C{()}.
+
+        @param mapping: A L{dict}-like object to format.
+
+        @return: The rendered string.
+        @rtype: L{unicode}
+        """
+        result = []
+        append = result.append
+        for (literalText, fieldName, key, callit, conversion,
+             formatSpec) in self._steps:
+            if literalText:
+                append(literalText)
+            if fieldName is None:
+                continue
+            if key is None:
+                value = aFormatter.get_field(
+                    fieldName, (), CallMapping(mapping)
+                )[0]
+            else:
+                value = mapping[key]
+                if callit:
+                    value = value()
+            if conversion is not None:
+                value = aFormatter.convert_field(value, conversion)
+            if isinstance(formatSpec, _CompiledFormat):
+                formatSpec = formatSpec.render(mapping)
+            append(format(value, formatSpec))
+        return u"".join(result)
+
+
+
+def compileFormat(formatString):
+    """
+    Get the L{_CompiledFormat} for a format string, from a bounded cache
+    shared by all of the event formatting code in this package.
+
+    @param formatString: A PEP-3101 format string.
+    @type formatString: L{unicode}
+
+    @return: The compiled format.
+    @rtype: L{_CompiledFormat}
+    """
+    try:
+        return _compiledFormats[formatString]
+    except KeyError:
+        pass
+
+    compiled = _CompiledFormat(formatString)
+    if len(_compiledFormats) >= _compiledFormatsSize:
+        _compiledFormats.clear()
+    _compiledFormats[formatString] = compiled
+    return compiled
+
+
+
 def flattenEvent(event):
     """
     Flatten the given event by pre-associating format fields with specific
@@ -84,7 +221,7 @@ def flattenEvent(event):
     keyFlattener = KeyFlattener()
 
     for (literalText, fieldName, formatSpec, conversion) in (
-        aFormatter.parse(event["log_format"])
+        compileFormat(event["log_format"]).fields
     ):
         if fieldName is None:
             continue
@@ -145,9 +282,9 @@ def extractField(field, event):
     @raise KeyError: if the field is not found in the given event.
     """
     keyFlattener = KeyFlattener()
-    [[literalText, fieldName, formatSpec, conversion]] = aFormatter.parse(
+    [[literalText, fieldName, formatSpec, conversion]] = compileFormat(
         "{" + field + "}"
-    )
+    ).fields
     key = keyFlattener.flatKey(fieldName, formatSpec, conversion)
     if "log_flattened" not in event:
         flattenEvent(event)
@@ -168,7 +305,7 @@ def flatFormat(event):
     fieldValues = event["log_flattened"]
     s = []
     keyFlattener = KeyFlattener()
-    formatFields = aFormatter.parse(event["log_format"])
+    formatFields = compileFormat(event["log_format"]).fields
     for literalText, fieldName, formatSpec, conversion in formatFields:
         s.append(literalText)
         if fieldName is not None:
@@ -13,7 +13,7 @@ from twisted.python.failure import Failure
 from twisted.python.reflect import safe_repr
 from twisted.python._tzhelper import FixedOffsetTimeZone
 
-from ._flatten import flatFormat, aFormatter
+from ._flatten import flatFormat, compileFormat
 
 timeFormatRFC3339 = "%Y-%m-%dT%H:%M:%S%z"
 
@@ -229,35 +229,6 @@ def formatEventAsClassicLogText(event, formatTime=formatTime):
 
 
 
-class CallMapping(object):
-    """
-    Read-only mapping that turns a C{()}-suffix in key names into an invocation
-    of the key rather than a lookup of the key.
-
-    Implementation support for L{formatWithCall}.
-    """
-    def __init__(self, submapping):
-        """
-        @param submapping: Another read-only mapping which will be used to look
-            up items.
-        """
-        self._submapping = submapping
-
-
-    def __getitem__(self, key):
-        """
-        Look up an item in the submapping for this L{CallMapping}, calling it
-        if C{key} ends with C{"()"}.
-        """
-        callit = key.endswith(u"()")
-        realKey = key[:-2] if callit else key
-        value = self._submapping[realKey]
-        if callit:
-            value = value()
-        return value
-
-
-
 def formatWithCall(formatString, mapping):
     """
     Format a string like L{unicode.format}, but:
@@ -284,6 +255,4 @@ def formatWithCall(formatString, mapping):
     @return: The string with formatted values interpolated.
     @rtype: L{unicode}
     """
-    return unicode(
-        aFormatter.vformat(formatString, (), CallMapping(mapping))
-    )
+    return compileFormat(formatString).render(mapping)
@@ -213,4 +213,8 @@ class LogBeginner(object):
 
 
 globalLogPublisher = LogPublisher()
+globalLogLevelPredicate = LogLevelFilterPredicate(
+    defaultLogLevel=LogLevel.debug
+)
+globalLogPublisher._levelPredicate = globalLogLevelPredicate
 globalLogBeginner = LogBeginner(globalLogPublisher, sys.stderr, sys, warnings)
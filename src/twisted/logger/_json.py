@@ -6,6 +6,8 @@
 Tools for saving and loading log events in a structured format.
 """
 
+import mmap
+import re
 import types
 
 from constantly import NamedConstant
@@ -250,6 +252,37 @@ def jsonFileLogObserver(outFile, recordSeparator=u"\x1e"):
 
 
 
+def _eventFromRecord(record):
+    """
+    Decode a log event from a JSON record, logging an error if it cannot be
+    decoded.
+
+    @param record: A JSON record, without its record separator.
+    @type record: L{bytes} or L{bytearray}
+
+    @return: The event, or L{None} if C{record} could not be decoded.
+    @rtype: L{dict} or L{None}
+    """
+    try:
+        text = bytes(record).decode("utf-8")
+    except UnicodeDecodeError:
+        log.error(
+            u"Unable to decode UTF-8 for JSON record: {record!r}",
+            record=bytes(record)
+        )
+        return None
+
+    try:
+        return eventFromJSON(text)
+    except ValueError:
+        log.error(
+            u"Unable to read JSON record: {record!r}",
+            record=bytes(record)
+        )
+        return None
+
+
+
 def eventsFromJSONLogFile(inFile, recordSeparator=None, bufferSize=4096):
     """
     Load events from a file previously saved with L{jsonFileLogObserver}.
@@ -277,25 +310,6 @@ def eventsFromJSONLogFile(inFile, recordSeparator=None, bufferSize=4096):
         else:
             return s.encode("utf-8")
 
-    def eventFromBytearray(record):
-        try:
-            text = bytes(record).decode("utf-8")
-        except UnicodeDecodeError:
-            log.error(
-                u"Unable to decode UTF-8 for JSON record: {record!r}",
-                record=bytes(record)
-            )
-            return None
-
-        try:
-            return eventFromJSON(text)
-        except ValueError:
-            log.error(
-                u"Unable to read JSON record: {record!r}",
-                record=bytes(record)
-            )
-            return None
-
     if recordSeparator is None:
         first = asBytes(inFile.read(1))
 
@@ -314,12 +328,12 @@ def eventsFromJSONLogFile(inFile, recordSeparator=None, bufferSize=4096):
     if recordSeparator == b"":
         recordSeparator = b"\n"  # Split on newlines below
 
-        eventFromRecord = eventFromBytearray
+        eventFromRecord = _eventFromRecord
 
     else:
         def eventFromRecord(record):
             if record[-1] == ord("\n"):
-                return eventFromBytearray(record)
+                return _eventFromRecord(record)
             else:
                 log.error(
                     u"Unable to read truncated JSON record: {record!r}",
@@ -349,3 +363,348 @@ def eventsFromJSONLogFile(inFile, recordSeparator=None, bufferSize=4096):
                     yield event
 
         buffer = records[-1]
+
+
+
+_namespacePattern = re.compile(br'"log_namespace":\s*"((?:[^"\\]|\\.)*)"')
+_levelPattern = re.compile(br'"log_level":\s*\{[^{}]*"name":\s*"(\w+)"')
+_timePattern = re.compile(br'"log_time":\s*(-?[0-9][0-9.eE+-]*)')
+
+
+
+def _mapFile(inFile):
+    """
+    Memory-map a file for reading.
+
+    @param inFile: A file object with a C{fileno} method.
+
+    @return: The mapped file, or L{None} if it is empty.
+    @rtype: L{mmap.mmap} or L{None}
+    """
+    try:
+        return mmap.mmap(inFile.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # Empty files can't be mapped.
+        return None
+
+
+
+def _mappedRecordSeparator(mapped, recordSeparator):
+    """
+    Determine the record separator of a mapped JSON log file, as
+    L{eventsFromJSONLogFile} does.
+
+    @param mapped: The mapped file.
+    @type mapped: L{mmap.mmap}
+
+    @param recordSeparator: The expected record separator, or L{None} to
+        detect one of C{u"\\x1e"} or C{u""}.
+    @type recordSeparator: L{unicode} or L{None}
+
+    @return: The record separator, or C{b""} for newline-separated records.
+    @rtype: L{bytes}
+    """
+    if recordSeparator is None:
+        if mapped[0:1] == b"\x1e":
+            return b"\x1e"
+        return b""
+    if isinstance(recordSeparator, unicode):
+        return recordSeparator.encode("utf-8")
+    return recordSeparator
+
+
+
+def _mappedRecords(mapped, recordSeparator, start, end):
+    """
+    Find the records in part of a mapped JSON log file, without copying them.
+
+    @param mapped: The mapped file.
+    @type mapped: L{mmap.mmap}
+
+    @param recordSeparator: The record separator, or C{b""} for
+        newline-separated records.
+    @type recordSeparator: L{bytes}
+
+    @param start: The offset at which to start looking for records.
+    @type start: L{int}
+
+    @param end: The offset at which to stop.
+    @type end: L{int}
+
+    @return: The start and end offsets of each non-empty record, excluding
+        its separator.
+    @rtype: iterable of 2-L{tuple}s of L{int}
+    """
+    if recordSeparator:
+        separatorLength = len(recordSeparator)
+    else:
+        recordSeparator, separatorLength = b"\n", 1
+
+    position = start
+    while position < end:
+        separator = mapped.find(recordSeparator, position, end)
+        if separator == -1:
+            separator = end
+        if separator > position:
+            yield position, separator
+        position = separator + separatorLength
+
+
+
+def _mayMatch(mapped, start, end, namespace, minimumPriority, since, until):
+    """
+    Check the raw bytes of a JSON record against filters, without decoding
+    it.
+
+    @return: L{False} if the record certainly does not match the filters;
+        L{True} if it might.
+    @rtype: L{bool}
+    """
+    if namespace is not None:
+        found = _namespacePattern.findall(mapped, start, end)
+        if len(found) == 1:
+            [found] = found
+            if b"\\" in found:
+                found = loads((b'"' + found + b'"').decode("utf-8"))
+            else:
+                found = found.decode("utf-8")
+            if not _namespaceMatches(found, namespace):
+                return False
+
+    if minimumPriority is not None:
+        found = _levelPattern.findall(mapped, start, end)
+        if len(found) == 1:
+            level = getattr(LogLevel, found[0].decode("ascii"), None)
+            if (
+                level is not None and
+                LogLevel._priorityForLevel(level) < minimumPriority
+            ):
+                return False
+
+    if since is not None or until is not None:
+        found = _timePattern.findall(mapped, start, end)
+        if len(found) == 1:
+            try:
+                when = float(found[0])
+            except ValueError:
+                return True
+            if not _timeMatches(when, since, until):
+                return False
+
+    return True
+
+
+
+def _namespaceMatches(eventNamespace, namespace):
+    """
+    @return: Whether C{eventNamespace} is C{namespace} or one of its children.
+    @rtype: L{bool}
+    """
+    return (
+        eventNamespace == namespace or
+        eventNamespace.startswith(namespace + ".")
+    )
+
+
+
+def _timeMatches(when, since, until):
+    """
+    @return: Whether C{when} is not before C{since} and is before C{until}.
+    @rtype: L{bool}
+    """
+    return (
+        (since is None or when >= since) and
+        (until is None or when < until)
+    )
+
+
+
+def _eventMatches(event, namespace, minimumPriority, since, until):
+    """
+    Check a decoded event against filters.
+
+    @return: Whether the event matches the filters.
+    @rtype: L{bool}
+    """
+    if namespace is not None:
+        eventNamespace = event.get("log_namespace")
+        if not isinstance(eventNamespace, (unicode, str)):
+            return False
+        if not _namespaceMatches(eventNamespace, namespace):
+            return False
+
+    if minimumPriority is not None:
+        level = event.get("log_level")
+        if LogLevel._levelPriorities.get(level, -1) < minimumPriority:
+            return False
+
+    if since is not None or until is not None:
+        when = event.get("log_time")
+        if not isinstance(when, (int, float)):
+            return False
+        if not _timeMatches(when, since, until):
+            return False
+
+    return True
+
+
+
+def eventsFromMappedJSONLogFile(
+    inFile, recordSeparator=None, namespace=None, minimumLevel=None,
+    since=None, until=None, start=0, end=None
+):
+    """
+    Load events from a file previously saved with L{jsonFileLogObserver}, like
+    L{eventsFromJSONLogFile}, but by memory-mapping the file, and optionally
+    only the events which match some filters.
+
+    Records are located in the mapped file without being copied, and records
+    whose raw text shows that they do not match the filters are skipped
+    without being decoded.
+
+    A range of the file may be read, so that a large file can be processed in
+    parallel by several processes, each reading one of the ranges returned by
+    L{jsonLogFileShards}.  For example, with L{multiprocessing}::
+
+        def countEvents(shard):
+            with open(path, "rb") as inFile:
+                start, end = shard
+                return sum(1 for event in eventsFromMappedJSONLogFile(
+                    inFile, minimumLevel=LogLevel.error, start=start, end=end
+                ))
+
+        with open(path, "rb") as inFile:
+            shards = jsonLogFileShards(inFile, 4)
+        total = sum(multiprocessing.Pool(4).map(countEvents, shards))
+
+    @param inFile: A file with a C{fileno} method, containing UTF-8 data.
+    @type inFile: L{file}
+
+    @param recordSeparator: The expected record separator.
+        If L{None}, attempt to automatically detect the record separator from
+        one of C{u"\\x1e"} or C{u""}.
+    @type recordSeparator: L{unicode}
+
+    @param namespace: If not L{None}, only load events in this namespace or
+        its children.
+    @type namespace: L{str} (native string)
+
+    @param minimumLevel: If not L{None}, only load events at this log level
+        or higher.
+    @type minimumLevel: L{LogLevel}
+
+    @param since: If not L{None}, only load events logged at or after this
+        time.
+    @type since: L{float}
+
+    @param until: If not L{None}, only load events logged before this time.
+    @type until: L{float}
+
+    @param start: The offset in the file at which to start reading, which
+        should be the start of a record.
+    @type start: L{int}
+
+    @param end: The offset in the file at which to stop reading, which should
+        be the start of a record, or L{None} to read to the end of the file.
+    @type end: L{int}
+
+    @return: Log events as read from C{inFile}.
+    @rtype: iterable of L{dict}
+    """
+    mapped = _mapFile(inFile)
+    if mapped is None:
+        return
+
+    if minimumLevel is None:
+        minimumPriority = None
+    else:
+        minimumPriority = LogLevel._priorityForLevel(minimumLevel)
+    filtered = not (
+        namespace is None and minimumPriority is None and
+        since is None and until is None
+    )
+
+    try:
+        recordSeparator = _mappedRecordSeparator(mapped, recordSeparator)
+        if end is None:
+            end = len(mapped)
+
+        for recordStart, recordEnd in _mappedRecords(
+            mapped, recordSeparator, start, end
+        ):
+            if filtered and not _mayMatch(
+                mapped, recordStart, recordEnd,
+                namespace, minimumPriority, since, until
+            ):
+                continue
+
+            record = mapped[recordStart:recordEnd]
+            if recordSeparator and not record.endswith(b"\n"):
+                log.error(
+                    u"Unable to read truncated JSON record: {record!r}",
+                    record=record
+                )
+                continue
+
+            event = _eventFromRecord(record)
+            if event is None:
+                continue
+            if filtered and not _eventMatches(
+                event, namespace, minimumPriority, since, until
+            ):
+                continue
+            yield event
+    finally:
+        mapped.close()
+
+
+
+def jsonLogFileShards(inFile, count, recordSeparator=None):
+    """
+    Divide a file previously saved with L{jsonFileLogObserver} into ranges of
+    roughly equal size which start and end on record boundaries, for reading
+    in parallel with L{eventsFromMappedJSONLogFile}.
+
+    @param inFile: A file with a C{fileno} method.
+    @type inFile: L{file}
+
+    @param count: The number of ranges to divide the file into.
+    @type count: L{int}
+
+    @param recordSeparator: The expected record separator.
+        If L{None}, attempt to automatically detect the record separator from
+        one of C{u"\\x1e"} or C{u""}.
+    @type recordSeparator: L{unicode}
+
+    @return: Up to C{count} non-empty C{(start, end)} ranges covering the
+        whole file.
+    @rtype: L{list} of 2-L{tuple}s of L{int}
+    """
+    mapped = _mapFile(inFile)
+    if mapped is None:
+        return []
+
+    try:
+        recordSeparator = _mappedRecordSeparator(mapped, recordSeparator)
+        size = len(mapped)
+        boundaries = [0]
+        for shard in range(1, count):
+            position = max(size * shard // count, boundaries[-1])
+            if recordSeparator:
+                boundary = mapped.find(recordSeparator, position)
+            else:
+                boundary = mapped.find(b"\n", position)
+                if boundary != -1:
+                    boundary += 1
+            if boundary == -1:
+                boundary = size
+            boundaries.append(boundary)
+        boundaries.append(size)
+    finally:
+        mapped.close()
+
+    return [
+        (shardStart, shardEnd)
+        for (shardStart, shardEnd) in zip(boundaries, boundaries[1:])
+        if shardStart < shardEnd
+    ]
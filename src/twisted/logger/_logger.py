@@ -19,8 +19,29 @@ class Logger(object):
     A L{Logger} emits log messages to an observer.  You should instantiate it
     as a class or module attribute, as documented in L{this module's
     documentation <twisted.logger>}.
+
+    A L{Logger} which emits to a L{LogPublisher} with a level predicate, such
+    as the L{global log publisher <globalLogPublisher>}, discards without
+    building an event anything below the level which that predicate assigns to
+    its namespace.
+
+    @ivar _levelPredicate: The L{LogLevelFilterPredicate} of C{observer}, which
+        gates the events emitted by this logger, or L{None} if all events are
+        emitted.
+    @type _levelPredicate: L{LogLevelFilterPredicate}
+
+    @ivar _levelGeneration: The generation of C{_levelPredicate} from which
+        C{_minimumPriority} was computed.
+    @type _levelGeneration: L{int}
+
+    @ivar _minimumPriority: The priority of the lowest log level which this
+        logger will emit.
+    @type _minimumPriority: L{int}
     """
 
+    _levelGeneration = None
+    _minimumPriority = 0
+
     @staticmethod
     def _namespaceFromCallingContext():
         """
@@ -60,6 +81,8 @@ class Logger(object):
         else:
             self.observer = observer
 
+        self._levelPredicate = getattr(self.observer, "_levelPredicate", None)
+
 
     def __get__(self, oself, type=None):
         """
@@ -111,7 +134,9 @@ class Logger(object):
             non-deterministic behavior from observers that schedule work for
             later execution.
         """
-        if level not in LogLevel.iterconstants():
+        try:
+            priority = LogLevel._levelPriorities[level]
+        except (KeyError, TypeError):
             self.failure(
                 "Got invalid log level {invalidLevel!r} in {logger}.emit().",
                 Failure(InvalidLogLevelError(level)),
@@ -120,6 +145,16 @@ class Logger(object):
             )
             return
 
+        predicate = self._levelPredicate
+        if predicate is not None:
+            if self._levelGeneration != predicate._generation:
+                self._levelGeneration = predicate._generation
+                self._minimumPriority = LogLevel._priorityForLevel(
+                    predicate.logLevelForNamespace(self.namespace)
+                )
+            if priority < self._minimumPriority:
+                return
+
         event = kwargs
         event.update(
             log_logger=self, log_level=level, log_namespace=self.namespace,
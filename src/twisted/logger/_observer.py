@@ -74,8 +74,15 @@ class LogPublisher(object):
 
     Keeps track of a set of L{ILogObserver} objects and forwards
     events to each.
+
+    @ivar _levelPredicate: If not L{None}, a L{LogLevelFilterPredicate} which
+        L{Logger}s emitting to this publisher consult to discard events below
+        the log level of their namespace before building them.
+    @type _levelPredicate: L{LogLevelFilterPredicate}
     """
 
+    _levelPredicate = None
+
     def __init__(self, *observers):
         self._observers = list(observers)
         self.log = Logger(observer=self)
@@ -0,0 +1,349 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Test cases for L{twisted.logger._batching}.
+"""
+
+import atexit
+import gc
+from io import StringIO
+
+from zope.interface.verify import verifyObject, BrokenMethodImplementation
+
+from twisted.trial import unittest
+
+from .._levels import LogLevel
+from .._observer import ILogObserver
+from .._file import FileLogObserver
+from .. import _batching
+from .._batching import BatchingLogObserver, OverflowPolicy, _EventQueue
+
+
+
+def makeEvent(level, n):
+    """
+    Make an event for testing.
+
+    @param level: The log level of the event.
+    @type level: L{LogLevel}
+
+    @param n: A number identifying the event.
+    @type n: L{int}
+
+    @return: An event.
+    @rtype: L{dict}
+    """
+    return dict(log_level=level, log_format=u"{n}", n=n)
+
+
+
+class EventQueueTests(unittest.TestCase):
+    """
+    Tests for L{_EventQueue}.
+    """
+
+    def drain(self, queue):
+        """
+        Take everything out of a queue without waiting.
+
+        @param queue: The queue to drain.
+        @type queue: L{_EventQueue}
+
+        @return: The numbers of the events taken out of C{queue}, and the
+            number of events dropped at each level.
+        @rtype: 2-L{tuple} of L{list} and L{dict}
+        """
+        events, dropped = queue.get(0)
+        return [event["n"] for event in events], dropped
+
+
+    def test_order(self):
+        """
+        L{_EventQueue.get} returns events in the order in which they were put,
+        whatever their log levels.
+        """
+        queue = _EventQueue(10, OverflowPolicy.dropLowest, 10, 10)
+        levels = [LogLevel.info, LogLevel.debug, LogLevel.error, LogLevel.info]
+        for n, level in enumerate(levels):
+            queue.put(makeEvent(level, n))
+        self.assertEqual(len(queue), 4)
+        self.assertEqual(self.drain(queue), ([0, 1, 2, 3], {}))
+        self.assertEqual(len(queue), 0)
+
+
+    def test_batchSize(self):
+        """
+        L{_EventQueue.get} returns at most C{batchSize} events.
+        """
+        queue = _EventQueue(10, OverflowPolicy.dropLowest, 2, 10)
+        for n in range(3):
+            queue.put(makeEvent(LogLevel.info, n))
+        self.assertEqual(self.drain(queue), ([0, 1], {}))
+        self.assertEqual(self.drain(queue), ([2], {}))
+
+
+    def test_dropLowest(self):
+        """
+        With L{OverflowPolicy.dropLowest}, a full queue makes room for an event
+        by dropping the oldest queued event with the lowest level.
+        """
+        queue = _EventQueue(3, OverflowPolicy.dropLowest, 10, 10)
+        queue.put(makeEvent(LogLevel.info, 0))
+        queue.put(makeEvent(LogLevel.debug, 1))
+        queue.put(makeEvent(LogLevel.debug, 2))
+        queue.put(makeEvent(LogLevel.error, 3))
+        queue.put(makeEvent(LogLevel.warn, 4))
+        self.assertEqual(
+            self.drain(queue), ([0, 3, 4], {LogLevel.debug: 2})
+        )
+
+
+    def test_dropLowestNewEvent(self):
+        """
+        With L{OverflowPolicy.dropLowest}, an event is dropped when the queue
+        is full of events at the same or a higher level.
+        """
+        queue = _EventQueue(2, OverflowPolicy.dropLowest, 10, 10)
+        queue.put(makeEvent(LogLevel.warn, 0))
+        queue.put(makeEvent(LogLevel.error, 1))
+        queue.put(makeEvent(LogLevel.warn, 2))
+        queue.put(makeEvent(LogLevel.debug, 3))
+        self.assertEqual(
+            self.drain(queue),
+            ([0, 1], {LogLevel.warn: 1, LogLevel.debug: 1})
+        )
+        self.assertEqual(self.drain(queue), ([], {}))
+
+
+    def test_sample(self):
+        """
+        With L{OverflowPolicy.sample}, once the queue is half full, only one
+        in every C{sampleRate} events is kept, and none are kept when it is
+        full.
+        """
+        queue = _EventQueue(6, OverflowPolicy.sample, 10, 2)
+        for n in range(12):
+            queue.put(makeEvent(LogLevel.info, n))
+        self.assertEqual(
+            self.drain(queue), ([0, 1, 2, 4, 6, 8], {LogLevel.info: 6})
+        )
+
+
+    def test_closeStopsBlocking(self):
+        """
+        With L{OverflowPolicy.block}, once the queue has been closed, L{put}
+        adds events to a full queue rather than waiting.
+        """
+        queue = _EventQueue(1, OverflowPolicy.block, 10, 10)
+        queue.close()
+        queue.put(makeEvent(LogLevel.info, 0))
+        queue.put(makeEvent(LogLevel.info, 1))
+        self.assertEqual(self.drain(queue), ([0, 1], {}))
+
+
+    def test_finish(self):
+        """
+        Once the queue has been finished, L{put} refuses events, and events
+        already queued can still be taken out.
+        """
+        queue = _EventQueue(10, OverflowPolicy.dropLowest, 10, 10)
+        self.assertTrue(queue.put(makeEvent(LogLevel.info, 0)))
+        queue.finish()
+        self.assertFalse(queue.put(makeEvent(LogLevel.info, 1)))
+        self.assertEqual(self.drain(queue), ([0], {}))
+
+
+    def test_eventWithoutLevel(self):
+        """
+        Events without a log level are queued as L{LogLevel.info} events.
+        """
+        queue = _EventQueue(1, OverflowPolicy.dropLowest, 10, 10)
+        queue.put(dict(n=0))
+        queue.put(makeEvent(LogLevel.debug, 1))
+        self.assertEqual(self.drain(queue), ([0], {LogLevel.debug: 1}))
+
+
+
+class BatchingLogObserverTests(unittest.TestCase):
+    """
+    Tests for L{BatchingLogObserver}.
+    """
+
+    def observer(self, observer, **kwargs):
+        """
+        Create a L{BatchingLogObserver} which is stopped at the end of the
+        test.
+
+        @param observer: The observer to wrap.
+        @type observer: L{ILogObserver}
+
+        @param kwargs: Keyword arguments for L{BatchingLogObserver}.
+
+        @return: The observer.
+        @rtype: L{BatchingLogObserver}
+        """
+        batching = BatchingLogObserver(observer, **kwargs)
+        self.addCleanup(batching.stop)
+        return batching
+
+
+    def test_interface(self):
+        """
+        L{BatchingLogObserver} is an L{ILogObserver}.
+        """
+        observer = self.observer(lambda event: None)
+        try:
+            verifyObject(ILogObserver, observer)
+        except BrokenMethodImplementation as e:
+            self.fail(e)
+
+
+    def test_deliversEvents(self):
+        """
+        L{BatchingLogObserver} delivers every event it observes to the wrapped
+        observer, in order, by the time L{BatchingLogObserver.stop} returns.
+        """
+        events = []
+        observer = self.observer(events.append, batchSize=3)
+        for n in range(10):
+            observer(makeEvent(LogLevel.info, n))
+        observer.stop()
+        self.assertEqual([event["n"] for event in events], list(range(10)))
+        self.assertEqual(observer.dropped, 0)
+
+
+    def test_afterStop(self):
+        """
+        Events observed after L{BatchingLogObserver.stop} are delivered
+        immediately.
+        """
+        events = []
+        observer = self.observer(events.append)
+        observer.stop()
+        event = makeEvent(LogLevel.info, 0)
+        observer(event)
+        self.assertEqual(events, [event])
+
+
+    def test_queuedDuringStop(self):
+        """
+        An event which is queued after the writer thread has delivered its
+        last batch, by a thread which observed it before
+        L{BatchingLogObserver.stop} was called, is delivered by C{stop}
+        before events observed after it returns.
+        """
+        events = []
+        observer = self.observer(events.append)
+        join = observer._thread.join
+        def joinAndQueue():
+            join()
+            observer._queue.put(makeEvent(LogLevel.info, 0))
+        self.patch(observer._thread, "join", joinAndQueue)
+        observer.stop()
+        observer(makeEvent(LogLevel.info, 1))
+        self.assertEqual([event["n"] for event in events], [0, 1])
+
+
+    def test_fileLogObserver(self):
+        """
+        A batch of events for a L{FileLogObserver} is written with a single
+        write.
+        """
+        writes = []
+
+        class RecordingFile(StringIO):
+            def write(self, text):
+                writes.append(text)
+                return StringIO.write(self, text)
+
+        with RecordingFile() as fileHandle:
+            observer = self.observer(
+                FileLogObserver(fileHandle, lambda e: u"%d\n" % (e["n"],)),
+                flushInterval=60,
+            )
+            for n in range(3):
+                observer(makeEvent(LogLevel.info, n))
+            observer.stop()
+            self.assertEqual(writes, [u"0\n1\n2\n"])
+
+
+    def test_reportsDropped(self):
+        """
+        Dropped events are counted, and reported to the wrapped observer with
+        a L{LogLevel.warn} event.
+        """
+        events = []
+        observer = self.observer(events.append, size=2, flushInterval=60)
+        for n in range(3):
+            observer(makeEvent(LogLevel.debug, n))
+        observer.stop()
+
+        self.assertEqual(observer.dropped, 1)
+        self.assertEqual([event.get("n") for event in events], [0, 1, None])
+        report = events[-1]
+        self.assertEqual(report["log_level"], LogLevel.warn)
+        self.assertEqual(report["count"], 1)
+        self.assertEqual(report["dropped"], {"debug": 1})
+        self.assertIs(report["log_source"], observer)
+
+
+    def test_observerFails(self):
+        """
+        Events which the wrapped observer fails to handle are counted as
+        dropped, and the writer thread carries on.
+        """
+        events = []
+
+        def observe(event):
+            if event.get("n") == 0:
+                raise RuntimeError("observer failed")
+            events.append(event)
+
+        observer = self.observer(observe, batchSize=1)
+        observer(makeEvent(LogLevel.error, 0))
+        observer(makeEvent(LogLevel.error, 1))
+        observer.stop()
+
+        self.assertEqual(observer.dropped, 1)
+        self.assertEqual(
+            [(event.get("n"), event.get("dropped")) for event in events],
+            [(None, {"error": 1}), (1, None)]
+        )
+
+
+    def test_stoppedAtExit(self):
+        """
+        A L{BatchingLogObserver} registers a function with L{atexit} which
+        stops it, delivering every queued event.
+        """
+        registered = []
+        self.patch(
+            atexit, "register",
+            lambda f, *args: registered.append((f, args)))
+        events = []
+        observer = self.observer(events.append, flushInterval=60)
+        observer(makeEvent(LogLevel.info, 0))
+        [(f, args)] = registered
+        f(*args)
+        self.assertEqual([event["n"] for event in events], [0])
+        self.assertTrue(observer._stopped)
+
+
+    def test_atExitDoesNotKeepObserver(self):
+        """
+        The function registered with L{atexit} does not keep the
+        L{BatchingLogObserver} alive, and does nothing once it is gone.
+        """
+        registered = []
+        self.patch(
+            atexit, "register",
+            lambda f, *args: registered.append((f, args)))
+        observer = BatchingLogObserver(lambda event: None)
+        observer.stop()
+        del observer
+        gc.collect()
+        [(f, args)] = registered
+        self.assertIs(f, _batching._stopAtExit)
+        self.assertIsNone(args[0]())
+        f(*args)
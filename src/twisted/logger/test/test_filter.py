@@ -384,6 +384,46 @@ class LogLevelFilterPredicateTests(unittest.TestCase):
         )
 
 
+    def test_cachedLogLevelInvalidated(self):
+        """
+        Setting a log level after L{LogLevelFilterPredicate.logLevelForNamespace}
+        has looked up a namespace changes the level it subsequently returns for
+        that namespace and its children.
+        """
+        predicate = LogLevelFilterPredicate()
+        self.assertEqual(
+            predicate.logLevelForNamespace("twext.web2.dav"),
+            predicate.defaultLogLevel
+        )
+
+        predicate.setLogLevelForNamespace("twext.web2", LogLevel.debug)
+        self.assertEqual(
+            predicate.logLevelForNamespace("twext.web2.dav"), LogLevel.debug
+        )
+
+        predicate.clearLogLevels()
+        self.assertEqual(
+            predicate.logLevelForNamespace("twext.web2.dav"),
+            predicate.defaultLogLevel
+        )
+
+
+    def test_generation(self):
+        """
+        L{LogLevelFilterPredicate._generation} changes whenever log levels are
+        set or cleared.
+        """
+        predicate = LogLevelFilterPredicate()
+        generations = [predicate._generation]
+
+        predicate.setLogLevelForNamespace("twext.web2", LogLevel.debug)
+        generations.append(predicate._generation)
+        predicate.clearLogLevels()
+        generations.append(predicate._generation)
+
+        self.assertEqual(len(set(generations)), 3)
+
+
     def test_filtering(self):
         """
         Events are filtered based on log level/namespace.
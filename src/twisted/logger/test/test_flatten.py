@@ -20,8 +20,9 @@ from twisted.trial import unittest
 
 from .._format import formatEvent
 from .._flatten import (
-    flattenEvent, extractField, KeyFlattener, aFormatter
+    flattenEvent, extractField, KeyFlattener, aFormatter, compileFormat
 )
+from .. import _flatten
 
 
 
@@ -304,3 +305,43 @@ class FlatFormattingTests(unittest.TestCase):
                 'log_format': 'simple message',
             }
         )
+
+
+
+class CompileFormatTests(unittest.TestCase):
+    """
+    Tests for L{compileFormat}.
+    """
+
+    def test_fields(self):
+        """
+        The C{fields} of a compiled format are those which
+        L{string.Formatter.parse} finds in the format string.
+        """
+        format = u"Hello, {name!r:>10}. {callme()}"
+        self.assertEqual(
+            compileFormat(format).fields, tuple(aFormatter.parse(format))
+        )
+
+
+    def test_cached(self):
+        """
+        L{compileFormat} returns the same object for the same format string.
+        """
+        self.assertIs(
+            compileFormat(u"{cached} format"), compileFormat(u"{cached} format")
+        )
+
+
+    def test_bounded(self):
+        """
+        L{compileFormat} discards its cache once it reaches
+        C{_compiledFormatsSize} entries.
+        """
+        self.patch(_flatten, "_compiledFormats", {})
+        self.patch(_flatten, "_compiledFormatsSize", 2)
+        first = compileFormat(u"{first}")
+        compileFormat(u"{second}")
+        self.assertIs(compileFormat(u"{first}"), first)
+        compileFormat(u"{third}")
+        self.assertEqual(list(_flatten._compiledFormats), [u"{third}"])
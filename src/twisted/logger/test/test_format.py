@@ -421,6 +421,34 @@ class FormatFieldTests(unittest.TestCase):
         )
 
 
+    def test_formatWithCallComplexFields(self):
+        """
+        L{formatWithCall} supports attribute and item access, conversions and
+        format specs with nested fields, as L{unicode.format} does.
+        """
+        class Thing(object):
+            name = u"thing"
+
+        self.assertEqual(
+            formatWithCall(
+                u"{thing.name} {items[1]} {word!r} {number:{width}d}|"
+                u"{number:>4}",
+                dict(thing=Thing(), items=[1, 2], word=u"hi", number=7,
+                     width=3)
+            ),
+            u"thing 2 {0!r}   7|   7".format(u"hi")
+        )
+
+
+    def test_formatWithCallMissingKey(self):
+        """
+        L{formatWithCall} raises L{KeyError} for a field which is not in the
+        mapping.
+        """
+        self.assertRaises(KeyError, formatWithCall, u"{missing}", {})
+        self.assertRaises(KeyError, formatWithCall, u"{missing()}", {})
+
+
 
 class Unformattable(object):
     """
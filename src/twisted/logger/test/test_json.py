@@ -22,7 +22,7 @@ from .._flatten import extractField
 from .._global import globalLogPublisher
 from .._json import (
     eventAsJSON, eventFromJSON, jsonFileLogObserver, eventsFromJSONLogFile,
-    log as jsonLog
+    eventsFromMappedJSONLogFile, jsonLogFileShards, log as jsonLog
 )
 from .._logger import Logger
 
@@ -562,3 +562,237 @@ class LogFileReaderTests(TestCase):
 
             self.assertEqual(tuple(events), (event,))
             self.assertEqual(len(self.errorEvents), 0)
+
+
+
+class MappedLogFileReaderTests(TestCase):
+    """
+    Tests for L{eventsFromMappedJSONLogFile} and L{jsonLogFileShards}.
+    """
+
+    def setUp(self):
+        self.errorEvents = []
+
+        def observer(event):
+            if (
+                event["log_namespace"] == jsonLog.namespace and
+                "record" in event
+            ):
+                self.errorEvents.append(event)
+
+        globalLogPublisher.addObserver(observer)
+        self.addCleanup(globalLogPublisher.removeObserver, observer)
+
+
+    def openFile(self, data):
+        """
+        Write data to a new file and open it for reading.
+
+        @param data: The contents of the file.
+        @type data: L{bytes}
+
+        @return: The open file, which is closed at the end of the test.
+        @rtype: L{file}
+        """
+        path = self.mktemp()
+        with open(path, "wb") as fileHandle:
+            fileHandle.write(data)
+        fileHandle = open(path, "rb")
+        self.addCleanup(fileHandle.close)
+        return fileHandle
+
+
+    def writeEvents(self, events, recordSeparator=u"\x1e"):
+        """
+        Write events to a new file with L{jsonFileLogObserver} and open it for
+        reading.
+
+        @param events: The events to write.
+        @type events: iterable of L{dict}
+
+        @param recordSeparator: The record separator.
+        @type recordSeparator: L{unicode}
+
+        @return: The open file, which is closed at the end of the test.
+        @rtype: L{file}
+        """
+        with StringIO() as fileHandle:
+            observer = jsonFileLogObserver(fileHandle, recordSeparator)
+            for event in events:
+                observer(event)
+            data = fileHandle.getvalue().encode("utf-8")
+        return self.openFile(data)
+
+
+    def test_readEventsWithRecordSeparator(self):
+        """
+        L{eventsFromMappedJSONLogFile} reads events separated by C{u"\\x1e"}.
+        """
+        fileHandle = self.openFile(
+            b'\x1e{"x": 1}\n'
+            b'\x1e{"y": "\xe2\x82\xac"}\n'
+        )
+        self.assertEqual(
+            list(eventsFromMappedJSONLogFile(fileHandle)),
+            [{u"x": 1}, {u"y": u"\u20ac"}]
+        )
+        self.assertEqual(self.errorEvents, [])
+
+
+    def test_readEventsNewlines(self):
+        """
+        L{eventsFromMappedJSONLogFile} reads newline-separated events.
+        """
+        fileHandle = self.openFile(b'{"x": 1}\n\n{"y": 2}')
+        self.assertEqual(
+            list(eventsFromMappedJSONLogFile(fileHandle)),
+            [{u"x": 1}, {u"y": 2}]
+        )
+
+
+    def test_readEmpty(self):
+        """
+        L{eventsFromMappedJSONLogFile} reads no events from an empty file, and
+        L{jsonLogFileShards} divides it into no ranges.
+        """
+        fileHandle = self.openFile(b"")
+        self.assertEqual(list(eventsFromMappedJSONLogFile(fileHandle)), [])
+        self.assertEqual(jsonLogFileShards(fileHandle, 4), [])
+
+
+    def test_readTruncated(self):
+        """
+        L{eventsFromMappedJSONLogFile} skips and logs truncated records.
+        """
+        fileHandle = self.openFile(
+            b'\x1e{"x": 1'
+            b'\x1e{"y": 2}\n'
+        )
+        self.assertEqual(
+            list(eventsFromMappedJSONLogFile(fileHandle)), [{u"y": 2}]
+        )
+        self.assertEqual(len(self.errorEvents), 1)
+        self.assertEqual(self.errorEvents[0]["record"], b'{"x": 1')
+
+
+    def test_readInvalidJSON(self):
+        """
+        L{eventsFromMappedJSONLogFile} skips and logs invalid records.
+        """
+        fileHandle = self.openFile(
+            b'\x1e{"x": }\n'
+            b'\x1e{"y": 2}\n'
+        )
+        self.assertEqual(
+            list(eventsFromMappedJSONLogFile(fileHandle)), [{u"y": 2}]
+        )
+        self.assertEqual(len(self.errorEvents), 1)
+        self.assertEqual(
+            self.errorEvents[0]["log_format"],
+            u"Unable to read JSON record: {record!r}"
+        )
+
+
+    def test_filters(self):
+        """
+        L{eventsFromMappedJSONLogFile} only loads events in the given
+        namespace or its children, at or above the given level, and in the
+        given time range.
+        """
+        events = [
+            dict(log_namespace=namespace, log_level=level, log_time=when)
+            for namespace in (u"a", u"a.b", u"ab")
+            for level in (LogLevel.debug, LogLevel.error)
+            for when in (1.0, 2.0, 3.0)
+        ]
+
+        def read(**kwargs):
+            return [
+                (event["log_namespace"], event["log_level"],
+                 event["log_time"])
+                for event in eventsFromMappedJSONLogFile(
+                    self.writeEvents(events), **kwargs
+                )
+            ]
+
+        self.assertEqual(
+            read(namespace="a", minimumLevel=LogLevel.info, since=2.0,
+                 until=3.0),
+            [(u"a", LogLevel.error, 2.0), (u"a.b", LogLevel.error, 2.0)]
+        )
+        self.assertEqual(len(read(namespace="ab")), 6)
+        self.assertEqual(len(read(minimumLevel=LogLevel.critical)), 0)
+        self.assertEqual(len(read(since=3.0)), 6)
+        self.assertEqual(len(read()), len(events))
+
+
+    def test_filterBeforeDecoding(self):
+        """
+        Records whose raw text shows that they do not match the filters are
+        not decoded.
+        """
+        fileHandle = self.openFile(
+            b'\x1e{"log_namespace": "other", "x": }\n'
+            b'\x1e{"log_namespace": "wanted", "y": 2}\n'
+        )
+        self.assertEqual(
+            list(eventsFromMappedJSONLogFile(fileHandle, namespace="wanted")),
+            [{u"log_namespace": u"wanted", u"y": 2}]
+        )
+        self.assertEqual(self.errorEvents, [])
+
+
+    def test_filterAmbiguousRecord(self):
+        """
+        Records which mention a filtered field more than once are decoded
+        before they are filtered.
+        """
+        event = dict(
+            log_namespace=u"wanted",
+            nested={u"log_namespace": u"other"},
+            log_time=5.0,
+        )
+        fileHandle = self.writeEvents([event])
+        self.assertEqual(
+            list(eventsFromMappedJSONLogFile(fileHandle, namespace="wanted")),
+            [event]
+        )
+
+
+    def test_filterEscapedNamespace(self):
+        """
+        Namespaces which are escaped in the JSON text are unescaped before
+        they are compared.
+        """
+        event = dict(log_namespace=u"caf\xe9")
+        self.assertEqual(
+            list(eventsFromMappedJSONLogFile(
+                self.writeEvents([event]), namespace=u"caf\xe9"
+            )),
+            [event]
+        )
+
+
+    def test_shards(self):
+        """
+        L{jsonLogFileShards} divides a file into ranges which start on record
+        boundaries, from which L{eventsFromMappedJSONLogFile} reads every
+        event exactly once.
+        """
+        events = [dict(n=n, padding=u"x" * (n % 7)) for n in range(50)]
+        for separator in (u"\x1e", u""):
+            fileHandle = self.writeEvents(events, separator)
+            shards = jsonLogFileShards(fileHandle, 4)
+            self.assertEqual(len(shards), 4)
+            self.assertEqual(shards[0][0], 0)
+            self.assertEqual(shards[-1][1], len(fileHandle.read()))
+            read = []
+            for start, end in shards:
+                read.extend(
+                    eventsFromMappedJSONLogFile(
+                        fileHandle, start=start, end=end
+                    )
+                )
+            self.assertEqual(read, events)
+        self.assertEqual(self.errorEvents, [])
+
@@ -11,7 +11,7 @@ from .._levels import InvalidLogLevelError
 from .._levels import LogLevel
 from .._format import formatEvent
 from .._logger import Logger
-from .._global import globalLogPublisher
+from .._global import globalLogPublisher, globalLogLevelPredicate
 
 
 
@@ -252,3 +252,99 @@ class LoggerTests(unittest.TestCase):
 
         log = TestLogger(observer=publisher)
         log.info("Hello.", log_trace=[])
+
+
+
+class LoggerLevelGateTests(unittest.TestCase):
+    """
+    Tests for the gating of L{Logger} events by L{globalLogLevelPredicate}.
+    """
+
+    def setUp(self):
+        self.events = []
+        globalLogPublisher.addObserver(self.events.append)
+        self.addCleanup(globalLogPublisher.removeObserver, self.events.append)
+        self.addCleanup(globalLogLevelPredicate.clearLogLevels)
+
+
+    def test_allLevelsByDefault(self):
+        """
+        By default, L{Logger} emits events at every level.
+        """
+        log = Logger()
+        for level in LogLevel.iterconstants():
+            log.emit(level, "{name}", name=level.name)
+        self.assertEqual(
+            [event["log_level"] for event in self.events],
+            list(LogLevel.iterconstants())
+        )
+
+
+    def test_disabledLevel(self):
+        """
+        L{Logger} does not build events below the log level which
+        L{globalLogLevelPredicate} sets for its namespace.
+        """
+        globalLogLevelPredicate.setLogLevelForNamespace(
+            __name__, LogLevel.warn
+        )
+        log = Logger()
+        log.debug("debug")
+        log.info("info")
+        log.warn("warn")
+        log.error("error")
+        self.assertEqual(
+            [event["log_format"] for event in self.events], ["warn", "error"]
+        )
+
+
+    def test_levelChanged(self):
+        """
+        A L{Logger} which has already emitted events notices when the log
+        level for its namespace changes.
+        """
+        log = Logger(namespace="twext.web2.dav")
+        log.debug("before")
+
+        globalLogLevelPredicate.setLogLevelForNamespace(
+            "twext.web2", LogLevel.info
+        )
+        log.debug("during")
+
+        globalLogLevelPredicate.clearLogLevels()
+        log.debug("after")
+
+        self.assertEqual(
+            [event["log_format"] for event in self.events],
+            ["before", "after"]
+        )
+
+
+    def test_descriptor(self):
+        """
+        L{Logger}s obtained through the descriptor protocol are gated by the
+        log level for the namespace of the class they are retrieved from.
+        """
+        class Gated(object):
+            log = Logger()
+
+        globalLogLevelPredicate.setLogLevelForNamespace(
+            __name__ + ".Gated", LogLevel.error
+        )
+        Gated().log.warn("warn")
+        Gated.log.error("error")
+        self.assertEqual(
+            [event["log_format"] for event in self.events], ["error"]
+        )
+
+
+    def test_otherObserverNotGated(self):
+        """
+        A L{Logger} with an observer other than L{globalLogPublisher} emits
+        events regardless of L{globalLogLevelPredicate}.
+        """
+        globalLogLevelPredicate.setLogLevelForNamespace(None, LogLevel.critical)
+        observed = []
+        log = Logger(observer=observed.append)
+        log.debug("debug")
+        self.assertEqual(len(observed), 1)
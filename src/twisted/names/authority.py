@@ -8,13 +8,16 @@ Authoritative resolvers.
 
 from __future__ import absolute_import, division
 
+import inspect
 import os
 import time
 
+from functools import partial
+
 from twisted.names import dns, error, common
-from twisted.internet import defer
+from twisted.internet import defer, threads
 from twisted.python import failure
-from twisted.python.compat import execfile
+from twisted.python.compat import _PY3, execfile, nativeString, unicode
 
 
 def getSerial(filename = '/tmp/twisted-names.serial'):
@@ -270,22 +273,380 @@ class PySourceAuthority(FileAuthority):
         return r
 
 
+_ZONE_CLASSES = frozenset(
+    c.encode('ascii') for c in dns.QUERY_CLASSES.values())
+_ZONE_TYPES = frozenset(
+    t.encode('ascii') for t in dns.QUERY_TYPES.values())
+_ZONE_MARKERS = _ZONE_CLASSES | _ZONE_TYPES
+_ZONE_RECORD_FACTORIES = dict(
+    (t.encode('ascii'), getattr(dns, 'Record_' + t))
+    for t in dns.QUERY_TYPES.values()
+    if hasattr(dns, 'Record_' + t))
+
+
+
+def _rdataFieldCounts(factory):
+    """
+    Determine how many fields of record data a record factory takes in a
+    zone file, from the arguments of its constructor other than C{ttl}.
+
+    @param factory: A record class, such as L{dns.Record_A}.
+
+    @return: The smallest and largest number of fields.  The largest is
+        L{None} if the constructor takes any number of fields, in which case
+        at least one is needed.
+    @rtype: 2-L{tuple} of L{int} and L{int} or L{None}
+    """
+    if _PY3:
+        parameters = inspect.signature(factory).parameters.values()
+        names = [p.name for p in parameters
+                 if p.kind == p.POSITIONAL_OR_KEYWORD]
+        varargs = any(p.kind == p.VAR_POSITIONAL for p in parameters)
+    else:
+        argspec = inspect.getargspec(factory.__init__)
+        names = argspec.args[1:]
+        varargs = argspec.varargs is not None
+    count = len([name for name in names if name != 'ttl'])
+    if varargs:
+        return max(count, 1), None
+    return count, count
+
+
+
+_ZONE_RDATA_FIELD_COUNTS = dict(
+    (type, _rdataFieldCounts(factory))
+    for (type, factory) in _ZONE_RECORD_FACTORIES.items())
+
+
+
+class _BindZoneParser(object):
+    """
+    An incremental parser for BIND zone files.
+
+    Raw lines are fed to L{lineReceived} one at a time, so a zone can be
+    parsed as it is read without holding the whole file (or any
+    intermediate list of lines) in memory.  Comments are stripped,
+    parenthesized continuations are collapsed and records are built in the
+    same pass.
+
+    @ivar zone: The origin the parser started with, as L{bytes} with a
+        trailing dot.
+
+    @ivar origin: The current origin, as L{bytes} with a trailing dot.  It
+        is updated by C{$ORIGIN} directives.
+
+    @ivar ttl: The default TTL for records without an explicit one.  It is
+        updated by C{$TTL} directives.
+
+    @ivar records: A L{dict} mapping lowercased owner names (without a
+        trailing dot) to L{list}s of records, in the format used by
+        L{FileAuthority.records}.
+
+    @ivar soa: A 2-tuple of the zone's name and its L{dns.Record_SOA}, or
+        L{None} if no I{SOA} record has been parsed yet.
+
+    @ivar count: The number of records parsed so far.
+    """
+    def __init__(self, origin, ttl=60 * 60 * 3, records=None):
+        self.zone = origin
+        self.origin = origin
+        self.ttl = ttl
+        if records is None:
+            records = {}
+        self.records = records
+        self.soa = None
+        self.count = 0
+        self._owner = origin
+        self._pending = None
+        self._pendingInherits = False
+        self._depth = 0
+
+
+    def lineReceived(self, line):
+        """
+        Parse one raw line of a zone file.
+
+        @param line: A line from the zone file, with or without its line
+            terminator.
+        @type line: L{bytes}
+        """
+        comment = line.find(b';')
+        if comment != -1:
+            line = line[:comment]
+        opening = line.count(b'(')
+        closing = line.count(b')')
+        if opening or closing:
+            line = line.replace(b'(', b' ').replace(b')', b' ')
+
+        if self._pending is None:
+            # An owner field left blank means the previous owner is reused.
+            inherits = line[:1] in (b' ', b'\t')
+            tokens = line.split()
+        else:
+            inherits = self._pendingInherits
+            tokens = self._pending
+            tokens.extend(line.split())
+
+        self._depth += opening - closing
+        if self._depth > 0:
+            self._pending = tokens
+            self._pendingInherits = inherits
+            return
+        self._pending = None
+        self._depth = 0
+        if tokens:
+            self.tokensReceived(tokens, not inherits)
+
+
+    def tokensReceived(self, tokens, hasOwner=None):
+        """
+        Parse one logical line of a zone file which has already been split
+        into fields.
+
+        @param tokens: The fields of the line.
+        @type tokens: L{list} of L{bytes}
+
+        @param hasOwner: C{True} if the first field is the owner name, as it
+            is on a line which is not indented, or C{False} if the line has
+            no owner field and the owner of the previous record applies.  If
+            L{None}, whether the line has an owner field is guessed from its
+            first field, which is taken to be a TTL, class or type rather
+            than an owner if it could be one.
+        @type hasOwner: L{bool} or L{None}
+
+        @raise NotImplementedError: For unsupported directives, record
+            classes or record types.
+
+        @raise ValueError: If the line has no record type, or the wrong
+            number of record data fields for its type.
+        """
+        first = tokens[0]
+        if first[:1] == b'$':
+            if first == b'$TTL':
+                self.ttl = dns.str2time(tokens[1])
+            elif first == b'$ORIGIN':
+                self.origin = self._absolute(tokens[1])
+            else:
+                raise NotImplementedError(
+                    '%s directive not implemented' % (nativeString(first),))
+            return
+
+        if hasOwner is None:
+            hasOwner = not (first[:1].isdigit() or first in _ZONE_MARKERS)
+        if hasOwner:
+            self._owner = self._absolute(first)
+            tokens = tokens[1:]
+
+        ttl = self.ttl
+        cls = b'IN'
+        index = 0
+        # The TTL and class fields are both optional and may appear in
+        # either order.
+        for _ in range(2):
+            if index == len(tokens):
+                break
+            token = tokens[index]
+            if token[:1].isdigit():
+                ttl = dns.str2time(token)
+                index += 1
+            elif token in _ZONE_CLASSES:
+                cls = token
+                index += 1
+        if index == len(tokens):
+            raise ValueError(
+                "Record for %s has no type" % (nativeString(self._owner),))
+        self.addRecord(self._owner[:-1], ttl, cls, tokens[index],
+                       tokens[index + 1:])
+
+
+    def addRecord(self, name, ttl, cls, type, rdata):
+        """
+        Build a record and add it to L{records}.
+
+        @param name: The absolute owner name of the record, without a
+            trailing dot.
+        @type name: L{bytes}
+
+        @param ttl: The TTL of the record.
+        @type ttl: L{int}
+
+        @param cls: The class of the record, for example C{b"IN"}.
+        @type cls: L{bytes}
+
+        @param type: The type of the record, for example C{b"MX"}.
+        @type type: L{bytes}
+
+        @param rdata: The fields of the record data.
+        @type rdata: L{list} of L{bytes}
+
+        @raise NotImplementedError: For unsupported record classes or types.
+
+        @raise ValueError: If C{rdata} has the wrong number of fields for
+            C{type}.
+        """
+        if cls != b'IN':
+            raise NotImplementedError(
+                "Record class %r not supported" % (nativeString(cls),))
+        factory = _ZONE_RECORD_FACTORIES.get(type)
+        if factory is None:
+            raise NotImplementedError(
+                "Record type %r not supported" % (nativeString(type),))
+        minimum, maximum = _ZONE_RDATA_FIELD_COUNTS[type]
+        if len(rdata) < minimum or (
+                maximum is not None and len(rdata) > maximum):
+            raise ValueError(
+                "%s record for %s has %d data fields: %r" % (
+                    nativeString(type), nativeString(name), len(rdata),
+                    nativeString(b' '.join(rdata))))
+        record = factory(*rdata)
+        record.ttl = ttl
+        key = name.lower()
+        records = self.records.get(key)
+        if records is None:
+            self.records[key] = [record]
+        else:
+            records.append(record)
+        if type == b'SOA':
+            self.soa = (name, record)
+        self.count += 1
+
+
+    def _absolute(self, name):
+        """
+        Qualify C{name} relative to the current origin.
+
+        @param name: A name from the zone file.
+        @type name: L{bytes}
+
+        @return: The absolute form of C{name}, with a trailing dot.
+        @rtype: L{bytes}
+        """
+        if name == b'@':
+            return self.origin
+        if name.endswith(b'.'):
+            return name
+        return name + b'.' + self.origin
+
+
+
 class BindAuthority(FileAuthority):
-    """An Authority that loads BIND configuration files"""
+    """
+    An Authority that loads BIND configuration files.
 
-    def loadFile(self, filename):
-        self.origin = os.path.basename(filename) + '.' # XXX - this might suck
+    Only the C{$ORIGIN} and C{$TTL} directives are supported.
 
-        with open(filename, 'rb') as f:
-            lines = f.readlines()
-        lines = self.stripComments(lines)
-        lines = self.collapseContinuations(lines)
-        self.parseLines(lines)
+    @ivar origin: The origin of the zone, as L{bytes} with a trailing dot.
+        It defaults to the base name of the zone file.
+
+    @ivar progressInterval: The number of lines parsed between calls to
+        the C{progress} callable passed to L{loadFile} or
+        L{loadFileInThread}.
+    """
+    progressInterval = 10000
+
+    def loadFile(self, filename, progress=None):
+        """
+        Parse a zone file and replace the records of this authority with
+        the ones it contains.
+
+        @param filename: The path of the zone file.
+        @type filename: L{str}
+
+        @param progress: If not L{None}, a callable which is periodically
+            called with the number of bytes parsed so far and the size of the
+            file.
+        """
+        self._installZone(self._parseFile(filename, progress))
+
+
+    def loadFileInThread(self, filename, progress=None, reactor=None):
+        """
+        Parse a zone file in the reactor's thread pool, then replace the
+        records of this authority with the ones it contains.
+
+        The current records keep being served while the file is parsed and
+        the new zone is swapped in all at once, in the reactor thread.
+
+        @param filename: The path of the zone file.
+        @type filename: L{str}
+
+        @param progress: If not L{None}, a callable which is periodically
+            called, in the reactor thread, with the number of bytes parsed so
+            far and the size of the file.
+
+        @param reactor: The reactor whose thread pool is used.  Defaults to
+            the global reactor.
+
+        @return: A L{Deferred} which fires with L{None} once the new zone is
+            in place, or fails if it could not be parsed, in which case the
+            current records are left untouched.
+        """
+        if reactor is None:
+            from twisted.internet import reactor
+        if progress is not None:
+            progress = partial(reactor.callFromThread, progress)
+        d = threads.deferToThreadPool(
+            reactor, reactor.getThreadPool(),
+            self._parseFile, filename, progress)
+        d.addCallback(self._installZone)
+        return d
+
+
+    def _parseFile(self, filename, progress):
+        """
+        Parse a zone file one line at a time.
+
+        This does not touch the state of this authority, so it is safe to
+        call from a thread other than the reactor thread.
+
+        @param filename: The path of the zone file.
+        @type filename: L{str}
+
+        @param progress: See L{loadFile}.
+
+        @return: The L{_BindZoneParser} which parsed the file.
+
+        @raise ValueError: If a record in the file is malformed.  The message
+            gives the file name and line number.
+        """
+        origin = os.path.basename(filename)
+        if isinstance(origin, unicode):
+            origin = origin.encode('idna')
+        parser = _BindZoneParser(origin + b'.')
+        interval = self.progressInterval
+
+        with open(filename, 'rb') as zoneFile:
+            size = os.fstat(zoneFile.fileno()).st_size
+            parsed = 0
+            for lineNumber, line in enumerate(zoneFile, 1):
+                try:
+                    parser.lineReceived(line)
+                except ValueError as e:
+                    raise ValueError(
+                        "%s, line %d: %s" % (filename, lineNumber, e))
+                parsed += len(line)
+                if progress is not None and not lineNumber % interval:
+                    progress(parsed, size)
+        if progress is not None:
+            progress(parsed, size)
+        return parser
+
+
+    def _installZone(self, parser):
+        """
+        Replace the records of this authority with those from C{parser}.
+
+        @param parser: A L{_BindZoneParser} which has parsed a whole zone.
+        """
+        self.origin = parser.zone
+        self.soa = parser.soa
+        self.records = parser.records
+        self._cache = {}
 
 
     def stripComments(self, lines):
         return [
-            a.find(';') == -1 and a or a[:a.find(';')] for a in [
+            a.find(b';') == -1 and a or a[:a.find(b';')] for a in [
                 b.strip() for b in lines
             ]
         ]
@@ -296,115 +657,134 @@ class BindAuthority(FileAuthority):
         state = 0
         for line in lines:
             if state == 0:
-                if line.find('(') == -1:
+                if line.find(b'(') == -1:
                     L.append(line)
                 else:
-                    L.append(line[:line.find('(')])
+                    L.append(line[:line.find(b'(')])
                     state = 1
             else:
-                if line.find(')') != -1:
-                    L[-1] += ' ' + line[:line.find(')')]
+                if line.find(b')') != -1:
+                    L[-1] += b' ' + line[:line.find(b')')]
                     state = 0
                 else:
-                    L[-1] += ' ' + line
-        lines = L
-        L = []
-        for line in lines:
-            L.append(line.split())
-        return filter(None, L)
+                    L[-1] += b' ' + line
+        return [line.split() for line in L if line.split()]
 
 
     def parseLines(self, lines):
-        TTL = 60 * 60 * 3
-        ORIGIN = self.origin
+        """
+        Replace the records of this authority with those described by some
+        lines of a zone file which have already been split into fields.
 
-        self.records = {}
+        @param lines: The lines to parse.
+        @type lines: iterable of L{list} of L{bytes}
+        """
+        parser = _BindZoneParser(self.origin)
+        for line in lines:
+            parser.tokensReceived(line)
+        self._installZone(parser)
 
-        for (line, index) in zip(lines, range(len(lines))):
-            if line[0] == '$TTL':
-                TTL = dns.str2time(line[1])
-            elif line[0] == '$ORIGIN':
-                ORIGIN = line[1]
-            elif line[0] == '$INCLUDE': # XXX - oh, fuck me
-                raise NotImplementedError('$INCLUDE directive not implemented')
-            elif line[0] == '$GENERATE':
-                raise NotImplementedError('$GENERATE directive not implemented')
-            else:
-                self.parseRecordLine(ORIGIN, TTL, line)
+
+    def parseRecordLine(self, origin, ttl, line):
+        """
+        Add the record described by one line of a zone file, already split
+        into fields, to the records of this authority.
+
+        @param origin: The origin to use for relative names.
+        @type origin: L{bytes}
+
+        @param ttl: The default TTL for the record.
+        @type ttl: L{int}
+
+        @param line: The fields of the line.
+        @type line: L{list} of L{bytes}
+        """
+        parser = self._recordParser(origin, ttl)
+        parser.tokensReceived(line)
+        self._updateSOA(parser)
 
 
     def addRecord(self, owner, ttl, type, domain, cls, rdata):
-        if not domain.endswith('.'):
-            domain = domain + '.' + owner
-        else:
-            domain = domain[:-1]
-        f = getattr(self, 'class_%s' % cls, None)
-        if f:
-            f(ttl, type, domain, rdata)
-        else:
-            raise NotImplementedError("Record class %r not supported" % cls)
+        """
+        Add a record to the records of this authority.
+
+        @param owner: The origin to use if C{domain} is relative.
+        @type owner: L{bytes}
+
+        @param ttl: The TTL of the record.
+        @type ttl: L{int}
+
+        @param type: The type of the record, for example C{b"MX"}.
+        @type type: L{bytes}
+
+        @param domain: The owner name of the record, which is qualified with
+            C{owner} unless it ends with a dot.
+        @type domain: L{bytes}
+
+        @param cls: The class of the record.  Only C{b"IN"} is supported.
+        @type cls: L{bytes}
+
+        @param rdata: The fields of the record data.
+        @type rdata: L{list} of L{bytes}
+
+        @raise NotImplementedError: For unsupported record classes or types.
+        """
+        if not owner.endswith(b'.'):
+            owner += b'.'
+        parser = self._recordParser(owner, ttl)
+        parser.addRecord(parser._absolute(domain)[:-1], ttl, cls, type, rdata)
+        self._updateSOA(parser)
 
 
     def class_IN(self, ttl, type, domain, rdata):
-        record = getattr(dns, 'Record_%s' % type, None)
-        if record:
-            r = record(*rdata)
-            r.ttl = ttl
-            self.records.setdefault(domain.lower(), []).append(r)
-
-            print('Adding IN Record', domain, ttl, r)
-            if type == 'SOA':
-                self.soa = (domain, r)
-        else:
-            raise NotImplementedError("Record type %r not supported" % type)
+        """
+        Add an I{IN} class record to the records of this authority.
 
+        @param ttl: The TTL of the record.
+        @type ttl: L{int}
 
-    #
-    # This file ends here.  Read no further.
-    #
-    def parseRecordLine(self, origin, ttl, line):
-        MARKERS = dns.QUERY_CLASSES.values() + dns.QUERY_TYPES.values()
-        cls = 'IN'
-        owner = origin
-
-        if line[0] == '@':
-            line = line[1:]
-            owner = origin
-#            print 'default owner'
-        elif not line[0].isdigit() and line[0] not in MARKERS:
-            owner = line[0]
-            line = line[1:]
-#            print 'owner is ', owner
-
-        if line[0].isdigit() or line[0] in MARKERS:
-            domain = owner
-            owner = origin
-#            print 'woops, owner is ', owner, ' domain is ', domain
-        else:
-            domain = line[0]
-            line = line[1:]
-#            print 'domain is ', domain
-
-        if line[0] in dns.QUERY_CLASSES.values():
-            cls = line[0]
-            line = line[1:]
-#            print 'cls is ', cls
-            if line[0].isdigit():
-                ttl = int(line[0])
-                line = line[1:]
-#                print 'ttl is ', ttl
-        elif line[0].isdigit():
-            ttl = int(line[0])
-            line = line[1:]
-#            print 'ttl is ', ttl
-            if line[0] in dns.QUERY_CLASSES.values():
-                cls = line[0]
-                line = line[1:]
-#                print 'cls is ', cls
-
-        type = line[0]
-#        print 'type is ', type
-        rdata = line[1:]
-#        print 'rdata is ', rdata
-
-        self.addRecord(owner, ttl, type, domain, cls, rdata)
+        @param type: The type of the record, for example C{b"MX"}.
+        @type type: L{bytes}
+
+        @param domain: The absolute owner name of the record, without a
+            trailing dot.
+        @type domain: L{bytes}
+
+        @param rdata: The fields of the record data.
+        @type rdata: L{list} of L{bytes}
+
+        @raise NotImplementedError: For unsupported record types.
+        """
+        parser = self._recordParser(self.origin, ttl)
+        parser.addRecord(domain, ttl, b'IN', type, rdata)
+        self._updateSOA(parser)
+
+
+    def _recordParser(self, origin, ttl):
+        """
+        Make a L{_BindZoneParser} which adds records to the records of this
+        authority.
+
+        @param origin: The origin to use for relative names.
+        @type origin: L{bytes}
+
+        @param ttl: The default TTL for records.
+        @type ttl: L{int}
+
+        @return: The parser.
+        @rtype: L{_BindZoneParser}
+        """
+        if self.records is None:
+            self.records = {}
+        return _BindZoneParser(origin, ttl, self.records)
+
+
+    def _updateSOA(self, parser):
+        """
+        Take the I{SOA} record of this authority from C{parser}, if it has
+        parsed one.
+
+        @param parser: A L{_BindZoneParser} returned by L{_recordParser}.
+        """
+        if parser.soa is not None:
+            self.soa = parser.soa
@@ -30,6 +30,8 @@ from twisted.internet import error, defer, interfaces, protocol
 from twisted.python import log, failure
 from twisted.names import (
     dns, common, resolve, cache, root, hosts as hostsModule)
+from twisted.names.error import DNSUnknownError
+from twisted.names._rfc1982 import SerialNumber
 
 
 
@@ -50,10 +52,31 @@ class Resolver(common.ResolverBase):
     @ivar _reactor: A provider of L{IReactorTCP}, L{IReactorUDP}, and
         L{IReactorTime} which will be used to set up network resources and
         track timeouts.
+
+    @ivar _rtt: A C{dict} mapping server addresses to two-element C{list}s
+        holding the smoothed round trip time of queries to that server and its
+        mean deviation, in seconds, estimated as TCP does (RFC 6298).
+        Servers with a lower smoothed round trip time are queried first.
+
+    @ivar _rttDecay: The factor by which the smoothed round trip times of all
+        the other servers are multiplied whenever a server is measured, so
+        that slow servers are eventually tried again, as BIND does.
+
+    @ivar _minimumTimeout: The lower bound, in seconds, of the timeout of
+        the first attempt of a query, which is otherwise derived from the
+        round trip time of the server.
+
+    @ivar _datagramProtocols: A C{dict} mapping server addresses to the
+        L{dns.DNSDatagramProtocol} used for all queries to that server, if
+        C{shareDatagramPorts} was passed to L{Resolver.__init__}.
     """
     index = 0
     timeout = None
 
+    _rttDecay = 0.98
+    _minimumTimeout = 0.2
+    _shareDatagramPorts = False
+
     factory = None
     servers = None
     dynServers = ()
@@ -64,13 +87,15 @@ class Resolver(common.ResolverBase):
     _lastResolvTime = None
     _resolvReadInterval = 60
 
-    def __init__(self, resolv=None, servers=None, timeout=(1, 3, 11, 45), reactor=None):
+    def __init__(self, resolv=None, servers=None, timeout=(1, 3, 11, 45),
+                 reactor=None, shareDatagramPorts=False):
         """
         Construct a resolver which will query domain name servers listed in
         the C{resolv.conf(5)}-format file given by C{resolv} as well as
-        those in the given C{servers} list.  Servers are queried in a
-        round-robin fashion.  If given, C{resolv} is periodically checked
-        for modification and re-parsed if it is noticed to have changed.
+        those in the given C{servers} list.  Servers which have answered the
+        most quickly so far are queried first.  If given, C{resolv} is
+        periodically checked for modification and re-parsed if it is noticed
+        to have changed.
 
         @type servers: C{list} of C{(str, int)} or L{None}
         @param servers: If not None, interpreted as a list of (host, port)
@@ -85,13 +110,26 @@ class Resolver(common.ResolverBase):
         @type timeout: Sequence of C{int}
         @param timeout: Default number of seconds after which to reissue the
             query.  When the last timeout expires, the query is considered
-            failed.
+            failed.  Once a server has answered, the first timeout used for
+            it is lowered to match its observed round trip time.
 
         @param reactor: A provider of L{IReactorTime}, L{IReactorUDP}, and
             L{IReactorTCP} which will be used to establish connections, listen
             for DNS datagrams, and enforce timeouts.  If not provided, the
             global reactor will be used.
 
+        @type shareDatagramPorts: L{bool}
+        @param shareDatagramPorts: If C{True}, a single UDP port is bound for
+            each server and all queries to that server are sent from it,
+            matched to their responses by message ID.  This saves binding a
+            new port for each query, at the cost of the protection against
+            spoofed responses which random source ports provide: an attacker
+            who learns the port only has to guess a 16 bit message ID to
+            poison the answer to a query.  The default, C{False}, binds a
+            new randomly chosen port for each query and closes it once the
+            query is answered or times out.  Shared ports stay open until
+            L{closeDatagramPorts} is called.
+
         @raise ValueError: Raised if no nameserver addresses can be found.
         """
         common.ResolverBase.__init__(self)
@@ -119,6 +157,9 @@ class Resolver(common.ResolverBase):
         self.pending = []
 
         self._waiting = {}
+        self._rtt = {}
+        self._shareDatagramPorts = shareDatagramPorts
+        self._datagramProtocols = {}
 
         self.maybeParseConfig()
 
@@ -127,6 +168,7 @@ class Resolver(common.ResolverBase):
         d = self.__dict__.copy()
         d['connections'] = []
         d['_parseCall'] = None
+        d['_datagramProtocols'] = {}
         return d
 
 
@@ -211,6 +253,65 @@ class Resolver(common.ResolverBase):
             return self.dynServers[self.index - serverL]
 
 
+    def _orderedServers(self):
+        """
+        Return the addresses of all known nameservers, in the order in which
+        they should be queried.
+
+        Servers are sorted by their smoothed round trip time.  Servers which
+        have not been queried yet come first, and servers which are equally
+        fast keep the order in which they are configured.
+
+        @rtype: L{list}
+        """
+        rtt = self._rtt
+        return sorted(
+            self.servers + list(self.dynServers),
+            key=lambda address: rtt[address][0] if address in rtt else 0.0)
+
+
+    def _recordRoundTripTime(self, address, seconds):
+        """
+        Update the round trip time estimate of a nameserver.
+
+        @param address: The address of the server.
+
+        @param seconds: The time it took for the server to answer a query, or
+            the timeout which expired while waiting for it to answer.
+        @type seconds: L{float}
+        """
+        estimate = self._rtt.get(address)
+        if estimate is None:
+            self._rtt[address] = [seconds, seconds / 2]
+        else:
+            srtt, rttvar = estimate
+            estimate[1] = 0.75 * rttvar + 0.25 * abs(srtt - seconds)
+            estimate[0] = 0.875 * srtt + 0.125 * seconds
+        for other, otherEstimate in self._rtt.items():
+            if other != address:
+                otherEstimate[0] *= self._rttDecay
+
+
+    def _firstTimeout(self, address, timeout):
+        """
+        Compute the timeout of the first attempt of a query to a nameserver.
+
+        @param address: The address of the server.
+
+        @param timeout: The configured timeout, which is never exceeded.
+        @type timeout: L{int} or L{float}
+
+        @return: The smoothed round trip time of the server plus four times
+            its deviation, within C{[_minimumTimeout, timeout]}, or C{timeout}
+            if the server has not been measured yet.
+        """
+        estimate = self._rtt.get(address)
+        if estimate is None:
+            return timeout
+        srtt, rttvar = estimate
+        return min(timeout, max(srtt + 4 * rttvar, self._minimumTimeout))
+
+
     def _connectedProtocol(self):
         """
         Return a new L{DNSDatagramProtocol} bound to a randomly selected port
@@ -248,22 +349,67 @@ class Resolver(common.ResolverBase):
         log.msg("Unexpected message (%d) received from %r" % (message.id, address))
 
 
-    def _query(self, *args):
+    def _datagramProtocol(self, address):
+        """
+        Get the L{DNSDatagramProtocol} to send a query to a nameserver with.
+
+        @param address: The address of the server.
+
+        @return: A new protocol from L{_connectedProtocol} or, if datagram
+            ports are shared, the protocol already bound for C{address}.
         """
-        Get a new L{DNSDatagramProtocol} instance from L{_connectedProtocol},
-        issue a query to it using C{*args}, and arrange for it to be
-        disconnected from its transport after the query completes.
+        if not self._shareDatagramPorts:
+            return self._connectedProtocol()
+        protocol = self._datagramProtocols.get(address)
+        if protocol is None or protocol.transport is None:
+            protocol = self._connectedProtocol()
+            self._datagramProtocols[address] = protocol
+        return protocol
 
-        @param *args: Positional arguments to be passed to
-            L{DNSDatagramProtocol.query}.
+
+    def closeDatagramPorts(self):
+        """
+        Stop listening on the UDP ports which are shared by the queries to
+        each server if C{shareDatagramPorts} was passed to L{__init__}.
+        Queries still waiting for a response on them will time out.  New
+        ports are bound if more queries are made.
+
+        @return: A L{Deferred} which fires when every port has stopped
+            listening.
+        """
+        protocols, self._datagramProtocols = self._datagramProtocols, {}
+        return defer.gatherResults([
+            defer.maybeDeferred(protocol.transport.stopListening)
+            for protocol in protocols.values()
+            if protocol.transport is not None])
+
+
+    def _query(self, address, queries, timeout, id=None):
+        """
+        Get a L{DNSDatagramProtocol} instance from L{_datagramProtocol}, issue
+        a query to it, measure how long the answer takes and, unless datagram
+        ports are shared, arrange for the protocol to be disconnected from its
+        transport after the query completes.
+
+        @param address: See L{DNSDatagramProtocol.query}.
+        @param queries: See L{DNSDatagramProtocol.query}.
+        @param timeout: See L{DNSDatagramProtocol.query}.
+        @param id: See L{DNSDatagramProtocol.query}.
 
         @return: A L{Deferred} which will be called back with the result of the
             query.
         """
-        protocol = self._connectedProtocol()
-        d = protocol.query(*args)
+        protocol = self._datagramProtocol(address)
+        started = self._reactor.seconds()
+        d = protocol.query(address, queries, timeout, id)
         def cbQueried(result):
-            protocol.transport.stopListening()
+            if not isinstance(result, failure.Failure):
+                self._recordRoundTripTime(
+                    address, self._reactor.seconds() - started)
+            elif result.check(dns.DNSQueryTimeoutError):
+                self._recordRoundTripTime(address, timeout)
+            if not self._shareDatagramPorts:
+                protocol.transport.stopListening()
             return result
         d.addBoth(cbQueried)
         return d
@@ -287,21 +433,24 @@ class Resolver(common.ResolverBase):
         if timeout is None:
             timeout = self.timeout
 
-        addresses = self.servers + list(self.dynServers)
+        addresses = self._orderedServers()
         if not addresses:
             return defer.fail(IOError("No domain name servers available"))
 
         # Make sure we go through servers in the list in the order they were
-        # specified.
+        # sorted in.
         addresses.reverse()
 
         used = addresses.pop()
-        d = self._query(used, queries, timeout[0])
-        d.addErrback(self._reissue, addresses, [used], queries, timeout)
+        d = self._query(
+            used, queries, self._firstTimeout(used, timeout[0]))
+        d.addErrback(
+            self._reissue, addresses, [used], queries, timeout, True)
         return d
 
 
-    def _reissue(self, reason, addressesLeft, addressesUsed, query, timeout):
+    def _reissue(self, reason, addressesLeft, addressesUsed, query, timeout,
+                 firstRound=False):
         reason.trap(dns.DNSQueryTimeoutError)
 
         # If there are no servers left to be tried, adjust the timeout
@@ -312,6 +461,7 @@ class Resolver(common.ResolverBase):
             addressesLeft.reverse()
             addressesUsed = []
             timeout = timeout[1:]
+            firstRound = False
 
         # If all timeout values have been used this query has failed.  Tell the
         # protocol we're giving up on it and return a terminal timeout failure
@@ -324,10 +474,17 @@ class Resolver(common.ResolverBase):
         address = addressesLeft.pop()
         addressesUsed.append(address)
 
-        # Issue a query to a server.  Use the current timeout.  Add this
+        # Issue a query to a server.  Use the current timeout, lowered to
+        # match the speed of the server during the first round.  Add this
         # function as a timeout errback in case another retry is required.
-        d = self._query(address, query, timeout[0], reason.value.id)
-        d.addErrback(self._reissue, addressesLeft, addressesUsed, query, timeout)
+        if firstRound:
+            attemptTimeout = self._firstTimeout(address, timeout[0])
+        else:
+            attemptTimeout = timeout[0]
+        d = self._query(address, query, attemptTimeout, reason.value.id)
+        d.addErrback(
+            self._reissue, addressesLeft, addressesUsed, query, timeout,
+            firstRound)
         return d
 
 
@@ -344,11 +501,16 @@ class Resolver(common.ResolverBase):
         @rtype: C{Deferred}
         """
         if not len(self.connections):
-            address = self.pickServer()
-            if address is None:
-                return defer.fail(IOError("No domain name servers available"))
-            host, port = address
-            self._reactor.connectTCP(host, port, self.factory)
+            # Queries are pending exactly while a connection attempt is in
+            # progress.  Wait for it rather than making another one, so that
+            # all queries are pipelined over a single connection.
+            if not self.pending:
+                addresses = self._orderedServers()
+                if not addresses:
+                    return defer.fail(
+                        IOError("No domain name servers available"))
+                host, port = addresses[0]
+                self._reactor.connectTCP(host, port, self.factory)
             self.pending.append((defer.Deferred(), queries, timeout))
             return self.pending[-1][0]
         else:
@@ -410,12 +572,54 @@ class Resolver(common.ResolverBase):
 
     # This one doesn't ever belong on UDP
     def lookupZone(self, name, timeout=10):
+        d = defer.Deferred()
+        return self._transferZone(AXFRController(name, d), d, timeout)
+
+
+    def lookupIncrementalZone(self, name, soa, timeout=10):
+        """
+        Perform an incremental zone transfer (IXFR, RFC 1995) over TCP.
+
+        @param name: The name of the zone to transfer.
+        @type name: L{bytes}
+
+        @param soa: The I{SOA} record of the version of the zone which is
+            already known.  Only the differences between that version and the
+            current one are requested.
+        @type soa: L{dns.Record_SOA}
+
+        @param timeout: The number of seconds after which to give up.
+        @type timeout: L{int}
+
+        @return: A L{Deferred} which fires with a three-tuple whose first
+            element is the L{list} of L{dns.RRHeader} instances making up the
+            response.  See L{IXFRController} for how to interpret it.  If the
+            server refuses the transfer, the L{Deferred} fails with the
+            exception corresponding to the response code.
+        """
+        d = defer.Deferred()
+        return self._transferZone(IXFRController(name, soa, d), d, timeout)
+
+
+    def _transferZone(self, controller, d, timeout):
+        """
+        Connect to a server over TCP and let C{controller} perform a zone
+        transfer.
+
+        @param controller: An L{AXFRController} which issues the request and
+            fires C{d} when the transfer is complete.
+
+        @param d: The L{Deferred} which C{controller} fires.
+
+        @param timeout: The number of seconds after which to give up.
+
+        @return: A L{Deferred} which fires with a three-tuple whose first
+            element is the result of C{d}.
+        """
         address = self.pickServer()
         if address is None:
             return defer.fail(IOError('No domain name servers available'))
         host, port = address
-        d = defer.Deferred()
-        controller = AXFRController(name, d)
         factory = DNSClientFactory(controller, timeout)
         factory.noisy = False #stfu
 
@@ -423,7 +627,10 @@ class Resolver(common.ResolverBase):
         controller.timeoutCall = self._reactor.callLater(
             timeout or 10, self._timeoutZone, d, controller,
             connector, timeout or 10)
-        return d.addCallback(self._cbLookupZone, connector)
+        d.addCallbacks(
+            self._cbLookupZone, self._ebLookupZone,
+            callbackArgs=(connector,), errbackArgs=(connector,))
+        return d
 
 
     def _timeoutZone(self, d, controller, connector, seconds):
@@ -438,6 +645,11 @@ class Resolver(common.ResolverBase):
         return (result, [], [])
 
 
+    def _ebLookupZone(self, reason, connector):
+        connector.disconnect()
+        return reason
+
+
 
 class AXFRController:
     timeoutCall = None
@@ -477,12 +689,94 @@ class AXFRController:
                 self.soa = self.records[0]
         if len(self.records) > 1 and self.records[-1].type == dns.SOA:
             #print "It's the second SOA! We're done."
-            if self.timeoutCall is not None:
-                self.timeoutCall.cancel()
-                self.timeoutCall = None
-            if self.deferred is not None:
-                self.deferred.callback(self.records)
-                self.deferred = None
+            self._transferDone(self.records)
+
+
+    def _transferDone(self, result):
+        """
+        Stop waiting for the transfer and fire C{self.deferred}.
+
+        @param result: The result or L{failure.Failure} to fire the
+            L{Deferred} with.
+        """
+        if self.timeoutCall is not None:
+            self.timeoutCall.cancel()
+            self.timeoutCall = None
+        if self.deferred is not None:
+            d, self.deferred = self.deferred, None
+            if isinstance(result, failure.Failure):
+                d.errback(result)
+            else:
+                d.callback(result)
+
+
+
+class IXFRController(AXFRController):
+    """
+    Perform an incremental zone transfer (IXFR, RFC 1995).
+
+    The records of the response are accumulated and passed to C{deferred}
+    once the final I{SOA} record has been received.  The first record is
+    always the I{SOA} record of the current version of the zone.  It is
+    followed by:
+
+        - nothing, if the zone has not changed since C{soa}.
+
+        - the whole zone and the I{SOA} record again, just like an AXFR
+          response, if the server cannot send differences.
+
+        - for each intermediate version, the I{SOA} record of the old version,
+          the records deleted from it, the I{SOA} record of the new version and
+          the records added to it.  The current I{SOA} record comes again at
+          the end.
+
+    @ivar soa: The L{dns.Record_SOA} of the version of the zone the client
+        already has.
+    """
+    def __init__(self, name, soa, deferred):
+        AXFRController.__init__(self, name, deferred)
+        self.soa = soa
+        self._serial = None
+        self._soaCount = 0
+
+
+    def connectionMade(self, protocol):
+        message = dns.Message(protocol.pickID(), recDes=0)
+        message.queries = [dns.Query(self.name, dns.IXFR, dns.IN)]
+        message.authority = [
+            dns.RRHeader(self.name, dns.SOA, dns.IN, payload=self.soa)]
+        protocol.writeMessage(message)
+
+
+    def messageReceived(self, message, protocol):
+        if message.rCode != dns.OK:
+            exception = common.ResolverBase._errormap.get(
+                message.rCode, DNSUnknownError)
+            self._transferDone(failure.Failure(exception(message)))
+            return
+
+        for record in message.answers:
+            if record.type == dns.SOA:
+                if self._serial is None:
+                    self._serial = record.payload.serial
+                    self.records.append(record)
+                    continue
+                self._soaCount += 1
+            self.records.append(record)
+
+        if self._serial is None:
+            return
+        if len(self.records) == 1:
+            # A lone SOA record means there is nothing to transfer.
+            if not SerialNumber(self._serial) > SerialNumber(self.soa.serial):
+                self._transferDone(self.records)
+            return
+        # The transfer ends with the current SOA record in the place of the
+        # SOA record of a version to delete records from, which is odd.
+        last = self.records[-1]
+        if (last.type == dns.SOA and last.payload.serial == self._serial
+                and self._soaCount % 2):
+            self._transferDone(self.records)
 
 
 
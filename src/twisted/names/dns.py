@@ -296,6 +296,120 @@ def str2time(s):
     return s
 
 
+def _decodeName(octets, data, offset):
+    """
+    Decode a domain name from a DNS message without copying anything but its
+    labels.
+
+    Compression pointers are followed by moving C{offset} around rather than
+    by seeking in a file.
+
+    @param octets: The message, indexable by offset to get the value of the
+        byte at that offset as an L{int}.
+
+    @param data: The message, as L{bytes}.
+    @type data: L{bytes}
+
+    @param offset: The offset at which the name starts.
+    @type offset: L{int}
+
+    @raise EOFError: If the message ends before the name.
+
+    @raise ValueError: If the name contains a compression loop.
+
+    @return: A two-tuple of the decoded name as L{bytes} and the offset right
+        after the name, as it appears at C{offset}.
+    @rtype: L{tuple} of L{bytes} and L{int}
+    """
+    labels = []
+    end = None
+    visited = None
+    length = len(data)
+    while True:
+        if offset >= length:
+            raise EOFError("Message ended in the middle of a name")
+        l = octets[offset]
+        if l == 0:
+            offset += 1
+            break
+        if l >= 0xc0:
+            if offset + 1 >= length:
+                raise EOFError("Message ended in the middle of a name")
+            pointer = (l & 0x3f) << 8 | octets[offset + 1]
+            if end is None:
+                end = offset + 2
+                visited = set()
+            if pointer in visited:
+                raise ValueError("Compression loop in encoded name")
+            visited.add(pointer)
+            offset = pointer
+            continue
+        offset += 1
+        if offset + l > length:
+            raise EOFError("Message ended in the middle of a name")
+        labels.append(data[offset:offset + l])
+        offset += l
+    if end is None:
+        end = offset
+    return b'.'.join(labels), end
+
+
+
+def _skipName(octets, offset, length):
+    """
+    Check that a domain name in a DNS message is well formed, without
+    decoding it.
+
+    @param octets: The message, indexable by offset to get the value of the
+        byte at that offset as an L{int}.
+
+    @param offset: The offset at which the name starts.
+    @type offset: L{int}
+
+    @param length: The length of the message.
+    @type length: L{int}
+
+    @raise EOFError: If the message ends before the name.
+
+    @raise ValueError: If the name contains a compression loop.
+
+    @return: The offset right after the name, as it appears at C{offset}.
+    @rtype: L{int}
+    """
+    end = None
+    visited = None
+    while True:
+        if offset >= length:
+            raise EOFError("Message ended in the middle of a name")
+        l = octets[offset]
+        if l == 0:
+            offset += 1
+            break
+        if l >= 0xc0:
+            if offset + 1 >= length:
+                raise EOFError("Message ended in the middle of a name")
+            pointer = (l & 0x3f) << 8 | octets[offset + 1]
+            if end is None:
+                end = offset + 2
+            # Pointers normally refer to earlier names.  Only a chain which
+            # also goes forward can loop, so only those pointers are tracked.
+            if pointer >= offset:
+                if visited is None:
+                    visited = set()
+                if pointer in visited:
+                    raise ValueError("Compression loop in encoded name")
+                visited.add(pointer)
+            offset = pointer
+            continue
+        offset += 1 + l
+        if offset > length:
+            raise EOFError("Message ended in the middle of a name")
+    if end is None:
+        end = offset
+    return end
+
+
+
 def readPrecisely(file, l):
     buff = file.read(l)
     if len(buff) < l:
@@ -424,6 +538,45 @@ class Name:
         self.name = name
 
 
+    _encoded = None
+
+    def _wireFormat(self):
+        """
+        Split this name into its labels in wire format.
+
+        The result is cached on the instance until L{name} changes, so a
+        name which appears in many responses is only split once.
+
+        @return: A three-tuple of a L{list} of the suffixes of this name which
+            may be used as compression keys, starting with the whole name, a
+            L{list} of the same length of the encoded labels which precede
+            each of those suffixes, and the whole encoded name.
+        @rtype: L{tuple} of two L{list}s of L{bytes} and L{bytes}
+        """
+        encoded = self._encoded
+        if encoded is not None and encoded[0] is self.name:
+            return encoded[1]
+        suffixes = []
+        prefixes = []
+        prefix = b''
+        name = self.name
+        while name:
+            suffixes.append(name)
+            prefixes.append(prefix)
+            ind = name.find(b'.')
+            if ind > 0:
+                label, name = name[:ind], name[ind + 1:]
+            else:
+                # This is the last label, end the loop after handling it.
+                label = name
+                name = None
+                ind = len(label)
+            prefix += _ord2bytes(ind) + label
+        wireFormat = suffixes, prefixes, prefix + b'\x00'
+        self._encoded = (self.name, wireFormat)
+        return wireFormat
+
+
     def encode(self, strio, compDict=None):
         """
         Encode this Name into the appropriate byte format.
@@ -437,26 +590,19 @@ class Name:
         and whose addresses may be backreferenced by this Name (for the purpose
         of reducing the message size).
         """
-        name = self.name
-        while name:
-            if compDict is not None:
-                if name in compDict:
+        suffixes, prefixes, wire = self._wireFormat()
+        if compDict is not None:
+            offset = None
+            for i, suffix in enumerate(suffixes):
+                pointer = compDict.get(suffix)
+                if pointer is not None:
                     strio.write(
-                        struct.pack("!H", 0xc000 | compDict[name]))
+                        prefixes[i] + struct.pack("!H", 0xc000 | pointer))
                     return
-                else:
-                    compDict[name] = strio.tell() + Message.headerSize
-            ind = name.find(b'.')
-            if ind > 0:
-                label, name = name[:ind], name[ind + 1:]
-            else:
-                # This is the last label, end the loop after handling it.
-                label = name
-                name = None
-                ind = len(label)
-            strio.write(_ord2bytes(ind))
-            strio.write(label)
-        strio.write(b'\x00')
+                if offset is None:
+                    offset = strio.tell() + Message.headerSize
+                compDict[suffix] = offset + len(prefixes[i])
+        strio.write(wire)
 
 
     def decode(self, strio, length=None):
@@ -2164,6 +2310,11 @@ class Message(tputil.FancyEqMixin):
         header fields.
     @ivar _sectionNames: The names of attributes representing the record
         sections of this message.
+
+    @ivar _lazySections: If not L{None}, the C{answers}, C{authority} and
+        C{additional} sections have not been decoded yet.  A tuple holding the
+        message as indexable octets and as L{bytes}, the offset of the answer
+        section and the number of records in each section.  See L{fromStr}.
     """
     compareAttributes = (
         'id', 'answer', 'opCode', 'recDes', 'recAv',
@@ -2175,8 +2326,11 @@ class Message(tputil.FancyEqMixin):
     headerFmt = "!H2B4H"
     headerSize = struct.calcsize(headerFmt)
 
-    # Question, answer, additional, and nameserver lists
-    queries = answers = add = ns = None
+    # Question, additional, and nameserver lists.  The answer, authority and
+    # additional sections are always instance attributes, set on demand by
+    # __getattr__ when they are decoded lazily.
+    queries = add = ns = None
+    _lazySections = None
 
     def __init__(self, id=0, answer=0, opCode=0, recDes=0, recAv=0,
                        auth=0, rCode=OK, trunc=0, maxSize=512,
@@ -2294,7 +2448,30 @@ class Message(tputil.FancyEqMixin):
         self.queries.append(Query(name, type, cls))
 
 
+    def __getattr__(self, name):
+        """
+        Decode the record sections of a message received by L{fromStr} the
+        first time one of them is accessed.
+        """
+        if name in self._lazySectionNames and self._lazySections is not None:
+            self._decodeSections()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    _lazySectionNames = ('answers', 'authority', 'additional')
+
+
     def encode(self, strio):
+        strio.write(self.toStr())
+
+
+    def toStr(self):
+        """
+        Encode this L{Message} into a byte string in the format described by RFC
+        1035.
+
+        @rtype: L{bytes}
+        """
         compDict = {}
         body_tmp = BytesIO()
         for q in self.queries:
@@ -2320,13 +2497,13 @@ class Message(tputil.FancyEqMixin):
                   | ((self.checkingDisabled & 1) << 4)
                   | (self.rCode & 0xf ) )
 
-        strio.write(struct.pack(self.headerFmt, self.id, byte3, byte4,
-                                len(self.queries), len(self.answers),
-                                len(self.authority), len(self.additional)))
-        strio.write(body)
+        return struct.pack(self.headerFmt, self.id, byte3, byte4,
+                           len(self.queries), len(self.answers),
+                           len(self.authority), len(self.additional)) + body
 
 
     def decode(self, strio, length=None):
+        self._lazySections = None
         self.maxSize = 0
         header = readPrecisely(strio, self.headerSize)
         r = struct.unpack(self.headerFmt, header)
@@ -2405,27 +2582,189 @@ class Message(tputil.FancyEqMixin):
         return self._recordTypes.get(type, UnknownRecord)
 
 
-    def toStr(self):
+    def fromStr(self, str):
         """
-        Encode this L{Message} into a byte string in the format described by RFC
-        1035.
+        Decode a byte string in the format described by RFC 1035 into this
+        L{Message}.
 
-        @rtype: L{bytes}
+        The header and the question section are decoded right away.  The
+        answer, authority and additional sections are only decoded the first
+        time one of them is accessed, so that servers which only look at the
+        question pay little for the rest.  Fields are unpacked in place from
+        C{str}, following compression pointers by offset.
+
+        The owner names and record lengths of those sections are still
+        checked right away, so that a malformed message is rejected here, as
+        it would be if it were decoded in full.
+
+        @param str: L{bytes}
+
+        @raise ValueError: If a name in the message contains a compression
+            loop.
         """
-        strio = BytesIO()
-        self.encode(strio)
-        return strio.getvalue()
+        if _PY3:
+            octets = str
+        else:
+            octets = bytearray(str)
+        self.maxSize = 0
+        self._lazySections = None
+        for name in self._lazySectionNames:
+            self.__dict__.pop(name, None)
 
+        if len(str) < self.headerSize:
+            raise EOFError("Message shorter than its header")
+        r = struct.unpack_from(self.headerFmt, str, 0)
+        self.id, byte3, byte4, nqueries, nans, nns, nadd = r
+        self.answer = ( byte3 >> 7 ) & 1
+        self.opCode = ( byte3 >> 3 ) & 0xf
+        self.auth = ( byte3 >> 2 ) & 1
+        self.trunc = ( byte3 >> 1 ) & 1
+        self.recDes = byte3 & 1
+        self.recAv = ( byte4 >> 7 ) & 1
+        self.authenticData = ( byte4 >> 5 ) & 1
+        self.checkingDisabled = ( byte4 >> 4 ) & 1
+        self.rCode = byte4 & 0xf
 
-    def fromStr(self, str):
+        self.queries = queries = []
+        offset = self.headerSize
+        length = len(str)
+        for i in range(nqueries):
+            try:
+                name, offset = _decodeName(octets, str, offset)
+            except EOFError:
+                nans = nns = nadd = 0
+                break
+            if offset + 4 > length:
+                nans = nns = nadd = 0
+                break
+            type, cls = struct.unpack_from('!HH', str, offset)
+            offset += 4
+            queries.append(Query(name, type, cls))
+
+        counts = self._checkSections(octets, offset, length, (nans, nns, nadd))
+        self._lazySections = (octets, str, offset, counts)
+
+
+    def _checkSections(self, octets, offset, length, counts):
         """
-        Decode a byte string in the format described by RFC 1035 into this
-        L{Message}.
+        Check the owner names and record lengths of the answer, authority and
+        additional sections of a message, without decoding them.
 
-        @param str: L{bytes}
+        As with L{decode}, a truncated record ends all sections.
+
+        @param octets: The message, as indexable octets.
+
+        @param offset: The offset of the answer section.
+        @type offset: L{int}
+
+        @param length: The length of the message.
+        @type length: L{int}
+
+        @param counts: The number of records in each section, according to
+            the header.
+        @type counts: L{tuple} of L{int}
+
+        @raise ValueError: If an owner name contains a compression loop.
+
+        @return: The number of complete records in each section.
+        @rtype: L{tuple} of L{int}
         """
-        strio = BytesIO(str)
-        self.decode(strio)
+        headerSize = self._recordHeaderSize
+        found = [0, 0, 0]
+        # Owner names are usually a single pointer to a name seen before, so
+        # each name a pointer refers to is only checked once.
+        checked = set()
+        for section, count in enumerate(counts):
+            for i in range(count):
+                try:
+                    if octets[offset] >= 0xc0 and offset + 1 < length:
+                        pointer = (
+                            (octets[offset] & 0x3f) << 8 | octets[offset + 1])
+                        if pointer not in checked:
+                            _skipName(octets, pointer, length)
+                            checked.add(pointer)
+                        offset += 2
+                    else:
+                        offset = _skipName(octets, offset, length)
+                except (EOFError, IndexError):
+                    return tuple(found)
+                if offset + headerSize > length:
+                    return tuple(found)
+                # The record data length is the last field of the header.
+                offset += headerSize + (
+                    octets[offset + headerSize - 2] << 8 |
+                    octets[offset + headerSize - 1])
+                if offset > length:
+                    return tuple(found)
+                found[section] += 1
+        return tuple(found)
+
+    _recordHeaderSize = struct.calcsize(RRHeader.fmt)
+
+
+    def _decodeSections(self):
+        """
+        Decode the answer, authority and additional sections of a message
+        received by L{fromStr}.
+
+        Sections which have been assigned in the meantime are skipped over but
+        left alone.  As with L{decode}, a truncated record ends the decoding
+        of all sections.
+        """
+        octets, data, offset, counts = self._lazySections
+        self._lazySections = None
+
+        sections = dict((name, []) for name in self._lazySectionNames)
+        try:
+            self._decodeRecords(octets, data, offset, counts, sections)
+        finally:
+            # Even if a record cannot be decoded, the sections are always
+            # there afterwards, with the records decoded before it.
+            for name, records in sections.items():
+                if name not in self.__dict__:
+                    self.__dict__[name] = records
+
+
+    def _decodeRecords(self, octets, data, offset, counts, sections):
+        """
+        Decode the records of the answer, authority and additional sections
+        into the lists in C{sections}, for L{_decodeSections}.
+        """
+        fmt = RRHeader.fmt
+        fmtSize = self._recordHeaderSize
+        length = len(data)
+        strio = None
+        for name, count in zip(self._lazySectionNames, counts):
+            records = sections[name]
+            for i in range(count):
+                if offset is None:
+                    break
+                try:
+                    owner, offset = _decodeName(octets, data, offset)
+                except EOFError:
+                    offset = None
+                    break
+                if offset + fmtSize > length:
+                    offset = None
+                    break
+                type, cls, ttl, rdlength = struct.unpack_from(
+                    fmt, data, offset)
+                offset += fmtSize
+                header = RRHeader(owner, type, cls, ttl, auth=self.auth)
+                header.rdlength = rdlength
+                header.payload = self.lookupRecordType(type)(ttl=ttl)
+                # Record types decode themselves from a file, which is shared
+                # by all the records of the message.
+                if strio is None:
+                    strio = BytesIO(data)
+                strio.seek(offset)
+                try:
+                    header.payload.decode(strio, rdlength)
+                except EOFError:
+                    offset = None
+                    break
+                offset = strio.tell()
+                records.append(header)
 
 
 
@@ -6,7 +6,7 @@ from __future__ import absolute_import, division
 
 __all__ = ['SecondaryAuthority', 'SecondaryAuthorityService']
 
-from twisted.internet import task, defer
+from twisted.internet import defer
 from twisted.names import dns
 from twisted.names import common
 from twisted.names import client
@@ -17,8 +17,6 @@ from twisted.python import log, failure
 from twisted.application import service
 
 class SecondaryAuthorityService(service.Service):
-    calls = None
-
     _port = 53
 
     def __init__(self, primary, domains):
@@ -63,20 +61,21 @@ class SecondaryAuthorityService(service.Service):
     def getAuthority(self):
         return resolve.ResolverChain(self.domains)
 
+
     def startService(self):
+        """
+        Start keeping each domain up to date, staggering the first transfers
+        by one second.
+        """
         service.Service.startService(self)
-        self.calls = [task.LoopingCall(d.transfer) for d in self.domains]
-        i = 0
-        from twisted.internet import reactor
-        for c in self.calls:
-            # XXX Add errbacks, respect proper timeouts
-            reactor.callLater(i, c.start, 60 * 60)
-            i += 1
+        for i, domain in enumerate(self.domains):
+            domain._startRefreshing(i)
+
 
     def stopService(self):
         service.Service.stopService(self)
-        for c in self.calls:
-            c.stop()
+        for domain in self.domains:
+            domain._stopRefreshing()
 
 
 
@@ -94,12 +93,22 @@ class SecondaryAuthority(FileAuthority):
 
     @ivar _reactor: The reactor to use to perform the zone transfers, or L{None}
         to use the global reactor.
+
+    @ivar _defaultRefresh: The number of seconds between refreshes of the zone
+        while no I{SOA} record is known.  Once the zone has been transferred,
+        the I{refresh} and I{retry} fields of its I{SOA} record are used.
+
+    @ivar _refreshCall: The L{IDelayedCall} of the next periodic refresh, or
+        L{None}.
     """
 
     transferring = False
     soa = records = None
     _port = 53
     _reactor = None
+    _defaultRefresh = 60 * 60
+    _refreshing = False
+    _refreshCall = None
 
     def __init__(self, primaryIP, domain):
         """
@@ -139,20 +148,76 @@ class SecondaryAuthority(FileAuthority):
 
 
     def transfer(self):
+        """
+        Transfer the whole zone (AXFR) from the primary and replace the
+        records of this authority with it.
+
+        @return: A L{Deferred} which fires once the transfer is over, or at
+            once if a transfer is already in progress.  Errors are logged.
+        """
         if self.transferring:
-            return
-        self.transfering = True
+            return defer.succeed(None)
+        return self._transfer().addErrback(self._ebZone)
+
+
+    def refresh(self):
+        """
+        Bring this zone up to date with the primary.
+
+        If no version of the zone has been transferred yet, the whole zone is
+        transferred.  Otherwise an incremental transfer (IXFR) asks the
+        primary for the changes made since the serial number of the current
+        I{SOA} record, which are applied to the records of this authority in
+        place.  Nothing else is transferred if the zone has not changed.  If
+        the incremental transfer fails, for example because the primary does
+        not support it, the whole zone is transferred instead.
+
+        @return: A L{Deferred} which fires with L{None} once the zone is up
+            to date, or fails if it could not be transferred.
+        """
+        if self.transferring:
+            return defer.succeed(None)
+        if self.soa is None:
+            return self._transfer()
+
+        self.transferring = True
+        d = self._getResolver().lookupIncrementalZone(
+            self.domain, self.soa[1])
+        d.addCallback(self._cbIncrementalZone)
+        d.addBoth(self._transferDone)
+        d.addErrback(self._ebIncrementalZone)
+        return d
+
 
+    def _getResolver(self):
+        """
+        @return: A L{client.Resolver} which sends its queries to the primary.
+        """
         reactor = self._reactor
         if reactor is None:
             from twisted.internet import reactor
 
-        resolver = client.Resolver(
+        return client.Resolver(
             servers=[(self.primary, self._port)], reactor=reactor)
-        return resolver.lookupZone(self.domain
-            ).addCallback(self._cbZone
-            ).addErrback(self._ebZone
-            )
+
+
+    def _transfer(self):
+        """
+        Transfer the whole zone from the primary.
+
+        @return: A L{Deferred} which fires with L{None} once the records of
+            this authority have been replaced, or fails if the transfer failed.
+        """
+        self.transferring = True
+        d = self._getResolver().lookupZone(self.domain)
+        d.addCallback(self._cbZone)
+        d.addBoth(self._transferDone)
+        return d
+
+
+    def _transferDone(self, result):
+        self.transferring = False
+        return result
 
 
     def _lookup(self, name, cls, type, timeout=None):
@@ -163,12 +228,14 @@ class SecondaryAuthority(FileAuthority):
 
     def _cbZone(self, zone):
         ans, _, _ = zone
+        soa = None
         self.records = r = {}
         for rec in ans:
-            if not self.soa and rec.type == dns.SOA:
-                self.soa = (str(rec.name).lower(), rec.payload)
+            if soa is None and rec.type == dns.SOA:
+                soa = (rec.name.name.lower(), rec.payload)
             else:
-                r.setdefault(str(rec.name).lower(), []).append(rec.payload)
+                r.setdefault(rec.name.name.lower(), []).append(rec.payload)
+        self.soa = soa
 
 
     def _ebZone(self, failure):
@@ -176,15 +243,152 @@ class SecondaryAuthority(FileAuthority):
         log.err(failure)
 
 
+    def _cbIncrementalZone(self, zone):
+        """
+        Update the records of this authority from the response to an IXFR
+        request.
+
+        @param zone: A three-tuple whose first element is the L{list} of
+            records in the response, as described by L{client.IXFRController}.
+
+        @raise ValueError: If the response tries to delete a record which
+            this authority does not have.  The records of this authority are
+            not changed in that case.
+        """
+        ans, _, _ = zone
+        if len(ans) == 1:
+            # The zone has not changed.
+            return
+        if ans[1].type != dns.SOA or len(ans) == 2:
+            # The primary sent the whole zone instead of differences.
+            self._cbZone(zone)
+            return
+
+        # Work on copies of the affected record lists and only install them
+        # once the whole response has been checked, so that lookups never see
+        # a partially updated zone.
+        changed = {}
+        adding = True
+        for rec in ans[1:-1]:
+            if rec.type == dns.SOA:
+                # SOA records alternate between starting the list of records
+                # deleted from a version and the list of records added to the
+                # next one.
+                adding = not adding
+                continue
+            key = rec.name.name.lower()
+            if key not in changed:
+                changed[key] = list(self.records.get(key, ()))
+            records = changed[key]
+            if adding:
+                records.append(rec.payload)
+            else:
+                for i, existing in enumerate(records):
+                    if _sameRecordData(existing, rec.payload):
+                        del records[i]
+                        break
+                else:
+                    raise ValueError(
+                        "Cannot delete %s from %s: no such record" % (
+                            rec.payload, key))
+
+        soa = (ans[0].name.name.lower(), ans[0].payload)
+        apex = changed.setdefault(
+            soa[0], list(self.records.get(soa[0], ())))
+        apex[:] = [
+            soa[1] if rec.TYPE == dns.SOA else rec for rec in apex]
+
+        for key, records in changed.items():
+            if records:
+                self.records[key] = records
+            else:
+                self.records.pop(key, None)
+        self.soa = soa
+
+
+    def _ebIncrementalZone(self, reason):
+        log.err(
+            reason,
+            "Incremental transfer of %s from %s failed, transferring the "
+            "whole zone" % (self.domain, self.primary))
+        return self._transfer()
+
+
+    def _startRefreshing(self, delay):
+        """
+        Refresh the zone after C{delay} seconds and then keep refreshing it
+        as often as its I{SOA} record requests.
+
+        @param delay: The number of seconds to wait before the first refresh.
+        @type delay: L{int}
+        """
+        self._refreshing = True
+        self._scheduleRefresh(delay)
+
+
+    def _stopRefreshing(self):
+        """
+        Stop refreshing the zone periodically.
+        """
+        self._refreshing = False
+        if self._refreshCall is not None:
+            self._refreshCall.cancel()
+            self._refreshCall = None
+
+
+    def _scheduleRefresh(self, delay):
+        reactor = self._reactor
+        if reactor is None:
+            from twisted.internet import reactor
+        self._refreshCall = reactor.callLater(delay, self._periodicRefresh)
+
+
+    def _periodicRefresh(self):
+        self._refreshCall = None
+        self.refresh().addCallbacks(self._cbRefreshed, self._ebRefreshed)
+
+
+    def _cbRefreshed(self, ignored):
+        if self._refreshing:
+            if self.soa is None:
+                self._scheduleRefresh(self._defaultRefresh)
+            else:
+                self._scheduleRefresh(self.soa[1].refresh)
+
+
+    def _ebRefreshed(self, reason):
+        log.err(reason, "Refreshing %s from %s failed" % (
+            self.domain, self.primary))
+        if self._refreshing:
+            if self.soa is None:
+                self._scheduleRefresh(self._defaultRefresh)
+            else:
+                self._scheduleRefresh(self.soa[1].retry)
+
+
     def update(self):
-        self.transfer().addCallbacks(self._cbTransferred, self._ebTransferred)
+        """
+        Transfer the whole zone from the primary, unless a transfer is
+        already in progress.  See L{transfer}.
 
+        @return: The L{Deferred} returned by L{transfer}.
+        """
+        return self.transfer()
 
-    def _cbTransferred(self, result):
-        self.transferring = False
 
 
-    def _ebTransferred(self, failure):
-        self.transferred = False
-        log.msg("Transferring %s from %s failed after zone transfer" % (self.domain, self.primary))
-        log.err(failure)
+def _sameRecordData(first, second):
+    """
+    Compare two records, disregarding their TTLs.
+
+    @return: C{True} if C{first} and C{second} are records of the same type
+        with the same data.
+    @rtype: L{bool}
+    """
+    if first.__class__ is not second.__class__:
+        return False
+    for attribute in first.compareAttributes:
+        if attribute != 'ttl':
+            if getattr(first, attribute) != getattr(second, attribute):
+                return False
+    return True
@@ -21,7 +21,7 @@ from __future__ import division, absolute_import
 import time
 
 from twisted.internet import protocol
-from twisted.names import dns, resolve
+from twisted.names import dns, resolve, secondary
 from twisted.python import log
 
 
@@ -446,7 +446,14 @@ class DNSServerFactory(protocol.ServerFactory):
         Called by L{DNSServerFactory.messageReceived} when a notify message is
         received.
 
-        Replies with a I{Not Implemented} error by default.
+        If some of the authorities of this factory are
+        L{SecondaryAuthority<twisted.names.secondary.SecondaryAuthority>}
+        instances for the zone named in the message, and the message comes
+        from their primary server, they are asked to refresh the zone and the
+        message is acknowledged (RFC 1996).  Notify messages from other
+        servers are refused.
+
+        Otherwise, replies with a I{Not Implemented} error.
 
         An error message will be logged if C{DNSServerFactory.verbose} is C{>1}.
 
@@ -464,11 +471,57 @@ class DNSServerFactory(protocol.ServerFactory):
             or L{None} if C{protocol} is a stream protocol.
         @type address: L{tuple} or L{None}
         """
-        message.rCode = dns.ENOTIMP
-        self.sendReply(protocol, message, address)
+        zones = [
+            query.name for query in message.queries if query.type == dns.SOA]
+        secondaries = [
+            authority for authority in self._secondaryAuthorities()
+            if dns.Name(authority.domain) in zones]
+
+        if secondaries:
+            if address is None:
+                source = protocol.transport.getPeer().host
+            else:
+                source = address[0]
+            notified = [
+                authority for authority in secondaries
+                if authority.primary == source]
+            for authority in notified:
+                authority.refresh().addErrback(
+                    log.err, "Refreshing %s after notify from %r failed" % (
+                        authority.domain, source))
+            if notified:
+                rCode = dns.OK
+            else:
+                rCode = dns.EREFUSED
+            self.sendReply(
+                protocol, self._responseFromMessage(message, rCode=rCode),
+                address)
+        else:
+            message.rCode = dns.ENOTIMP
+            self.sendReply(protocol, message, address)
         self._verboseLog("Notify message from %r" % (address,))
 
 
+    def _secondaryAuthorities(self):
+        """
+        Find the secondary authorities among the resolvers of this factory,
+        including those nested in L{resolve.ResolverChain} instances.
+
+        @return: A L{list} of
+            L{SecondaryAuthority<twisted.names.secondary.SecondaryAuthority>}
+            instances.
+        """
+        found = []
+        resolvers = list(self.resolver.resolvers)
+        while resolvers:
+            resolver = resolvers.pop(0)
+            if isinstance(resolver, resolve.ResolverChain):
+                resolvers[:0] = resolver.resolvers
+            elif isinstance(resolver, secondary.SecondaryAuthority):
+                found.append(resolver)
+        return found
+
+
     def handleOther(self, message, protocol, address):
         """
         Called by L{DNSServerFactory.messageReceived} when a message with
@@ -358,6 +358,129 @@ class ResolverTests(unittest.TestCase):
         return queryResult
 
 
+    def test_datagramQueryFastestServerFirst(self):
+        """
+        L{client.Resolver.queryUDP} sends a query to the server which has
+        answered the most quickly so far first.
+        """
+        clock = Clock()
+        protocol = StubDNSDatagramProtocol()
+        servers = [('192.0.2.1', 53), ('192.0.2.2', 53)]
+        resolver = client.Resolver(servers=servers, reactor=clock)
+        resolver._connectedProtocol = lambda: protocol
+
+        resolver.queryUDP(None)
+        clock.advance(0.5)
+        protocol.queries[0][-1].errback(DNSQueryTimeoutError(0))
+        clock.advance(0.1)
+        protocol.queries[1][-1].callback(dns.Message())
+
+        resolver.queryUDP(None)
+        self.assertEqual(servers[1], protocol.queries[2][0])
+
+
+    def test_datagramQueryTimeoutFromRoundTripTime(self):
+        """
+        Once a server has answered, the first timeout of queries sent to it by
+        L{client.Resolver.queryUDP} is derived from its round trip time,
+        within the configured timeout and L{client.Resolver._minimumTimeout}.
+        Later attempts use the configured timeouts.
+        """
+        clock = Clock()
+        protocol = StubDNSDatagramProtocol()
+        resolver = client.Resolver(
+            servers=[('192.0.2.1', 53)], timeout=(2, 5), reactor=clock)
+        resolver._connectedProtocol = lambda: protocol
+
+        resolver.queryUDP(None)
+        self.assertEqual(2, protocol.queries[0][2])
+        clock.advance(0.1)
+        protocol.queries[0][-1].callback(dns.Message())
+
+        # Smoothed round trip time plus four times its deviation.
+        resolver.queryUDP(None)
+        self.assertAlmostEqual(0.1 + 4 * 0.05, protocol.queries[1][2])
+        protocol.queries[1][-1].errback(DNSQueryTimeoutError(0))
+        self.assertEqual(5, protocol.queries[2][2])
+        protocol.queries[2][-1].callback(dns.Message())
+
+        resolver._rtt[('192.0.2.1', 53)] = [0.001, 0.0]
+        resolver.queryUDP(None)
+        self.assertEqual(resolver._minimumTimeout, protocol.queries[3][2])
+
+
+    def test_roundTripTimeEstimate(self):
+        """
+        The round trip time estimate of a server is smoothed like TCP's, and
+        the estimates of other servers decay each time a server is measured.
+        """
+        resolver = client.Resolver(servers=[('192.0.2.1', 53)])
+        first, second = ('192.0.2.1', 53), ('192.0.2.2', 53)
+        resolver._recordRoundTripTime(first, 0.2)
+        self.assertEqual([0.2, 0.1], resolver._rtt[first])
+        resolver._recordRoundTripTime(first, 0.6)
+        srtt, rttvar = resolver._rtt[first]
+        self.assertAlmostEqual(0.875 * 0.2 + 0.125 * 0.6, srtt)
+        self.assertAlmostEqual(0.75 * 0.1 + 0.25 * 0.4, rttvar)
+        resolver._recordRoundTripTime(second, 0.1)
+        self.assertAlmostEqual(
+            (0.875 * 0.2 + 0.125 * 0.6) * resolver._rttDecay,
+            resolver._rtt[first][0])
+
+
+    def test_shareDatagramPorts(self):
+        """
+        If L{client.Resolver} is created with C{shareDatagramPorts} set, all
+        queries to a server are sent with the same protocol, which is not
+        disconnected after the queries complete.
+        """
+        resolver = client.Resolver(
+            servers=[('192.0.2.1', 53), ('192.0.2.2', 53)],
+            shareDatagramPorts=True)
+        protocols = []
+
+        def connectedProtocol():
+            protocols.append(StubDNSDatagramProtocol())
+            return protocols[-1]
+        resolver._connectedProtocol = connectedProtocol
+
+        resolver.queryUDP(None)
+        resolver.queryUDP(None)
+        self.assertEqual(1, len(protocols))
+        self.assertEqual(2, len(protocols[0].queries))
+        protocols[0].queries[0][-1].callback(dns.Message())
+        self.assertFalse(protocols[0].transport.disconnected)
+
+        # A timeout moves on to the other server, with its own protocol.
+        protocols[0].queries[1][-1].errback(DNSQueryTimeoutError(0))
+        self.assertEqual(2, len(protocols))
+        self.assertEqual(('192.0.2.2', 53), protocols[1].queries[0][0])
+
+
+    def test_closeDatagramPorts(self):
+        """
+        L{client.Resolver.closeDatagramPorts} stops listening on the ports
+        shared by the queries to each server, and later queries bind new
+        ones.
+        """
+        resolver = client.Resolver(
+            servers=[('192.0.2.1', 53)], shareDatagramPorts=True)
+        protocols = []
+
+        def connectedProtocol():
+            protocols.append(StubDNSDatagramProtocol())
+            return protocols[-1]
+        resolver._connectedProtocol = connectedProtocol
+
+        resolver.queryUDP(None)
+        self.successResultOf(resolver.closeDatagramPorts())
+        self.assertTrue(protocols[0].transport.disconnected)
+
+        resolver.queryUDP(None)
+        self.assertEqual(2, len(protocols))
+        self.assertFalse(protocols[1].transport.disconnected)
+
+
     def test_singleConcurrentRequest(self):
         """
         L{client.Resolver.query} only issues one request at a time per query.
@@ -768,6 +891,31 @@ class ResolverTests(unittest.TestCase):
         self.assertIs(f, f2)
 
 
+    def test_singleTCPConnectionAttempt(self):
+        """
+        While a TCP connection attempt is in progress,
+        L{client.Resolver.queryTCP} does not make another one, and all
+        pending queries are sent over the connection once it is made.
+        """
+        reactor = proto_helpers.MemoryReactor()
+        resolver = client.Resolver(
+            servers=[('192.0.2.100', 53)],
+            reactor=reactor)
+
+        resolver.queryTCP([dns.Query(b'example.com')])
+        resolver.queryTCP([dns.Query(b'example.net')])
+        self.assertEqual(1, len(reactor.tcpClients))
+
+        host, port, factory, timeout, bindAddress = reactor.tcpClients[0]
+        protocol = factory.buildProtocol((host, port))
+        protocol.makeConnection(proto_helpers.StringTransport())
+        self.assertEqual(2, len(protocol.liveMessages))
+        self.assertEqual([], resolver.pending)
+
+        for d, call in protocol.liveMessages.values():
+            call.cancel()
+
+
     def test_pendingEmptiedInPlaceOnError(self):
         """
         When the TCP connection attempt fails, the
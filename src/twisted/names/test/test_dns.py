@@ -190,6 +190,38 @@ class NameTests(unittest.TestCase):
             compression)
 
 
+    def test_encodeWithCompressionAllSuffixes(self):
+        """
+        If none of its suffixes are in the compression dictionary,
+        L{Name.encode} writes every label and adds the offset of each suffix
+        to the dictionary.
+        """
+        name = dns.Name(b"foo.example.com")
+        compression = {}
+        stream = BytesIO()
+        name.encode(stream, compression)
+        self.assertEqual(
+            b"\x03foo\x07example\x03com\x00", stream.getvalue())
+        self.assertEqual(
+            {b"foo.example.com": dns.Message.headerSize,
+             b"example.com": dns.Message.headerSize + 4,
+             b"com": dns.Message.headerSize + 12},
+            compression)
+
+
+    def test_encodeAfterNameChanged(self):
+        """
+        L{Name.encode} encodes the current value of L{Name.name} even if the
+        name was encoded before it changed.
+        """
+        name = dns.Name(b"example.com")
+        name.encode(BytesIO())
+        name.name = b"example.org"
+        stream = BytesIO()
+        name.encode(stream)
+        self.assertEqual(b"\x07example\x03org\x00", stream.getvalue())
+
+
     def test_unknown(self):
         """
         A resource record of unknown type and class is parsed into an
@@ -889,6 +921,167 @@ class MessageTests(unittest.SynchronousTestCase):
         self.assertTrue(message.answers[0].auth)
 
 
+    def test_encodeMatchesToStr(self):
+        """
+        L{dns.Message.encode} writes the same bytes to a file as
+        L{dns.Message.toStr} returns, including the record lengths filled in
+        after each payload is written.
+        """
+        message = dns.Message(id=1, answer=1)
+        message.queries = [dns.Query(b'foo.bar', dns.MX)]
+        message.answers = [
+            dns.RRHeader(b'foo.bar', dns.MX,
+                         payload=dns.Record_MX(10, b'mail.foo.bar', ttl=0))]
+        stream = BytesIO()
+        message.encode(stream)
+        wire = message.toStr()
+        self.assertIsInstance(wire, bytes)
+        self.assertEqual(stream.getvalue(), wire)
+
+        decoded = dns.Message()
+        decoded.fromStr(wire)
+        self.assertEqual(decoded.answers, message.answers)
+
+
+    def _answerMessage(self, *answers):
+        """
+        Build the wire format of a message with one query for C{foo.bar} and
+        the given answers.
+
+        @param answers: The L{dns.RRHeader} instances to include.
+
+        @return: The encoded message.
+        @rtype: L{bytes}
+        """
+        message = dns.Message(id=1, answer=1)
+        message.queries = [dns.Query(b'foo.bar')]
+        message.answers = list(answers)
+        return message.toStr()
+
+
+    def test_sectionsDecodedOnAccess(self):
+        """
+        L{dns.Message.fromStr} decodes the header and queries immediately but
+        leaves the record sections undecoded until one of them is accessed.
+        """
+        wire = self._answerMessage(
+            dns.RRHeader(b'foo.bar', payload=dns.Record_A('1.2.3.4', ttl=0)))
+        message = dns.Message()
+        message.fromStr(wire)
+        self.assertEqual(message.queries, [dns.Query(b'foo.bar')])
+        self.assertNotIn('answers', vars(message))
+        self.assertEqual(
+            message.answers,
+            [dns.RRHeader(b'foo.bar',
+                          payload=dns.Record_A('1.2.3.4', ttl=0))])
+        self.assertEqual(message.authority, [])
+        self.assertEqual(message.additional, [])
+
+
+    def test_compressedNamesDecoded(self):
+        """
+        Names in the record sections which point back to earlier names in the
+        message are decoded to the full name.
+        """
+        wire = self._answerMessage(
+            dns.RRHeader(b'foo.bar', dns.CNAME,
+                         payload=dns.Record_CNAME(b'www.foo.bar', ttl=0)))
+        # The owner name should have been compressed to a two byte pointer to
+        # the query name.
+        self.assertIn(b'\xc0\x0c', wire)
+        message = dns.Message()
+        message.fromStr(wire)
+        self.assertEqual(message.answers[0].name, dns.Name(b'foo.bar'))
+        self.assertEqual(
+            message.answers[0].payload.name, dns.Name(b'www.foo.bar'))
+
+
+    def test_assignedSectionPreserved(self):
+        """
+        A section assigned after L{dns.Message.fromStr} but before it is
+        decoded is not replaced when another section is decoded.
+        """
+        wire = self._answerMessage(
+            dns.RRHeader(b'foo.bar', payload=dns.Record_A('1.2.3.4', ttl=0)))
+        message = dns.Message()
+        message.fromStr(wire)
+        message.answers = []
+        self.assertEqual(message.authority, [])
+        self.assertEqual(message.answers, [])
+
+
+    def test_truncatedSection(self):
+        """
+        If the message ends part way through a record, the records before it
+        are decoded and the remaining sections are left empty.
+        """
+        wire = self._answerMessage(
+            dns.RRHeader(b'foo.bar', payload=dns.Record_A('1.2.3.4', ttl=0)),
+            dns.RRHeader(b'foo.bar', payload=dns.Record_A('5.6.7.8', ttl=0)))
+        message = dns.Message()
+        message.fromStr(wire[:-2])
+        self.assertEqual(
+            message.answers,
+            [dns.RRHeader(b'foo.bar',
+                          payload=dns.Record_A('1.2.3.4', ttl=0))])
+        self.assertEqual(message.additional, [])
+
+
+    def test_compressionLoop(self):
+        """
+        L{dns._decodeName} raises L{ValueError} if compression pointers form
+        a loop instead of ending at a root label.
+        """
+        data = b'\x03foo\xc0\x00'
+        self.assertRaises(
+            ValueError, dns._decodeName, bytearray(data), data, 0)
+
+
+    def test_compressionLoopInSection(self):
+        """
+        L{dns.Message.fromStr} raises L{ValueError} right away if an owner
+        name in a record section contains a compression loop, even though the
+        section is not decoded yet.
+        """
+        wire = self._answerMessage(
+            dns.RRHeader(b'foo.bar', payload=dns.Record_A('1.2.3.4', ttl=0)))
+        # Make the owner name of the answer, which follows the 12 byte header
+        # and the 13 byte query, point to itself.
+        wire = wire[:25] + b'\xc0\x19' + wire[27:]
+        self.assertRaises(ValueError, dns.Message().fromStr, wire)
+
+
+    def test_undecodableRecord(self):
+        """
+        If a record cannot be decoded when the sections are, the exception
+        propagates, and afterwards every section is a L{list} holding the
+        records decoded before it.
+        """
+        class BrokenRecord(dns.UnknownRecord):
+            def decode(self, strio, length=None):
+                raise ValueError("Cannot decode this record")
+
+        class BrokenMessage(dns.Message):
+            def lookupRecordType(self, type):
+                if type == dns.MX:
+                    return BrokenRecord
+                return dns.Message.lookupRecordType(self, type)
+
+        wire = self._answerMessage(
+            dns.RRHeader(b'foo.bar', payload=dns.Record_A('1.2.3.4', ttl=0)),
+            dns.RRHeader(b'foo.bar', dns.MX,
+                         payload=dns.Record_MX(10, b'mx.foo.bar', ttl=0)))
+        message = BrokenMessage()
+        message.fromStr(wire)
+        self.assertRaises(ValueError, getattr, message, 'answers')
+        self.assertEqual(
+            message.answers,
+            [dns.RRHeader(b'foo.bar',
+                          payload=dns.Record_A('1.2.3.4', ttl=0))])
+        self.assertEqual(message.authority, [])
+        self.assertEqual(message.additional, [])
+
+
 
 class MessageComparisonTests(ComparisonTestsMixin,
                              unittest.SynchronousTestCase):
@@ -1224,6 +1417,29 @@ class DatagramProtocolTests(unittest.TestCase):
         return self.assertFailure(d, CannotListenError)
 
 
+    def test_malformedAnswer(self):
+        """
+        A response with a compression loop in its answer section is logged
+        and dropped, and the query stays outstanding.
+        """
+        d = self.proto.query(('127.0.0.1', 21345), [dns.Query(b'foo')])
+        [messageID] = self.proto.liveMessages.keys()
+        m = dns.Message(id=messageID, answer=1)
+        m.queries = [dns.Query(b'foo')]
+        m.answers = [dns.RRHeader(b'foo', payload=dns.Record_A('1.2.3.4'))]
+        wire = m.toStr()
+        # Make the owner name of the answer, which follows the 12 byte header
+        # and the 9 byte query, point to itself.
+        wire = wire[:21] + b'\xc0\x15' + wire[23:]
+
+        self.proto.datagramReceived(wire, ('127.0.0.1', 21345))
+        self.assertEqual(len(self.flushLoggedErrors(ValueError)), 1)
+        self.assertIn(messageID, self.proto.liveMessages)
+        self.assertNoResult(d)
+        self.clock.advance(10)
+        return self.assertFailure(d, dns.DNSQueryTimeoutError)
+
+
     def test_receiveMessageNotInLiveMessages(self):
         """
         When receiving a message whose id is not in
@@ -7,6 +7,7 @@ Test cases for twisted.names.
 
 from __future__ import absolute_import, division
 
+import os
 import socket
 import operator
 import copy
@@ -21,7 +22,7 @@ from twisted.internet import reactor, defer, error
 from twisted.internet.defer import succeed
 from twisted.names import client, server, common, authority, dns
 from twisted.names.dns import SOA, Message, RRHeader, Record_A, Record_SOA
-from twisted.names.error import DomainError
+from twisted.names.error import DomainError, DNSNotImplementedError
 from twisted.names.client import Resolver
 from twisted.names.secondary import (
     SecondaryAuthorityService, SecondaryAuthority)
@@ -535,6 +536,281 @@ class ResolvConfHandlingTests(unittest.TestCase):
 
 
 
+_SAMPLE_ZONE = b"""\
+$TTL 3600 ; one hour
+@   IN  SOA ns1 hostmaster (
+        2016120101  ; serial
+        7200        ; refresh
+        900         ; retry
+        1209600     ; expire
+        300 )       ; minimum
+    IN  NS  ns1.example.com.
+    IN  MX  10 mail.example.com.
+www 60  IN  A   10.0.0.1
+        IN  A   10.0.0.2
+$ORIGIN sub.example.com.
+host    A   10.0.1.1
+ipv6.example.com. IN 120 AAAA ::1
+"""
+
+
+
+class BindAuthorityTests(unittest.TestCase):
+    """
+    Tests for L{authority.BindAuthority}.
+    """
+    def loadZone(self, content=_SAMPLE_ZONE, name='example.com'):
+        """
+        Write C{content} to a zone file named after a zone.
+
+        @param name: The name of the zone.
+        @type name: L{str}
+
+        @return: The path of the zone file.
+        """
+        directory = self.mktemp()
+        os.mkdir(directory)
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+
+    def test_soa(self):
+        """
+        The I{SOA} record of the zone, including parenthesized continuation
+        lines with comments, is parsed into L{BindAuthority.soa}.
+        """
+        auth = authority.BindAuthority(self.loadZone())
+        name, soa = auth.soa
+        self.assertEqual(name, b'example.com')
+        self.assertEqual(
+            soa,
+            dns.Record_SOA(mname=b'ns1', rname=b'hostmaster',
+                           serial=2016120101, refresh=7200, retry=900,
+                           expire=1209600, minimum=300, ttl=3600))
+
+
+    def test_records(self):
+        """
+        Relative owner names are qualified with the current origin, blank
+        owner names reuse the previous owner, and the TTL and class fields
+        may appear in either order.
+        """
+        auth = authority.BindAuthority(self.loadZone())
+        self.assertEqual(
+            auth.records[b'example.com'][1:],
+            [dns.Record_NS(b'ns1.example.com.', ttl=3600),
+             dns.Record_MX(10, b'mail.example.com.', ttl=3600)])
+        self.assertEqual(
+            auth.records[b'www.example.com'],
+            [dns.Record_A(b'10.0.0.1', ttl=60),
+             dns.Record_A(b'10.0.0.2', ttl=3600)])
+        self.assertEqual(
+            auth.records[b'host.sub.example.com'],
+            [dns.Record_A(b'10.0.1.1', ttl=3600)])
+        self.assertEqual(
+            auth.records[b'ipv6.example.com'],
+            [dns.Record_AAAA(b'::1', ttl=120)])
+
+
+    def test_origin(self):
+        """
+        L{BindAuthority.origin} is the name of the zone file, even if the
+        file changes the origin with C{$ORIGIN}.
+        """
+        auth = authority.BindAuthority(self.loadZone())
+        self.assertEqual(auth.origin, b'example.com.')
+
+
+    def test_numericOwner(self):
+        """
+        The first field of a line which is not indented is its owner name,
+        even if it looks like a TTL, as the labels of a reverse zone do.
+        """
+        auth = authority.BindAuthority(self.loadZone(
+            b'@ IN SOA ns1.example.com. hostmaster.example.com. 1 2 3 4 5\n'
+            b'1 IN PTR host1.example.com.\n'
+            b'2 60 IN PTR host2.example.com.\n'
+            b'  120 PTR alias2.example.com.\n',
+            name='1.168.192.in-addr.arpa'))
+        self.assertEqual(
+            [record.TYPE for record in auth.records[
+                b'1.168.192.in-addr.arpa']],
+            [dns.SOA])
+        self.assertEqual(
+            auth.records[b'1.1.168.192.in-addr.arpa'],
+            [dns.Record_PTR(b'host1.example.com.', ttl=60 * 60 * 3)])
+        self.assertEqual(
+            auth.records[b'2.1.168.192.in-addr.arpa'],
+            [dns.Record_PTR(b'host2.example.com.', ttl=60),
+             dns.Record_PTR(b'alias2.example.com.', ttl=120)])
+
+
+    def test_parseRecordLine(self):
+        """
+        L{BindAuthority.parseRecordLine}, which is given a line already split
+        into fields, takes a first field which could be a TTL, class or type
+        to be one, so that the record is added to the origin.
+        """
+        auth = authority.BindAuthority(self.loadZone())
+        auth.parseRecordLine(b'example.com.', 300, [b'60', b'A', b'10.0.0.9'])
+        self.assertEqual(
+            auth.records[b'example.com'][-1],
+            dns.Record_A(b'10.0.0.9', ttl=60))
+
+
+    def test_addRecord(self):
+        """
+        L{BindAuthority.addRecord} adds a record, qualifying a relative name
+        with the given origin.
+        """
+        auth = authority.BindAuthority(self.loadZone())
+        auth.addRecord(b'example.com', 60, b'A', b'new', b'IN', [b'10.0.0.4'])
+        auth.addRecord(b'example.com.', 60, b'A', b'other.example.org.',
+                       b'IN', [b'10.0.0.5'])
+        self.assertEqual(
+            auth.records[b'new.example.com'],
+            [dns.Record_A(b'10.0.0.4', ttl=60)])
+        self.assertEqual(
+            auth.records[b'other.example.org'],
+            [dns.Record_A(b'10.0.0.5', ttl=60)])
+        self.assertRaises(
+            NotImplementedError, auth.addRecord,
+            b'example.com.', 60, b'A', b'new', b'CH', [b'10.0.0.4'])
+
+
+    def test_classIN(self):
+        """
+        L{BindAuthority.class_IN} adds an I{IN} record with an absolute owner
+        name, and an I{SOA} record replaces the authority's
+        L{BindAuthority.soa}.
+        """
+        auth = authority.BindAuthority(self.loadZone())
+        auth.class_IN(60, b'MX', b'Example.com', [b'20', b'mx2.example.com.'])
+        auth.class_IN(60, b'SOA', b'example.com',
+                      [b'ns2', b'hostmaster', b'7', b'1', b'2', b'3', b'4'])
+        self.assertEqual(
+            auth.records[b'example.com'][-2],
+            dns.Record_MX(20, b'mx2.example.com.', ttl=60))
+        self.assertEqual(auth.soa[1].serial, 7)
+        self.assertRaises(
+            NotImplementedError, auth.class_IN, 60, b'BOGUS', b'x', [])
+
+
+    def test_lookup(self):
+        """
+        Records loaded from a zone file are served by the authority.
+        """
+        auth = authority.BindAuthority(self.loadZone())
+        d = auth.lookupAddress(b'www.example.com')
+        d.addCallback(justPayload)
+        d.addCallback(
+            self.assertEqual,
+            [dns.Record_A(b'10.0.0.1', ttl=60),
+             dns.Record_A(b'10.0.0.2', ttl=3600)])
+        return d
+
+
+    def test_unsupportedDirective(self):
+        """
+        L{NotImplementedError} is raised for C{$INCLUDE} directives.
+        """
+        path = self.loadZone(b'$INCLUDE other.zone\n')
+        self.assertRaises(NotImplementedError, authority.BindAuthority, path)
+
+
+    def test_missingRecordData(self):
+        """
+        L{ValueError} naming the zone file and line is raised for a record
+        with too few data fields for its type.
+        """
+        path = self.loadZone(b'@ IN NS ns1\nwww IN A\n')
+        e = self.assertRaises(ValueError, authority.BindAuthority, path)
+        self.assertEqual(
+            str(e),
+            "%s, line 2: A record for www.example.com has 0 data fields: ''"
+            % (path,))
+
+
+    def test_extraRecordData(self):
+        """
+        L{ValueError} is raised for a record with too many data fields for
+        its type.
+        """
+        path = self.loadZone(b'www IN A 10.0.0.1 10.0.0.2\n')
+        self.assertRaises(ValueError, authority.BindAuthority, path)
+
+
+    def test_missingType(self):
+        """
+        L{ValueError} is raised for a record without a type.
+        """
+        path = self.loadZone(b'www 60 IN\n')
+        self.assertRaises(ValueError, authority.BindAuthority, path)
+
+
+    def test_unsupportedType(self):
+        """
+        L{NotImplementedError} is raised for records of unknown types.
+        """
+        path = self.loadZone(b'@ IN BOGUS 1 2 3\n')
+        self.assertRaises(NotImplementedError, authority.BindAuthority, path)
+
+
+    def test_progress(self):
+        """
+        The C{progress} callable passed to L{BindAuthority.loadFile} is
+        called every L{BindAuthority.progressInterval} lines and once more
+        when the whole file has been parsed.
+        """
+        path = self.loadZone()
+        auth = authority.BindAuthority(path)
+        auth.progressInterval = 5
+        calls = []
+        auth.loadFile(path, lambda *args: calls.append(args))
+        size = len(_SAMPLE_ZONE)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(calls[-1], (size, size))
+        self.assertTrue(0 < calls[0][0] < calls[1][0] < size)
+
+
+    def test_loadFileInThread(self):
+        """
+        L{BindAuthority.loadFileInThread} parses the zone file in a thread
+        and replaces the records of the authority once it is done.
+        """
+        auth = authority.BindAuthority(self.loadZone())
+        path = self.loadZone(
+            b'@ IN SOA ns1 hostmaster 2 3 4 5 6\n'
+            b'www IN A 10.0.0.3\n')
+        d = auth.loadFileInThread(path)
+
+        def loaded(result):
+            self.assertIsNone(result)
+            self.assertEqual(auth.soa[1].serial, 2)
+            self.assertEqual(
+                auth.records[b'www.example.com'],
+                [dns.Record_A(b'10.0.0.3', ttl=60 * 60 * 3)])
+        d.addCallback(loaded)
+        return d
+
+
+    def test_loadFileInThreadFailure(self):
+        """
+        If the zone file given to L{BindAuthority.loadFileInThread} cannot be
+        parsed, the L{Deferred} it returns fails and the records of the
+        authority are left untouched.
+        """
+        auth = authority.BindAuthority(self.loadZone())
+        records = auth.records
+        d = auth.loadFileInThread(self.loadZone(b'@ IN BOGUS 1\n'))
+        d = self.assertFailure(d, NotImplementedError)
+        d.addCallback(lambda ignored: self.assertIs(auth.records, records))
+        return d
+
+
+
 class AuthorityTests(unittest.TestCase):
     """
     Tests for the basic response record selection code in L{FileAuthority}
@@ -1035,6 +1311,244 @@ class SecondaryAuthorityTests(unittest.TestCase):
         data = answer.toStr()
         proto.dataReceived(pack('!H', len(data)) + data)
 
-        result = self.successResultOf(secondary.lookupAddress('example.com'))
+        result = self.successResultOf(
+            secondary.lookupAddress(b'example.com'))
         self.assertEqual((
                 [RRHeader(b'example.com', payload=a, auth=True)], [], []), result)
+
+
+    def _transferResponse(self, reactor, *answers, **kwargs):
+        """
+        Answer the zone transfer request made over the most recent TCP
+        connection attempt to C{reactor}.
+
+        @param answers: The L{RRHeader} instances to answer with.
+
+        @param kwargs: Extra keyword arguments for the response L{Message}.
+
+        @return: The request L{Message}.
+        """
+        host, port, factory, timeout, bindAddress = reactor.tcpClients.pop(0)
+        proto = factory.buildProtocol((host, port))
+        proto.makeConnection(StringTransport())
+
+        request = Message()
+        request.decode(BytesIO(proto.transport.value()[2:]))
+
+        response = Message(id=request.id, answer=1, auth=1, **kwargs)
+        response.answers.extend(answers)
+        data = response.toStr()
+        proto.dataReceived(pack('!H', len(data)) + data)
+        return request
+
+
+    def _soa(self, serial):
+        """
+        @return: An L{RRHeader} for the I{SOA} record of I{example.com} with
+            the given serial number.
+        """
+        return RRHeader(
+            b'example.com', type=SOA, ttl=3600,
+            payload=Record_SOA(
+                mname=b'ns1.example.com', rname=b'admin.example.com',
+                serial=serial, refresh=300, retry=60, expire=7200,
+                minimum=300, ttl=3600))
+
+
+    def _transferredSecondary(self):
+        """
+        @return: A L{SecondaryAuthority} for I{example.com} and a
+            L{MemoryReactorClock}, after a full transfer of a zone with two
+            address records and serial number 1.
+        """
+        secondary = SecondaryAuthority.fromServerAddressAndDomain(
+            ('192.168.1.2', 1234), b'example.com')
+        secondary._reactor = reactor = MemoryReactorClock()
+        d = secondary.refresh()
+        self._transferResponse(
+            reactor,
+            self._soa(1),
+            RRHeader(b'www.example.com', ttl=60,
+                     payload=Record_A(b'10.0.0.1', ttl=60)),
+            RRHeader(b'www.example.com', ttl=60,
+                     payload=Record_A(b'10.0.0.2', ttl=60)),
+            self._soa(1))
+        self.successResultOf(d)
+        return secondary, reactor
+
+
+    def test_refreshRequestsIncrementalTransfer(self):
+        """
+        Once a version of the zone has been transferred,
+        L{SecondaryAuthority.refresh} requests an incremental transfer which
+        carries the current I{SOA} record in its authority section.
+        """
+        secondary, reactor = self._transferredSecondary()
+        secondary.refresh()
+        request = self._transferResponse(reactor, self._soa(1))
+        self.assertEqual(
+            [dns.Query(b'example.com', dns.IXFR, dns.IN)], request.queries)
+        self.assertEqual(
+            [self._soa(1).payload.serial],
+            [rr.payload.serial for rr in request.authority])
+
+
+    def test_updateDuringRefresh(self):
+        """
+        L{SecondaryAuthority.update} and L{SecondaryAuthority.transfer}
+        return a L{Deferred} which has already fired, and do not start another
+        transfer, while a refresh is in progress.
+        """
+        secondary, reactor = self._transferredSecondary()
+        d = secondary.refresh()
+        self.assertIsNone(self.successResultOf(secondary.update()))
+        self.assertIsNone(self.successResultOf(secondary.transfer()))
+        self.assertEqual(len(reactor.tcpClients), 1)
+        self.assertTrue(secondary.transferring)
+
+        self._transferResponse(reactor, self._soa(1))
+        self.successResultOf(d)
+        self.assertFalse(secondary.transferring)
+
+
+    def test_refreshUpToDate(self):
+        """
+        If the primary answers an incremental transfer request with the
+        current I{SOA} record only, the records are left alone.
+        """
+        secondary, reactor = self._transferredSecondary()
+        records = secondary.records
+        d = secondary.refresh()
+        self._transferResponse(reactor, self._soa(1))
+        self.successResultOf(d)
+        self.assertIs(records, secondary.records)
+        self.assertEqual(1, secondary.soa[1].serial)
+        self.assertFalse(secondary.transferring)
+
+
+    def test_refreshIncremental(self):
+        """
+        The differences sent in response to an incremental transfer request
+        are applied to the records of the authority.
+        """
+        secondary, reactor = self._transferredSecondary()
+        d = secondary.refresh()
+        self._transferResponse(
+            reactor,
+            self._soa(3),
+            self._soa(1),
+            RRHeader(b'www.example.com', ttl=60,
+                     payload=Record_A(b'10.0.0.1', ttl=60)),
+            self._soa(2),
+            RRHeader(b'www.example.com', ttl=60,
+                     payload=Record_A(b'10.0.0.3', ttl=60)),
+            self._soa(2),
+            RRHeader(b'www.example.com', ttl=60,
+                     payload=Record_A(b'10.0.0.2', ttl=60)),
+            self._soa(3),
+            RRHeader(b'mail.example.com', ttl=60,
+                     payload=Record_A(b'10.0.0.4', ttl=60)),
+            self._soa(3))
+        self.successResultOf(d)
+
+        self.assertEqual(3, secondary.soa[1].serial)
+        result = self.successResultOf(
+            secondary.lookupAddress(b'www.example.com'))
+        self.assertEqual([Record_A(b'10.0.0.3', ttl=60)], justPayload(result))
+        result = self.successResultOf(
+            secondary.lookupAddress(b'mail.example.com'))
+        self.assertEqual([Record_A(b'10.0.0.4', ttl=60)], justPayload(result))
+
+
+    def test_refreshIncrementalFullZone(self):
+        """
+        If the primary answers an incremental transfer request with the whole
+        zone, the records of the authority are replaced.
+        """
+        secondary, reactor = self._transferredSecondary()
+        d = secondary.refresh()
+        self._transferResponse(
+            reactor,
+            self._soa(2),
+            RRHeader(b'ftp.example.com', ttl=60,
+                     payload=Record_A(b'10.0.0.5', ttl=60)),
+            self._soa(2))
+        self.successResultOf(d)
+
+        self.assertEqual(2, secondary.soa[1].serial)
+        self.assertNotIn(b'www.example.com', secondary.records)
+        result = self.successResultOf(
+            secondary.lookupAddress(b'ftp.example.com'))
+        self.assertEqual([Record_A(b'10.0.0.5', ttl=60)], justPayload(result))
+
+
+    def test_refreshFallsBackToFullTransfer(self):
+        """
+        If the primary refuses the incremental transfer, the whole zone is
+        transferred instead.
+        """
+        secondary, reactor = self._transferredSecondary()
+        d = secondary.refresh()
+        self._transferResponse(reactor, rCode=dns.ENOTIMP)
+        request = self._transferResponse(
+            reactor,
+            self._soa(2),
+            RRHeader(b'ftp.example.com', ttl=60,
+                     payload=Record_A(b'10.0.0.5', ttl=60)),
+            self._soa(2))
+        self.successResultOf(d)
+
+        self.assertEqual(
+            [dns.Query(b'example.com', dns.AXFR, dns.IN)], request.queries)
+        self.assertEqual(2, secondary.soa[1].serial)
+        self.assertEqual(
+            1, len(self.flushLoggedErrors(DNSNotImplementedError)))
+
+
+    def test_refreshIncrementalInconsistent(self):
+        """
+        If the differences sent by the primary delete a record the authority
+        does not have, the records are left alone and the whole zone is
+        transferred instead.
+        """
+        secondary, reactor = self._transferredSecondary()
+        d = secondary.refresh()
+        self._transferResponse(
+            reactor,
+            self._soa(2),
+            self._soa(1),
+            RRHeader(b'www.example.com', ttl=60,
+                     payload=Record_A(b'10.0.0.9', ttl=60)),
+            self._soa(2),
+            RRHeader(b'www.example.com', ttl=60,
+                     payload=Record_A(b'10.0.0.3', ttl=60)),
+            self._soa(2))
+        self.assertEqual(1, secondary.soa[1].serial)
+        self.assertEqual(1, len(self.flushLoggedErrors(ValueError)))
+
+        self._transferResponse(reactor, self._soa(2), self._soa(2))
+        self.successResultOf(d)
+        self.assertEqual(2, secondary.soa[1].serial)
+
+
+    def test_periodicRefresh(self):
+        """
+        L{SecondaryAuthorityService} refreshes its zones as often as their
+        I{SOA} records request and stops when the service stops.
+        """
+        service = SecondaryAuthorityService.fromServerAddressAndDomains(
+            ('192.168.1.2', 1234), [b'example.com'])
+        secondary = service.domains[0]
+        secondary._reactor = reactor = MemoryReactorClock()
+
+        service.startService()
+        reactor.advance(0)
+        self._transferResponse(reactor, self._soa(1), self._soa(1))
+        reactor.advance(self._soa(1).payload.refresh - 1)
+        self.assertEqual([], reactor.tcpClients)
+        reactor.advance(1)
+        self.assertEqual(1, len(reactor.tcpClients))
+
+        service.stopService()
+        self._transferResponse(reactor, self._soa(1))
+        self.assertEqual([], reactor.getDelayedCalls())
@@ -10,7 +10,7 @@ from zope.interface.verify import verifyClass
 
 from twisted.internet import defer
 from twisted.internet.interfaces import IProtocolFactory
-from twisted.names import dns, error, resolve, server
+from twisted.names import dns, error, resolve, secondary, server
 from twisted.python import failure, log
 from twisted.trial import unittest
 
@@ -1236,6 +1236,54 @@ class DNSServerFactoryTests(unittest.TestCase):
             address=('::1', 53))
 
 
+    def _notifySecondary(self, address):
+        """
+        Send a notify message for I{example.com} from C{address} to a
+        L{server.DNSServerFactory} with a secondary authority for that zone
+        whose primary is C{192.168.1.2}.
+
+        @return: A two-tuple of the response message and the number of times
+            the secondary authority was refreshed.
+        """
+        refreshes = []
+        authority = secondary.SecondaryAuthority('192.168.1.2', b'example.com')
+        authority.refresh = lambda: refreshes.append(None) or defer.succeed(None)
+        f = server.DNSServerFactory(
+            authorities=[resolve.ResolverChain([authority])])
+        notify = dns.Message(opCode=dns.OP_NOTIFY)
+        notify.queries = [dns.Query(b'example.com', dns.SOA)]
+        e = self.assertRaises(
+            RaisingProtocol.WriteMessageArguments,
+            f.handleNotify,
+            message=notify, protocol=RaisingProtocol(), address=address)
+        (message, address), kwargs = e.args
+        return message, len(refreshes)
+
+
+    def test_handleNotifySecondary(self):
+        """
+        L{server.DNSServerFactory.handleNotify} refreshes the secondary
+        authorities for the zone named in the message if it comes from their
+        primary, and sends a response with C{rCode} set to L{dns.OK}.
+        """
+        message, refreshes = self._notifySecondary(('192.168.1.2', 53))
+        self.assertEqual(1, refreshes)
+        self.assertEqual(dns.OK, message.rCode)
+        self.assertTrue(message.answer)
+        self.assertEqual(
+            [dns.Query(b'example.com', dns.SOA)], message.queries)
+
+
+    def test_handleNotifySecondaryOtherSource(self):
+        """
+        L{server.DNSServerFactory.handleNotify} refuses notify messages which
+        do not come from the primary of the secondary authority.
+        """
+        message, refreshes = self._notifySecondary(('192.168.1.3', 53))
+        self.assertEqual(0, refreshes)
+        self.assertEqual(dns.EREFUSED, message.rCode)
+
+
     def test_handleOther(self):
         """
         L{server.DNSServerFactory.handleOther} triggers the sending of a
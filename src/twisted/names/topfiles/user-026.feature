@@ -0,0 +1 @@
+twisted.names.authority.BindAuthority now parses zone files in a single pass, one line at a time, can report its progress, can parse in the reactor's thread pool with the new loadFileInThread method, and rejects records with the wrong number of data fields.
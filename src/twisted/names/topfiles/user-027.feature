@@ -0,0 +1 @@
+twisted.names.secondary.SecondaryAuthority now refreshes zones with incremental zone transfers (RFC 1995) using the new twisted.names.client.Resolver.lookupIncrementalZone, schedules refreshes from the zone's SOA record, and is refreshed when twisted.names.server.DNSServerFactory receives a NOTIFY (RFC 1996) from its primary.
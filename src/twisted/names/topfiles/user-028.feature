@@ -0,0 +1 @@
+twisted.names.client.Resolver now queries the nameservers which answer fastest first and bases its first retransmission timeout on their round trip times.  The new shareDatagramPorts argument sends all queries to a nameserver from one UDP port, which the new Resolver.closeDatagramPorts method closes.
@@ -0,0 +1 @@
+twisted.names.dns.Message.fromStr is faster; the answer, authority and additional sections of a received message are decoded when they are first used.
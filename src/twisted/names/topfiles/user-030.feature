@@ -0,0 +1 @@
+twisted.names.dns.Message.toStr and twisted.names.dns.Name.encode are faster.
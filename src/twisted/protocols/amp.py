@@ -148,7 +148,8 @@ be generated and any ordering must be accepted.  This applies to the
 command-related keys I{_command} and I{_ask} as well as any other keys.
 
 Values are limited to the maximum encodable size in a 16-bit length, 65535
-bytes.
+bytes.  The L{BigString} and L{BigUnicode} argument types carry longer values
+by splitting them across several keys.
 
 Keys are limited to the maximum encodable size in a 8-bit length, 255 bytes.
 Note that we still use 2-byte lengths to encode keys.  This small redundancy
@@ -199,6 +200,7 @@ __metaclass__ = type
 
 import types, warnings
 
+from collections import deque
 from io import BytesIO
 from struct import pack
 import decimal, datetime
@@ -248,6 +250,8 @@ __all__ = [
     'AmpList',
     'Argument',
     'BadLocalReturn',
+    'BigString',
+    'BigUnicode',
     'BinaryBoxProtocol',
     'Boolean',
     'Box',
@@ -272,6 +276,7 @@ __all__ = [
     'MAX_KEY_LENGTH',
     'MAX_VALUE_LENGTH',
     'MalformedAmpBox',
+    'MultiplexedAMP',
     'NoEmptyBoxes',
     'OnlyOneTLS',
     'PROTOCOL_ERRORS',
@@ -309,6 +314,9 @@ UNHANDLED_ERROR_CODE = b'UNHANDLED'
 MAX_KEY_LENGTH = 0xff
 MAX_VALUE_LENGTH = 0xffff
 
+# The encoded lengths of all keys, and of short values.
+_shortLengths = [pack("!H", length) for length in range(MAX_KEY_LENGTH + 1)]
+
 
 
 class IArgumentType(Interface):
@@ -686,23 +694,30 @@ class AmpBox(dict):
         @return: a C{bytes} encoded according to the rules described in the
             module docstring.
         """
-        i = sorted(iteritems(self))
         L = []
         w = L.append
-        for k, v in i:
-            if type(k) == unicode:
-                raise TypeError("Unicode key not allowed: %r" % k)
-            if type(v) == unicode:
-                raise TypeError(
-                    "Unicode value for key %r not allowed: %r" % (k, v))
-            if len(k) > MAX_KEY_LENGTH:
-                raise TooLong(True, True, k, None)
-            if len(v) > MAX_VALUE_LENGTH:
+        lengths = _shortLengths
+        for k, v in sorted(iteritems(self)):
+            valueLength = len(v)
+            if (type(k) is unicode or type(v) is unicode or
+                    len(k) > MAX_KEY_LENGTH or
+                    valueLength > MAX_VALUE_LENGTH):
+                if type(k) == unicode:
+                    raise TypeError("Unicode key not allowed: %r" % k)
+                if type(v) == unicode:
+                    raise TypeError(
+                        "Unicode value for key %r not allowed: %r" % (k, v))
+                if len(k) > MAX_KEY_LENGTH:
+                    raise TooLong(True, True, k, None)
                 raise TooLong(False, True, v, k)
-            for kv in k, v:
-                w(pack("!H", len(kv)))
-                w(kv)
-        w(pack("!H", 0))
+            w(lengths[len(k)])
+            w(k)
+            if valueLength <= MAX_KEY_LENGTH:
+                w(lengths[valueLength])
+            else:
+                w(pack("!H", valueLength))
+            w(v)
+        w(lengths[0])
         return b''.join(L)
 
 
@@ -1549,6 +1564,82 @@ class Path(Unicode):
 
 
 
+class BigString(String):
+    """
+    Pass through byte strings which may be longer than L{MAX_VALUE_LENGTH}.
+
+    A value which fits in one AMP value is sent exactly as a L{String} would
+    send it, so short values can be exchanged with peers which declare the
+    argument as a L{String}.  A longer value is split into chunks of at most
+    L{MAX_VALUE_LENGTH} bytes, sent under the keys C{name.1}, C{name.2} and
+    so on, and joined back into a single string when it is received.  A peer
+    which does not know about this encoding rejects such a box as missing the
+    argument, rather than silently receiving part of the value.
+    """
+
+    def _chunkKey(self, name, index):
+        return name + b'.' + intToBytes(index)
+
+
+    def fromBox(self, name, strings, objects, proto):
+        """
+        Populate C{objects} with the value for C{name}, joining its chunks if
+        it was split.
+        """
+        value = strings.pop(name, None)
+        if value is None:
+            chunks = []
+            while True:
+                chunk = strings.pop(
+                    self._chunkKey(name, len(chunks) + 1), None)
+                if chunk is None:
+                    break
+                chunks.append(chunk)
+            if chunks:
+                value = b''.join(chunks)
+            elif not self.optional:
+                raise KeyError(name)
+        nk = _wireNameToPythonIdentifier(name)
+        if value is None:
+            objects[nk] = None
+        else:
+            objects[nk] = self.fromStringProto(value, proto)
+
+
+    def toBox(self, name, strings, objects, proto):
+        """
+        Populate C{strings} with the value for C{name}, splitting it into
+        chunks if it is longer than L{MAX_VALUE_LENGTH}.
+        """
+        obj = self.retrieve(objects, _wireNameToPythonIdentifier(name), proto)
+        if self.optional and obj is None:
+            return
+        value = self.toStringProto(obj, proto)
+        if len(value) <= MAX_VALUE_LENGTH:
+            strings[name] = value
+            return
+        for index, offset in enumerate(
+                range(0, len(value), MAX_VALUE_LENGTH)):
+            strings[self._chunkKey(name, index + 1)] = value[
+                offset:offset + MAX_VALUE_LENGTH]
+
+
+
+class BigUnicode(BigString):
+    """
+    Encode a unicode string on the wire as UTF-8, splitting it as
+    L{BigString} does if it is longer than L{MAX_VALUE_LENGTH} bytes.
+    """
+
+    def toString(self, inObject):
+        return BigString.toString(self, inObject.encode('utf-8'))
+
+
+    def fromString(self, inString):
+        return BigString.fromString(self, inString).decode('utf-8')
+
+
+
 class ListOf(Argument):
     """
     Encode and decode lists of instances of a single other argument type.
@@ -1853,17 +1944,35 @@ class Command:
         @raise InvalidSignature: if you forgot any required arguments.
         """
         self.structured = kw
-        forgotten = []
-        for name, arg in self.arguments:
-            pythonName = _wireNameToPythonIdentifier(name)
-            if pythonName not in self.structured and not arg.optional:
-                forgotten.append(pythonName)
+        forgotten = [
+            pythonName
+            for pythonName in self._compiled('arguments').requiredNames
+            if pythonName not in kw]
         if forgotten:
             raise InvalidSignature("forgot %s for %s" % (
                 ', '.join(forgotten), self.commandName))
         forgotten = []
 
 
+    def _compiled(cls, attribute):
+        """
+        Get the L{_CompiledArguments} for this L{Command}'s argument or
+        response schema, preparing it again if the schema has been replaced.
+
+        @param attribute: C{'arguments'} or C{'response'}.
+
+        @rtype: L{_CompiledArguments}
+        """
+        arglist = getattr(cls, attribute)
+        cacheName = '_compiled_' + attribute
+        compiled = cls.__dict__.get(cacheName)
+        if compiled is None or compiled.arglist is not arglist:
+            compiled = _CompiledArguments(arglist)
+            setattr(cls, cacheName, compiled)
+        return compiled
+    _compiled = classmethod(_compiled)
+
+
     def makeResponse(cls, objects, proto):
         """
         Serialize a mapping of arguments using this L{Command}'s
@@ -1881,7 +1990,8 @@ class Command:
             responseType = cls.responseType()
         except:
             return fail()
-        return _objectsToStrings(objects, cls.response, responseType, proto)
+        return cls._compiled('response').toStrings(
+            objects, responseType, proto)
     makeResponse = classmethod(makeResponse)
 
 
@@ -1898,16 +2008,13 @@ class Command:
 
         @return: An instance of this L{Command}'s C{commandType}.
         """
-        allowedNames = set()
-        for (argName, ignored) in cls.arguments:
-            allowedNames.add(_wireNameToPythonIdentifier(argName))
-
+        compiled = cls._compiled('arguments')
+        allowedNames = compiled.pythonNames
         for intendedArg in objects:
             if intendedArg not in allowedNames:
                 raise InvalidSignature(
                     "%s is not a valid argument" % (intendedArg,))
-        return _objectsToStrings(objects, cls.arguments, cls.commandType(),
-                                 proto)
+        return compiled.toStrings(objects, cls.commandType(), proto)
     makeArguments = classmethod(makeArguments)
 
 
@@ -1923,7 +2030,7 @@ class Command:
         @return: A mapping of response-argument names to the parsed
         forms.
         """
-        return _stringsToObjects(box, cls.response, protocol)
+        return cls._compiled('response').toObjects(box, protocol)
     parseResponse = classmethod(parseResponse)
 
 
@@ -1938,7 +2045,7 @@ class Command:
 
         @return: A mapping of argument names to the parsed forms.
         """
-        return _stringsToObjects(box, cls.arguments, protocol)
+        return cls._compiled('arguments').toObjects(box, protocol)
     parseArguments = classmethod(parseArguments)
 
 
@@ -2323,6 +2430,12 @@ class BinaryBoxProtocol(StatefulStringProtocol, Int16StringReceiver,
 
     _keyLengthLimitExceeded = False
 
+    # While batching, the serialized boxes not yet written and the delayed
+    # call which will write them.
+    _batch = None
+    _batchCall = None
+    _batchClock = None
+
     hostCertificate = None
     noPeerCertificate = False   # for tests
     innerProtocol = None
@@ -2345,6 +2458,7 @@ class BinaryBoxProtocol(StatefulStringProtocol, Int16StringReceiver,
             L{twisted.internet.protocol.ClientFactory.clientConnectionLost}
             notification to.
         """
+        self.flushBatch()
         # All the data that Int16Receiver has not yet dealt with belongs to our
         # new protocol: luckily it's keeping that in a handy (although
         # ostensibly internal) variable for us:
@@ -2367,7 +2481,8 @@ class BinaryBoxProtocol(StatefulStringProtocol, Int16StringReceiver,
         """
         Send a amp.Box to my peer.
 
-        Note: transport.write is never called outside of this method.
+        Note: transport.write is never called outside of this method and
+        L{flushBatch}.
 
         @param box: an AmpBox.
 
@@ -2382,8 +2497,64 @@ class BinaryBoxProtocol(StatefulStringProtocol, Int16StringReceiver,
             raise ConnectionLost()
         if self._startingTLSBuffer is not None:
             self._startingTLSBuffer.append(box)
+        elif self._batch is not None and box.__class__ is AmpBox:
+            self._batch.append(box.serialize())
+            if self._batchCall is None:
+                self._batchCall = self._batchClock.callLater(
+                    0, self.flushBatch)
         else:
-            self.transport.write(box.serialize())
+            # Other kinds of box may change the connection once they are
+            # sent, so everything before them must be written first.
+            data = box.serialize()
+            self.flushBatch()
+            self.transport.write(data)
+
+
+    def startBatching(self, clock=None):
+        """
+        Collect the boxes sent during one reactor iteration and write them
+        to the transport with a single C{writeSequence} call.
+
+        @param clock: The reactor used to schedule writes, defaulting to the
+            global reactor.
+        @type clock: L{twisted.internet.interfaces.IReactorTime}
+        """
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self._batchClock = clock
+        if self._batch is None:
+            self._batch = []
+
+
+    def stopBatching(self):
+        """
+        Write any boxes in the current batch, and write boxes as they are
+        sent from now on.
+        """
+        self.flushBatch()
+        self._batch = None
+
+
+    def flushBatch(self):
+        """
+        Write the boxes in the current batch to the transport now.
+        """
+        if self._batchCall is not None:
+            if self._batchCall.active():
+                self._batchCall.cancel()
+            self._batchCall = None
+        if self._batch:
+            batch, self._batch = self._batch, []
+            self.transport.writeSequence(batch)
+
+
+    def _sendFileDescriptor(self, descriptor):
+        """
+        Write the current batch before sending C{descriptor}, so that
+        descriptors and boxes are sent in the order they were produced.
+        """
+        self.flushBatch()
+        return _DescriptorExchanger._sendFileDescriptor(self, descriptor)
 
 
     def makeConnection(self, transport):
@@ -2415,6 +2586,11 @@ class BinaryBoxProtocol(StatefulStringProtocol, Int16StringReceiver,
         """
         The connection was lost; notify any nested protocol.
         """
+        if self._batchCall is not None:
+            if self._batchCall.active():
+                self._batchCall.cancel()
+            self._batchCall = None
+        self._batch = None
         if self.innerProtocol is not None:
             self.innerProtocol.connectionLost(reason)
             if self.innerProtocolClientFactory is not None:
@@ -2532,6 +2708,7 @@ class BinaryBoxProtocol(StatefulStringProtocol, Int16StringReceiver,
         @param verifyAuthorities: L{twisted.internet.ssl.Certificate} instances
         representing certificate authorities which will verify our peer.
         """
+        self.flushBatch()
         self.hostCertificate = certificate
         self._justStartedTLS = True
         if verifyAuthorities is None:
@@ -2664,6 +2841,332 @@ class AMP(BinaryBoxProtocol, BoxDispatcher,
 
 
 
+class _StartMultiplexing(Command):
+    """
+    Ask the peer to accept boxes sent over L{MultiplexedAMP} channels.
+
+    A peer which does not understand this command answers it with an
+    L{UnhandledCommand} error, and the connection stays plain AMP.
+
+    The C{window} argument and response give the number of bytes each
+    channel of the other side may send before it is granted more credit.
+    """
+    arguments = [(b'window', Integer())]
+    response = [(b'window', Integer())]
+
+
+
+# The keys of the boxes which carry channel traffic.
+_MUX_CHANNEL = b'_mux'
+_MUX_DATA = b'_mux_data'
+_MUX_CREDIT = b'_mux_credit'
+
+
+
+@implementer(IBoxSender)
+class _Channel(BoxDispatcher):
+    """
+    A logical connection multiplexed over a L{MultiplexedAMP} connection.
+
+    I am a L{BoxDispatcher} whose commands are dispatched to the
+    connection's responders.  The boxes I send are queued, and sent to the
+    channel of the same name on the peer in fragments, as the connection's
+    scheduler and my credit allow.
+
+    @ivar protocol: The connection I am multiplexed over.
+    @type protocol: L{MultiplexedAMP}
+
+    @ivar name: My name, which is the same on both sides of the connection.
+    @type name: L{bytes}
+
+    @ivar credit: The number of bytes I may send before the peer grants
+        more.
+    @type credit: L{int}
+    """
+
+    def __init__(self, protocol, name, credit):
+        BoxDispatcher.__init__(self, protocol)
+        self.protocol = protocol
+        self.name = name
+        self.credit = credit
+        # A QuitBox sent over a channel closes the connection through this.
+        self.transport = self
+        self._outgoing = deque()
+        self._offset = 0
+        self._received = 0
+        self._parser = BinaryBoxProtocol(self)
+        self._parser.transport = protocol.transport
+        self.startReceivingBoxes(self)
+
+
+    def __repr__(self):
+        return '<%s %r of %r>' % (
+            self.__class__.__name__, self.name, self.protocol)
+
+
+    def sendBox(self, box):
+        """
+        Queue C{box} to be sent to the peer over this channel.
+
+        @raise ConnectionLost: if the connection has been lost.
+        """
+        if self.protocol.transport is None:
+            raise ConnectionLost()
+        self._outgoing.append(box.serialize())
+        self.protocol._channelReady(self)
+
+
+    def unhandledError(self, failure):
+        """
+        Let the connection handle an error nothing else handled.
+        """
+        return self.protocol.unhandledError(failure)
+
+
+    def loseConnection(self):
+        """
+        Close the connection once everything queued on its channels has been
+        sent.
+        """
+        self.protocol._loseConnectionWhenSent()
+
+
+    def _canSend(self):
+        """
+        Determine whether I have anything to send now.
+        """
+        return bool(self._outgoing) and self.credit > 0
+
+
+    def _nextFragment(self):
+        """
+        Take the next fragment of queued data, as long as the connection's
+        C{fragmentSize} and my credit allow.  Several small boxes may share a
+        fragment.
+
+        @rtype: L{bytes}
+        """
+        size = min(self.protocol.fragmentSize, self.credit)
+        outgoing = self._outgoing
+        pieces = []
+        while outgoing and size > 0:
+            data = outgoing[0]
+            piece = data[self._offset:self._offset + size]
+            pieces.append(piece)
+            size -= len(piece)
+            self._offset += len(piece)
+            if self._offset == len(data):
+                outgoing.popleft()
+                self._offset = 0
+        fragment = b''.join(pieces)
+        self.credit -= len(fragment)
+        return fragment
+
+
+    def _dataReceived(self, data):
+        """
+        A fragment was received from the peer; parse the boxes in it, and
+        grant the peer more credit once half of my window has been used.
+        """
+        self._parser.dataReceived(data)
+        self._received += len(data)
+        if self._received >= self.protocol.channelWindow // 2:
+            received, self._received = self._received, 0
+            self.protocol.sendBox(AmpBox({
+                _MUX_CHANNEL: self.name,
+                _MUX_CREDIT: intToBytes(received)}))
+
+
+    def _creditReceived(self, credit):
+        """
+        The peer granted me C{credit} more bytes.
+        """
+        self.credit += credit
+        if self._outgoing:
+            self.protocol._channelReady(self)
+
+
+
+class MultiplexedAMP(AMP):
+    """
+    An AMP connection which can carry several independent logical channels.
+
+    Call L{startMultiplexing} once connected.  If the peer agrees, then
+    L{channel} returns channels which each have their own commands and
+    answers, and their own window of bytes in flight.  Their boxes are sent
+    in fragments as soon as they are queued, taking one fragment from each
+    channel in turn, until every channel has sent everything it has or used
+    up its credit.  A large box on one channel therefore holds up the
+    commands on the others by at most the peer's C{channelWindow}.  If the
+    peer is plain AMP, L{channel} returns this connection itself, so the
+    same application code works over either.
+
+    Commands received on a channel are dispatched to this connection's
+    responders, and their answers are sent back over that channel.
+    L{StartTLS} and L{ProtocolSwitchCommand} must be sent over the
+    connection, not a channel.
+
+    @cvar channelWindow: The number of bytes each channel of the peer may
+        send before this side grants it more.
+
+    @cvar fragmentSize: The largest number of bytes of a channel sent in one
+        fragment.
+    """
+
+    channelWindow = 2 ** 18
+    fragmentSize = 2 ** 14
+
+    # The peer's channel window, once it has agreed to multiplex.
+    _peerWindow = None
+    _sending = False
+    _closeWhenSent = False
+
+    def makeConnection(self, transport):
+        """
+        Start with no channels.
+        """
+        self._channels = {}
+        self._readyChannels = []
+        AMP.makeConnection(self, transport)
+
+
+    def startMultiplexing(self):
+        """
+        Ask the peer to accept channel traffic.
+
+        @return: A L{Deferred} which fires with L{True} if the peer agreed,
+            or L{False} if it is plain AMP.
+        """
+        def started(response):
+            self._setPeerWindow(response['window'])
+            return True
+        def unsupported(reason):
+            reason.trap(UnhandledCommand)
+            return False
+        d = self.callRemote(_StartMultiplexing, window=self.channelWindow)
+        return d.addCallbacks(started, unsupported)
+
+
+    @_StartMultiplexing.responder
+    def _multiplexingRequested(self, window):
+        """
+        The peer asked to multiplex; remember its window and tell it ours.
+        """
+        self._setPeerWindow(window)
+        return {'window': self.channelWindow}
+
+
+    def _setPeerWindow(self, window):
+        """
+        Remember the peer's channel window, and grant it to the channels
+        which the peer opened before it was known.
+
+        @param window: The peer's channel window.
+        @type window: L{int}
+        """
+        if self._peerWindow is not None:
+            return
+        self._peerWindow = window
+        for channel in list(self._channels.values()):
+            channel._creditReceived(window)
+
+
+    def channel(self, name):
+        """
+        Get the channel called C{name}, creating it if necessary.
+
+        @param name: The name of the channel, the same on both sides of the
+            connection.
+        @type name: L{bytes}
+
+        @return: An object with the same C{callRemote} and
+            C{callRemoteString} methods as this connection: the channel if
+            the peer agreed to multiplex, otherwise this connection.
+        """
+        if self._peerWindow is None:
+            return self
+        return self._channelFor(name)
+
+
+    def _channelFor(self, name):
+        channel = self._channels.get(name)
+        if channel is None:
+            channel = self._channels[name] = _Channel(
+                self, name, self._peerWindow or 0)
+        return channel
+
+
+    def ampBoxReceived(self, box):
+        """
+        Deliver channel traffic to its channel, and everything else as
+        L{AMP} does.
+        """
+        name = box.get(_MUX_CHANNEL)
+        if name is None:
+            return AMP.ampBoxReceived(self, box)
+        channel = self._channelFor(name)
+        data = box.get(_MUX_DATA)
+        if data is not None:
+            channel._dataReceived(data)
+        else:
+            channel._creditReceived(int(box[_MUX_CREDIT]))
+
+
+    def stopReceivingBoxes(self, reason):
+        """
+        Fail the outstanding commands of the connection and all its
+        channels.
+        """
+        AMP.stopReceivingBoxes(self, reason)
+        for channel in self._channels.values():
+            channel.stopReceivingBoxes(reason)
+
+
+    def _channelReady(self, channel):
+        """
+        C{channel} may have something to send; send it.
+        """
+        if channel not in self._readyChannels:
+            self._readyChannels.append(channel)
+        if not self._sending:
+            self._sendFragments()
+
+
+    def _loseConnectionWhenSent(self):
+        """
+        Close the connection once the channels have sent everything they can.
+        """
+        if self._sending:
+            self._closeWhenSent = True
+        else:
+            self.transport.loseConnection()
+
+
+    def _sendFragments(self):
+        """
+        Send one fragment from each channel which has something to send, and
+        repeat until none of them can send any more.
+        """
+        self._sending = True
+        try:
+            while self._readyChannels and self.transport is not None:
+                ready = self._readyChannels
+                self._readyChannels = []
+                for channel in ready:
+                    if channel._canSend():
+                        self.sendBox(AmpBox({
+                            _MUX_CHANNEL: channel.name,
+                            _MUX_DATA: channel._nextFragment()}))
+                        if channel._canSend():
+                            self._readyChannels.append(channel)
+        finally:
+            self._sending = False
+        if self._closeWhenSent and self.transport is not None:
+            self._closeWhenSent = False
+            self.transport.loseConnection()
+
+
+
 class _ParserHelper:
     """
     A box receiver which records all boxes received.
@@ -2772,6 +3275,99 @@ def _objectsToStrings(objects, arglist, strings, proto):
 
 
 
+def _usesArgumentMethod(argument, name):
+    """
+    Determine whether C{argument} uses L{Argument}'s own implementation of
+    the method called C{name}.
+    """
+    method = getattr(argument.__class__, name, None)
+    return (getattr(method, '__func__', method) ==
+            getattr(Argument.__dict__[name], '__func__',
+                    Argument.__dict__[name]))
+
+
+
+class _CompiledArguments(object):
+    """
+    An argument list, as described in L{Command.arguments}, prepared once
+    for converting many boxes.
+
+    If every argument converts its value with L{Argument.toStringProto} and
+    L{Argument.fromStringProto}, and none overrides L{Argument.retrieve},
+    boxes are converted without copying them or looking up names for each
+    argument; otherwise the conversion falls back to L{_objectsToStrings} and
+    L{_stringsToObjects}.
+
+    @ivar arglist: The argument list I was prepared from.
+
+    @ivar pythonNames: The Python names of all the arguments.
+    @type pythonNames: L{frozenset}
+
+    @ivar requiredNames: The Python names of the arguments which are not
+        optional, in order.
+    @type requiredNames: L{list}
+    """
+
+    def __init__(self, arglist):
+        self.arglist = arglist
+        self.pythonNames = frozenset([
+            _wireNameToPythonIdentifier(name) for name, _ in arglist])
+        self.requiredNames = [
+            _wireNameToPythonIdentifier(name)
+            for name, argument in arglist if not argument.optional]
+        simple = []
+        for name, argument in arglist:
+            if not (_usesArgumentMethod(argument, 'toBox') and
+                    _usesArgumentMethod(argument, 'fromBox') and
+                    _usesArgumentMethod(argument, 'retrieve')):
+                simple = None
+                break
+            simple.append((name, _wireNameToPythonIdentifier(name),
+                           argument.optional, argument.toStringProto,
+                           argument.fromStringProto))
+        self._simple = simple
+
+
+    def toStrings(self, objects, strings, proto):
+        """
+        Convert a dictionary of Python objects into C{strings}, as
+        L{_objectsToStrings} does.
+        """
+        if self._simple is None:
+            return _objectsToStrings(objects, self.arglist, strings, proto)
+        get = objects.get
+        for name, pythonName, optional, toStringProto, _ in self._simple:
+            obj = get(pythonName)
+            if obj is None:
+                if optional:
+                    continue
+                if pythonName not in objects:
+                    raise KeyError(pythonName)
+            strings[name] = toStringProto(obj, proto)
+        return strings
+
+
+    def toObjects(self, strings, proto):
+        """
+        Convert an L{AmpBox} into a dictionary of Python objects, as
+        L{_stringsToObjects} does.
+        """
+        if self._simple is None:
+            return _stringsToObjects(strings, self.arglist, proto)
+        objects = {}
+        get = strings.get
+        for name, pythonName, optional, _, fromStringProto in self._simple:
+            value = get(name)
+            if value is None:
+                if not optional:
+                    raise KeyError(name)
+                objects[pythonName] = None
+            else:
+                objects[pythonName] = fromStringProto(value, proto)
+        return objects
+
+
+
 class Decimal(Argument):
     """
     Encodes C{decimal.Decimal} instances.
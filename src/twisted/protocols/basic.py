@@ -524,6 +524,7 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
     """
     line_mode = 1
     _buffer = b''
+    _bufferOffset = 0
     _busyReceiving = False
     delimiter = b'\r\n'
     MAX_LENGTH = 16384
@@ -535,7 +536,9 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
         @return: All of the cleared buffered data.
         @rtype: C{bytes}
         """
-        b, self._buffer = self._buffer, b""
+        b = self._buffer[self._bufferOffset:]
+        self._buffer = b""
+        self._bufferOffset = 0
         return b
 
 
@@ -544,6 +547,10 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
         Protocol.dataReceived.
         Translates bytes into lines, and calls lineReceived (or
         rawDataReceived, depending on mode.)
+
+        Lines are found by scanning the buffer from an offset which moves
+        past each line as it is delivered, so the unprocessed remainder of
+        the buffer is only copied once per call rather than once per line.
         """
         if self._busyReceiving:
             self._buffer += data
@@ -552,34 +559,35 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
         try:
             self._busyReceiving = True
             self._buffer += data
-            while self._buffer and not self.paused:
+            while not self.paused:
+                buffer = self._buffer
+                offset = self._bufferOffset
+                if offset >= len(buffer):
+                    break
                 if self.line_mode:
-                    try:
-                        line, self._buffer = self._buffer.split(
-                            self.delimiter, 1)
-                    except ValueError:
-                        if len(self._buffer) > self.MAX_LENGTH:
-                            line, self._buffer = self._buffer, b''
-                            return self.lineLengthExceeded(line)
-                        return
-                    else:
-                        lineLength = len(line)
-                        if lineLength > self.MAX_LENGTH:
-                            exceeded = line + self.delimiter + self._buffer
-                            self._buffer = b''
-                            return self.lineLengthExceeded(exceeded)
-                        why = self.lineReceived(line)
-                        if (why or self.transport and
-                            self.transport.disconnecting):
-                            return why
+                    end = buffer.find(self.delimiter, offset)
+                    if end == -1:
+                        if len(buffer) - offset > self.MAX_LENGTH:
+                            return self.lineLengthExceeded(
+                                self.clearLineBuffer())
+                        break
+                    if end - offset > self.MAX_LENGTH:
+                        return self.lineLengthExceeded(self.clearLineBuffer())
+                    line = buffer[offset:end]
+                    self._bufferOffset = end + len(self.delimiter)
+                    why = self.lineReceived(line)
+                    if (why or self.transport and
+                        self.transport.disconnecting):
+                        return why
                 else:
-                    data = self._buffer
-                    self._buffer = b''
-                    why = self.rawDataReceived(data)
+                    why = self.rawDataReceived(self.clearLineBuffer())
                     if why:
                         return why
         finally:
             self._busyReceiving = False
+            if self._bufferOffset:
+                self._buffer = self._buffer[self._bufferOffset:]
+                self._bufferOffset = 0
 
 
     def setLineMode(self, extra=b''):
@@ -674,7 +682,10 @@ class _RecvdCompatHack(object):
     the default __set__ behavior in both new-style and old-style subclasses.
     """
     def __get__(self, oself, type=None):
-        return oself._unprocessed[oself._compatibilityOffset:]
+        unprocessed = oself._unprocessed[oself._compatibilityOffset:]
+        if oself._frame is not None:
+            unprocessed += b"".join(oself._frame)
+        return unprocessed
 
 
 
@@ -699,11 +710,38 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
     @ivar _compatibilityOffset: the offset within C{_unprocessed} to the next
         message to be parsed. (used to generate the recvd attribute)
     @type _compatibilityOffset: C{int}
+
+    @ivar _frame: The pieces of the body of a message whose length prefix has
+        been received but which is not yet complete, or L{None} if no such
+        message is being collected.  While a message is being collected,
+        C{_unprocessed} holds only its length prefix.  The pieces are joined
+        once, when the last one arrives, rather than being concatenated with
+        the buffer on every call to L{dataReceived}.
+    @type _frame: L{list} of C{bytes} or L{None}
+
+    @ivar _frameRemaining: The number of bytes still missing from the message
+        being collected in C{_frame}.
+    @type _frameRemaining: C{int}
+
+    @ivar streamingLength: If not L{None}, messages longer than this many
+        bytes are not buffered.  Their bodies are delivered to
+        L{stringChunkReceived} piece by piece as they arrive instead of to
+        L{stringReceived}.
+    @type streamingLength: C{int} or L{None}
+
+    @ivar _streamRemaining: The number of bytes of the body of the message
+        being delivered to L{stringChunkReceived} which have not yet been
+        received.
+    @type _streamRemaining: C{int}
     """
 
     MAX_LENGTH = 99999
     _unprocessed = b""
     _compatibilityOffset = 0
+    _frame = None
+    _frameRemaining = 0
+    streamingLength = None
+    _streamRemaining = 0
 
     # Backwards compatibility support for applications which directly touch the
     # "internal" parse buffer.
@@ -720,6 +758,21 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
         raise NotImplementedError
 
 
+    def stringChunkReceived(self, chunk, remaining):
+        """
+        Override this for notification of each piece of a string longer than
+        C{streamingLength} as it is received.
+
+        @param chunk: The next piece of the string.
+        @type chunk: C{bytes}
+
+        @param remaining: The number of bytes of the string which are still
+            to come.  This is C{0} for the last piece.
+        @type remaining: C{int}
+        """
+        raise NotImplementedError
+
+
     def lengthLimitExceeded(self, length):
         """
         Callback invoked when a length prefix greater than C{MAX_LENGTH} is
@@ -736,6 +789,30 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
         """
         Convert int prefixed strings into calls to stringReceived.
         """
+        frame = self._frame
+        if frame is not None:
+            # The rest of a message whose prefix has already been parsed.
+            # Keep collecting pieces of it until all of it has arrived.
+            remaining = self._frameRemaining
+            if len(data) < remaining:
+                frame.append(data)
+                self._frameRemaining = remaining - len(data)
+                return
+            frame.append(data[:remaining])
+            data = data[remaining:]
+            self._frame = None
+            self._frameRemaining = 0
+            packet = b"".join(frame)
+            if self.paused:
+                self._unprocessed += packet + data
+                return
+            self._unprocessed = data
+            self._compatibilityOffset = 0
+            self.stringReceived(packet)
+            if 'recvd' in self.__dict__:
+                data = self.__dict__.pop('recvd')
+            self._unprocessed = b""
+
         # Try to minimize string copying (via slices) by keeping one buffer
         # containing all the data we have so far and a separate offset into that
         # buffer.
@@ -745,7 +822,20 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
         fmt = self.structFormat
         self._unprocessed = alldata
 
-        while len(alldata) >= (currentOffset + prefixLength) and not self.paused:
+        while not self.paused:
+            remaining = self._streamRemaining
+            if remaining:
+                chunk = alldata[currentOffset:currentOffset + remaining]
+                if not chunk:
+                    break
+                currentOffset += len(chunk)
+                self._compatibilityOffset = currentOffset
+                self._streamRemaining = remaining = remaining - len(chunk)
+                self.stringChunkReceived(chunk, remaining)
+                continue
+
+            if len(alldata) < currentOffset + prefixLength:
+                break
             messageStart = currentOffset + prefixLength
             length, = unpack(fmt, alldata[currentOffset:messageStart])
             if length > self.MAX_LENGTH:
@@ -753,9 +843,22 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
                 self._compatibilityOffset = currentOffset
                 self.lengthLimitExceeded(length)
                 return
+            if (self.streamingLength is not None and
+                    length > self.streamingLength):
+                currentOffset = messageStart
+                self._compatibilityOffset = currentOffset
+                self._streamRemaining = length
+                continue
             messageEnd = messageStart + length
             if len(alldata) < messageEnd:
-                break
+                # Collect the rest of this message as separate pieces, so
+                # that a large message arriving in many small reads is
+                # copied once instead of once per read.
+                self._frame = [alldata[messageStart:]]
+                self._frameRemaining = messageEnd - len(alldata)
+                self._unprocessed = alldata[currentOffset:messageStart]
+                self._compatibilityOffset = 0
+                return
 
             # Here we have to slice the working buffer so we can send just the
             # netstring into the stringReceived callback.
@@ -292,6 +292,59 @@ a'''
         self.assertEqual(protocol.rest, b'')
 
 
+    def test_manyLinesInOneChunk(self):
+        """
+        Every line in a single chunk holding many lines is delivered, in
+        order, and a trailing partial line is kept for the next chunk.
+        """
+        received = []
+        proto = basic.LineReceiver()
+        proto.lineReceived = received.append
+        lines = [str(i).encode('ascii') for i in range(10000)]
+        proto.dataReceived(b'\r\n'.join(lines) + b'\r\npart')
+        proto.dataReceived(b'ial\r\n')
+        self.assertEqual(lines + [b'partial'], received)
+
+
+    def test_dataReceivedFromLineReceived(self):
+        """
+        Data passed to C{dataReceived} from beneath C{lineReceived} is
+        delivered after the lines which were already buffered.
+        """
+        class ReentrantReceiver(basic.LineReceiver):
+            def connectionMade(self):
+                self.lines = []
+
+            def lineReceived(self, line):
+                self.lines.append(line)
+                if line == b'first':
+                    self.dataReceived(b'third\r\n')
+
+        proto = ReentrantReceiver()
+        proto.makeConnection(proto_helpers.StringTransport())
+        proto.dataReceived(b'first\r\nsecond\r\n')
+        self.assertEqual([b'first', b'second', b'third'], proto.lines)
+
+
+    def test_delimiterChangedFromLineReceived(self):
+        """
+        A change to C{delimiter} made by C{lineReceived} applies to the rest
+        of the data already buffered.
+        """
+        class SwitchingReceiver(basic.LineReceiver):
+            def connectionMade(self):
+                self.lines = []
+
+            def lineReceived(self, line):
+                self.lines.append(line)
+                self.delimiter = b'\n'
+
+        proto = SwitchingReceiver()
+        proto.makeConnection(proto_helpers.StringTransport())
+        proto.dataReceived(b'one\r\ntwo\nthree\n')
+        self.assertEqual([b'one', b'two', b'three'], proto.lines)
+
+
     def test_stackRecursion(self):
         """
         Test switching modes many times on the same data.
@@ -962,6 +1015,79 @@ class RecvdAttributeMixin(object):
 
 
 
+class IntNStringReceiverMixin(object):
+    """
+    Mixin defining tests for the way L{basic.IntNStringReceiver} buffers and
+    delivers strings, which do not apply to other int-prefixed protocols, to
+    be combined with L{IntNTestCaseMixin} on a L{TestCase} subclass.
+    """
+
+    def test_receiveInPieces(self):
+        """
+        A string whose body arrives over several calls to C{dataReceived} is
+        delivered once all of it has arrived, and data following it in the
+        same call is parsed as the next string.  Until then, C{recvd} holds
+        everything received for it.
+        """
+        r = self.getProtocol()
+        message = struct.pack(r.structFormat, 40) + b'x' * 40
+        r.dataReceived(message[:10])
+        r.dataReceived(message[10:20])
+        self.assertEqual(r.received, [])
+        self.assertEqual(r.recvd, message[:20])
+        r.dataReceived(
+            message[20:] + struct.pack(r.structFormat, 3) + b'abc' +
+            struct.pack(r.structFormat, 3) + b'd')
+        self.assertEqual(r.received, [b'x' * 40, b'abc'])
+        self.assertEqual(r.recvd, struct.pack(r.structFormat, 3) + b'd')
+
+
+    def test_pausedWhileReceivingInPieces(self):
+        """
+        If the protocol is paused when the last piece of a string arrives,
+        the string is not delivered until the protocol is resumed.
+        """
+        r = self.getProtocol()
+        message = struct.pack(r.structFormat, 40) + b'x' * 40
+        r.dataReceived(message[:20])
+        r.pauseProducing()
+        r.dataReceived(message[20:] + message)
+        self.assertEqual(r.received, [])
+        r.resumeProducing()
+        self.assertEqual(r.received, [b'x' * 40, b'x' * 40])
+
+
+    def test_streaming(self):
+        """
+        The body of a string longer than C{streamingLength} is passed to
+        C{stringChunkReceived} as it arrives, with the number of bytes still
+        to come, and strings which are not longer are still passed to
+        C{stringReceived}.
+        """
+        r = self.getProtocol()
+        chunks = []
+        r.stringChunkReceived = lambda chunk, remaining: chunks.append(
+            (chunk, remaining))
+        r.streamingLength = 10
+        r.dataReceived(struct.pack(r.structFormat, 25) + b'a' * 5)
+        r.dataReceived(b'b' * 10)
+        r.dataReceived(b'c' * 10 + struct.pack(r.structFormat, 10) + b'd' * 10)
+        self.assertEqual(
+            chunks, [(b'a' * 5, 20), (b'b' * 10, 10), (b'c' * 10, 0)])
+        self.assertEqual(r.received, [b'd' * 10])
+
+
+    def test_stringChunkReceivedNotImplemented(self):
+        """
+        When L{IntNStringReceiver.stringChunkReceived} is not overridden in a
+        subclass, calling it raises C{NotImplementedError}.
+        """
+        proto = basic.IntNStringReceiver()
+        self.assertRaises(
+            NotImplementedError, proto.stringChunkReceived, b'foo', 0)
+
+
+
 class TestInt32(TestMixin, basic.Int32StringReceiver):
     """
     A L{basic.Int32StringReceiver} storing received strings in an array.
@@ -972,7 +1098,7 @@ class TestInt32(TestMixin, basic.Int32StringReceiver):
 
 
 class Int32Tests(unittest.SynchronousTestCase, IntNTestCaseMixin,
-                 RecvdAttributeMixin):
+                 RecvdAttributeMixin, IntNStringReceiverMixin):
     """
     Test case for int32-prefixed protocol
     """
@@ -1003,7 +1129,7 @@ class TestInt16(TestMixin, basic.Int16StringReceiver):
 
 
 class Int16Tests(unittest.SynchronousTestCase, IntNTestCaseMixin,
-                 RecvdAttributeMixin):
+                 RecvdAttributeMixin, IntNStringReceiverMixin):
     """
     Test case for int16-prefixed protocol
     """
@@ -1062,7 +1188,7 @@ class TestInt8(TestMixin, basic.Int8StringReceiver):
 
 
 class Int8Tests(unittest.SynchronousTestCase, IntNTestCaseMixin,
-                RecvdAttributeMixin):
+                RecvdAttributeMixin, IntNStringReceiverMixin):
     """
     Test case for int8-prefixed protocol
     """
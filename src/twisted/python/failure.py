@@ -155,6 +155,13 @@ class Failure:
     C{locals().items()}/C{globals().items()} for that frame, or an empty tuple
     if those details were not captured.
 
+    If L{lazy tracebacks <setLazyTracebacks>} are enabled, C{stack} and
+    C{frames} are not extracted from the traceback until they are first used,
+    for example to format, pickle or L{clean <cleanFailure>} this failure.
+    This makes creating a failure which is only trapped much cheaper, but the
+    line numbers in C{stack} are those of the calling frames when it is first
+    used, rather than when the failure was created.
+
     @ivar value: The exception instance responsible for this failure.
     @ivar type: The exception's class.
     @ivar stack: list of frames, innermost last, excluding C{Failure.__init__}.
@@ -162,7 +169,7 @@ class Failure:
     """
 
     pickled = 0
-    stack = None
+    _lazyTracebacks = False
 
     # The opcode of "yield" in Python bytecode. We need this in _findFailure in
     # order to identify whether an exception was thrown by a
@@ -231,88 +238,59 @@ class Failure:
             elif _PY3:
                 tb = self.value.__traceback__
 
-        frames = self.frames = []
-        stack = self.stack = []
-
         # added 2003-06-23 by Chris Armstrong. Yes, I actually have a
         # use case where I need this traceback object, and I've made
         # sure that it'll be cleaned up.
         self.tb = tb
 
-        if tb:
-            f = tb.tb_frame
-        elif not isinstance(self.value, Failure):
+        if tb and self._lazyTracebacks and not captureVars:
+            # The frames are still reachable from the traceback, so leave
+            # extracting them until they are wanted; see __getattr__.
+            self._stackOffset = stackOffset
+        elif tb:
+            self.stack = _extractStack(tb.tb_frame, stackOffset, captureVars)
+            self.frames = _extractFrames(tb, captureVars)
+        else:
             # we don't do frame introspection since it's expensive,
             # and if we were passed a plain exception with no
             # traceback, it's not useful anyway
-            f = stackOffset = None
-
-        while stackOffset and f:
-            # This excludes this Failure.__init__ frame from the
-            # stack, leaving it to start with our caller instead.
-            f = f.f_back
-            stackOffset -= 1
-
-        # Keeps the *full* stack.  Formerly in spread.pb.print_excFullStack:
-        #
-        #   The need for this function arises from the fact that several
-        #   PB classes have the peculiar habit of discarding exceptions
-        #   with bareword "except:"s.  This premature exception
-        #   catching means tracebacks generated here don't tend to show
-        #   what called upon the PB object.
-
-        while f:
-            if captureVars:
-                localz = f.f_locals.copy()
-                if f.f_locals is f.f_globals:
-                    globalz = {}
-                else:
-                    globalz = f.f_globals.copy()
-                for d in globalz, localz:
-                    if "__builtins__" in d:
-                        del d["__builtins__"]
-                localz = localz.items()
-                globalz = globalz.items()
-            else:
-                localz = globalz = ()
-            stack.insert(0, (
-                f.f_code.co_name,
-                f.f_code.co_filename,
-                f.f_lineno,
-                localz,
-                globalz,
-                ))
-            f = f.f_back
-
-        while tb is not None:
-            f = tb.tb_frame
-            if captureVars:
-                localz = f.f_locals.copy()
-                if f.f_locals is f.f_globals:
-                    globalz = {}
-                else:
-                    globalz = f.f_globals.copy()
-                for d in globalz, localz:
-                    if "__builtins__" in d:
-                        del d["__builtins__"]
-                localz = list(localz.items())
-                globalz = list(globalz.items())
-            else:
-                localz = globalz = ()
-            frames.append((
-                f.f_code.co_name,
-                f.f_code.co_filename,
-                tb.tb_lineno,
-                localz,
-                globalz,
-                ))
-            tb = tb.tb_next
+            self.stack = []
+            self.frames = []
+
         if inspect.isclass(self.type) and issubclass(self.type, Exception):
             parentCs = getmro(self.type)
             self.parents = list(map(reflect.qual, parentCs))
         else:
             self.parents = [self.type]
 
+    def __getattr__(self, name):
+        """
+        Extract C{stack} and C{frames} from the traceback the first time
+        either is used, if that was put off when this failure was created.
+        """
+        if name in ("frames", "stack"):
+            if "_stackOffset" in self.__dict__:
+                self._extractLazyFrames()
+                return self.__dict__[name]
+            if name == "stack":
+                return None
+        raise AttributeError(name)
+
+
+    def _extractLazyFrames(self):
+        """
+        Extract C{stack} and C{frames} from the traceback, or leave them
+        empty if the traceback has been dropped since.
+        """
+        stackOffset = self.__dict__.pop("_stackOffset")
+        if self.tb is None:
+            self.stack = []
+            self.frames = []
+        else:
+            self.stack = _extractStack(self.tb.tb_frame, stackOffset, False)
+            self.frames = _extractFrames(self.tb, False)
+
+
     def trap(self, *errorTypes):
         """Trap this failure if its type is in a predetermined list.
 
@@ -460,6 +438,8 @@ class Failure:
         """
         if self.pickled:
             return self.__dict__
+        if "_stackOffset" in self.__dict__:
+            self._extractLazyFrames()
         c = self.__dict__.copy()
 
         c['frames'] = [
@@ -614,6 +594,120 @@ class Failure:
         self.printTraceback(file, elideFrameworkCode, detail='verbose')
 
 
+def _frameVars(f, captureVars):
+    """
+    Copy the locals and globals of a frame, if they are to be captured.
+
+    @param f: A frame.
+
+    @param captureVars: Whether to copy the variables.
+
+    @return: The items of the locals and globals of C{f}, excluding
+        C{__builtins__}, or two empty tuples if C{captureVars} is false.
+    """
+    if not captureVars:
+        return (), ()
+    localz = f.f_locals.copy()
+    if f.f_locals is f.f_globals:
+        globalz = {}
+    else:
+        globalz = f.f_globals.copy()
+    for d in globalz, localz:
+        if "__builtins__" in d:
+            del d["__builtins__"]
+    return list(localz.items()), list(globalz.items())
+
+
+
+def _extractStack(f, stackOffset, captureVars):
+    """
+    Extract the frames of a call stack for L{Failure.stack}.
+
+    Keeps the *full* stack.  Formerly in spread.pb.print_excFullStack:
+
+      The need for this function arises from the fact that several
+      PB classes have the peculiar habit of discarding exceptions
+      with bareword "except:"s.  This premature exception
+      catching means tracebacks generated here don't tend to show
+      what called upon the PB object.
+
+    @param f: The innermost frame of the stack.
+
+    @param stackOffset: The number of innermost frames to leave out.
+
+    @param captureVars: Whether to capture the variables of each frame.
+
+    @return: The frames, outermost first.
+    """
+    while stackOffset and f:
+        f = f.f_back
+        stackOffset -= 1
+
+    stack = []
+    while f:
+        localz, globalz = _frameVars(f, captureVars)
+        stack.append((
+            f.f_code.co_name,
+            f.f_code.co_filename,
+            f.f_lineno,
+            localz,
+            globalz,
+            ))
+        f = f.f_back
+    stack.reverse()
+    return stack
+
+
+
+def _extractFrames(tb, captureVars):
+    """
+    Extract the frames of a traceback for L{Failure.frames}.
+
+    @param tb: A traceback.
+
+    @param captureVars: Whether to capture the variables of each frame.
+
+    @return: The frames, outermost first.
+    """
+    frames = []
+    while tb is not None:
+        f = tb.tb_frame
+        localz, globalz = _frameVars(f, captureVars)
+        frames.append((
+            f.f_code.co_name,
+            f.f_code.co_filename,
+            tb.tb_lineno,
+            localz,
+            globalz,
+            ))
+        tb = tb.tb_next
+    return frames
+
+
+
+def setLazyTracebacks(lazy):
+    """
+    Enable or disable lazy extraction of the frames of new L{Failure}s'
+    tracebacks.  See L{Failure}.
+
+    @param lazy: Whether to extract frames lazily.
+    @type lazy: L{bool}
+    """
+    Failure._lazyTracebacks = bool(lazy)
+
+
+
+def getLazyTracebacks():
+    """
+    Determine whether the frames of new L{Failure}s' tracebacks are extracted
+    lazily.
+
+    @rtype: L{bool}
+    """
+    return Failure._lazyTracebacks
+
+
+
 def _safeReprVars(varsDictItems):
     """
     Convert a list of (name, object) pairs into (name, repr) pairs.
@@ -14,26 +14,44 @@ for more details.
 
 from __future__ import absolute_import, division
 
-import copy, struct
+import copy, re, struct
 from io import BytesIO
 
 from twisted.internet import protocol
 from twisted.persisted import styles
 from twisted.python import log
-from twisted.python.compat import iterbytes, long, _bytesChr as chr
+from twisted.python.compat import long, _bytesChr as chr
 from twisted.python.reflect import fullyQualifiedName
 
 class BananaError(Exception):
     pass
 
 def int2b128(integer, stream):
-    if integer == 0:
-        stream(chr(0))
-        return
-    assert integer > 0, "can only encode positive integers"
+    assert integer >= 0, "can only encode positive integers"
+    stream(_int2b128(integer))
+
+
+
+_smallB128 = [chr(i) for i in range(0x80)]
+
+def _int2b128(integer):
+    """
+    Encode a non-negative integer in base 128, least significant digit first.
+
+    @type integer: L{int} or L{long}
+
+    @return: The encoded integer.
+    @rtype: L{bytes}
+    """
+    if integer < 0x80:
+        return _smallB128[integer]
+    if integer < 0x4000:
+        return _smallB128[integer & 0x7f] + _smallB128[integer >> 7]
+    digits = bytearray()
     while integer:
-        stream(chr(integer & 0x7f))
-        integer = integer >> 7
+        digits.append(integer & 0x7f)
+        integer >>= 7
+    return bytes(digits)
 
 
 def b1282int(st):
@@ -49,8 +67,7 @@ def b1282int(st):
     """
     e = 1
     i = 0
-    for char in iterbytes(st):
-        n = ord(char)
+    for n in bytearray(st):
         i += (n * e)
         e <<= 7
     return i
@@ -70,6 +87,9 @@ VOCAB    = chr(0x87)
 
 HIGH_BIT_SET = chr(0x80)
 
+# Matches the type byte which ends the prefix of an element.
+_typeBytePattern = re.compile(b'[\x80-\xff]')
+
 def setPrefixLimit(limit):
     """
     Set the limit on the prefix length for all Banana connections
@@ -175,79 +195,120 @@ class Banana(protocol.Protocol, styles.Ephemeral):
     buffer = b''
 
     def dataReceived(self, chunk):
+        """
+        Decode as many elements as possible from the data received so far.
+
+        The buffer is walked by offset: each element is found by searching
+        for its type byte from where the previous one ended and is decoded by
+        the function registered for that type byte in C{_decoders}, and only
+        the trailing partial element, if any, is kept in C{self.buffer}.
+        """
         buffer = self.buffer + chunk
+        end = len(buffer)
+        offset = 0
         listStack = self.listStack
         gotItem = self.gotItem
-        while buffer:
-            assert self.buffer != buffer, "This ain't right: %s %s" % (repr(self.buffer), repr(buffer))
-            self.buffer = buffer
-            pos = 0
-            for ch in iterbytes(buffer):
-                if ch >= HIGH_BIT_SET:
+        decoders = self._decoders
+        prefixLimit = self.prefixLimit
+        search = _typeBytePattern.search
+        try:
+            while offset < end:
+                match = search(buffer, offset)
+                if match is None:
+                    if end - offset > prefixLimit:
+                        raise BananaError(
+                            "Security precaution: more than %d bytes of "
+                            "prefix" % (prefixLimit,))
                     break
-                pos = pos + 1
-            else:
-                if pos > self.prefixLimit:
-                    raise BananaError("Security precaution: more than %d bytes of prefix" % (self.prefixLimit,))
-                return
-            num = buffer[:pos]
-            typebyte = buffer[pos:pos+1]
-            rest = buffer[pos+1:]
-            if len(num) > self.prefixLimit:
-                raise BananaError("Security precaution: longer than %d bytes worth of prefix" % (self.prefixLimit,))
-            if typebyte == LIST:
-                num = b1282int(num)
-                if num > SIZE_LIMIT:
-                    raise BananaError("Security precaution: List too long.")
-                listStack.append((num, []))
-                buffer = rest
-            elif typebyte == STRING:
-                num = b1282int(num)
-                if num > SIZE_LIMIT:
-                    raise BananaError("Security precaution: String too long.")
-                if len(rest) >= num:
-                    buffer = rest[num:]
-                    gotItem(rest[:num])
-                else:
-                    return
-            elif typebyte == INT:
-                buffer = rest
-                num = b1282int(num)
-                gotItem(num)
-            elif typebyte == LONGINT:
-                buffer = rest
-                num = b1282int(num)
-                gotItem(num)
-            elif typebyte == LONGNEG:
-                buffer = rest
-                num = b1282int(num)
-                gotItem(-num)
-            elif typebyte == NEG:
-                buffer = rest
-                num = -b1282int(num)
-                gotItem(num)
-            elif typebyte == VOCAB:
-                buffer = rest
-                num = b1282int(num)
-                item = self.incomingVocabulary[num]
-                if self.currentDialect == b'pb':
-                    # the sender issues VOCAB only for dialect pb
-                    gotItem(item)
-                else:
+                pos = match.start()
+                if pos - offset > prefixLimit:
+                    raise BananaError(
+                        "Security precaution: longer than %d bytes worth of "
+                        "prefix" % (prefixLimit,))
+                typebyte = buffer[pos:pos + 1]
+                try:
+                    decoder = decoders[typebyte]
+                except KeyError:
                     raise NotImplementedError(
-                        "Invalid item for pb protocol {0!r}".format(item))
-            elif typebyte == FLOAT:
-                if len(rest) >= 8:
-                    buffer = rest[8:]
-                    gotItem(struct.unpack("!d", rest[:8])[0])
-                else:
-                    return
-            else:
-                raise NotImplementedError(("Invalid Type Byte %r" % (typebyte,)))
-            while listStack and (len(listStack[-1][1]) == listStack[-1][0]):
-                item = listStack.pop()[1]
-                gotItem(item)
-        self.buffer = b''
+                        "Invalid Type Byte %r" % (typebyte,))
+                nextOffset = decoder(self, buffer[offset:pos], buffer, pos + 1)
+                if nextOffset is None:
+                    break
+                offset = nextOffset
+                while listStack and (
+                        len(listStack[-1][1]) == listStack[-1][0]):
+                    item = listStack.pop()[1]
+                    gotItem(item)
+        finally:
+            self.buffer = buffer[offset:]
+
+
+    def _decodeList(self, prefix, buffer, offset):
+        """
+        Start decoding a list.
+
+        Each decoder in C{_decoders} takes the prefix of an element and the
+        buffer it was found in with the offset just after its type byte.  It
+        returns the offset at which the next element starts, or L{None} if
+        the element is not completely in the buffer yet.
+        """
+        num = b1282int(prefix)
+        if num > SIZE_LIMIT:
+            raise BananaError("Security precaution: List too long.")
+        self.listStack.append((num, []))
+        return offset
+
+
+    def _decodeString(self, prefix, buffer, offset):
+        num = b1282int(prefix)
+        if num > SIZE_LIMIT:
+            raise BananaError("Security precaution: String too long.")
+        end = offset + num
+        if len(buffer) < end:
+            return None
+        self.gotItem(buffer[offset:end])
+        return end
+
+
+    def _decodeInt(self, prefix, buffer, offset):
+        self.gotItem(b1282int(prefix))
+        return offset
+
+
+    def _decodeNeg(self, prefix, buffer, offset):
+        self.gotItem(-b1282int(prefix))
+        return offset
+
+
+    def _decodeVocab(self, prefix, buffer, offset):
+        item = self.incomingVocabulary[b1282int(prefix)]
+        if self.currentDialect == b'pb':
+            # the sender issues VOCAB only for dialect pb
+            self.gotItem(item)
+        else:
+            raise NotImplementedError(
+                "Invalid item for pb protocol {0!r}".format(item))
+        return offset
+
+
+    def _decodeFloat(self, prefix, buffer, offset):
+        end = offset + 8
+        if len(buffer) < end:
+            return None
+        self.gotItem(struct.unpack("!d", buffer[offset:end])[0])
+        return end
+
+
+    _decoders = {
+        LIST: _decodeList,
+        STRING: _decodeString,
+        INT: _decodeInt,
+        LONGINT: _decodeInt,
+        NEG: _decodeNeg,
+        LONGNEG: _decodeNeg,
+        VOCAB: _decodeVocab,
+        FLOAT: _decodeFloat,
+        }
 
 
     def expressionReceived(self, lst):
@@ -318,10 +379,9 @@ class Banana(protocol.Protocol, styles.Ephemeral):
 
         @return: L{None}
         """
-        encodeStream = BytesIO()
-        self._encode(obj, encodeStream.write)
-        value = encodeStream.getvalue()
-        self.transport.write(value)
+        buffer = bytearray()
+        self._encode(obj, buffer.extend)
+        self.transport.write(bytes(buffer))
 
 
     def _encode(self, obj, write):
@@ -329,47 +389,72 @@ class Banana(protocol.Protocol, styles.Ephemeral):
             if len(obj) > SIZE_LIMIT:
                 raise BananaError(
                     "list/tuple is too long to send (%d)" % (len(obj),))
-            int2b128(len(obj), write)
-            write(LIST)
-            for elem in obj:
-                self._encode(elem, write)
+            write(_int2b128(len(obj)) + LIST)
+            self._encodeElements(obj, write)
         elif isinstance(obj, (int, long)):
             if obj < self._smallestLongInt or obj > self._largestLongInt:
                 raise BananaError(
                     "int/long is too large to send (%d)" % (obj,))
             if obj < self._smallestInt:
-                int2b128(-obj, write)
-                write(LONGNEG)
+                write(_int2b128(-obj) + LONGNEG)
             elif obj < 0:
-                int2b128(-obj, write)
-                write(NEG)
+                write(_int2b128(-obj) + NEG)
             elif obj <= self._largestInt:
-                int2b128(obj, write)
-                write(INT)
+                write(_int2b128(obj) + INT)
             else:
-                int2b128(obj, write)
-                write(LONGINT)
+                write(_int2b128(obj) + LONGINT)
         elif isinstance(obj, float):
-            write(FLOAT)
-            write(struct.pack("!d", obj))
+            write(FLOAT + struct.pack("!d", obj))
         elif isinstance(obj, bytes):
             # TODO: an API for extending banana...
             if self.currentDialect == b"pb" and obj in self.outgoingSymbols:
                 symbolID = self.outgoingSymbols[obj]
-                int2b128(symbolID, write)
-                write(VOCAB)
+                write(_int2b128(symbolID) + VOCAB)
             else:
                 if len(obj) > SIZE_LIMIT:
                     raise BananaError(
                         "byte string is too long to send (%d)" % (len(obj),))
-                int2b128(len(obj), write)
-                write(STRING)
+                write(_int2b128(len(obj)) + STRING)
                 write(obj)
         else:
             raise BananaError("Banana cannot send {0} objects: {1!r}".format(
                 fullyQualifiedName(type(obj)), obj))
 
 
+    def _encodeElements(self, elements, write):
+        """
+        Encode the elements of a list or tuple.
+
+        Byte strings and non-negative integers, which make up most large
+        lists, are encoded here without a call to L{_encode} for each of
+        them; anything else is passed to L{_encode}.
+
+        @param elements: The elements to encode.
+        @type elements: L{list} or L{tuple}
+
+        @param write: A callable which accepts the encoded bytes.
+        """
+        if self.currentDialect == b"pb":
+            symbols = self.outgoingSymbols
+        else:
+            symbols = {}
+        largestInt = self._largestInt
+        for elem in elements:
+            kind = type(elem)
+            if kind is bytes:
+                if elem in symbols:
+                    write(_int2b128(symbols[elem]) + VOCAB)
+                elif len(elem) <= SIZE_LIMIT:
+                    write(_int2b128(len(elem)) + STRING)
+                    write(elem)
+                else:
+                    self._encode(elem, write)
+            elif kind is int and 0 <= elem <= largestInt:
+                write(_int2b128(elem) + INT)
+            else:
+                self._encode(elem, write)
+
+
 # For use from the interactive interpreter
 _i = Banana()
 _i.connectionMade()
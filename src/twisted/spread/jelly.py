@@ -377,6 +377,64 @@ class Unjellyable:
 
 
 
+class _TypeCache(object):
+    """
+    Decisions made by L{_Jellier} and L{_Unjellier} about the types they
+    encounter, kept so that later objects of the same type skip the
+    reflection and security checks.
+
+    A cache belongs to one taster.  An invoker, such as a
+    L{twisted.spread.pb.Broker}, may keep one in its C{_jellyTypeCache}
+    attribute to share it between all the calls made for one connection.
+    Only types found to be allowed are remembered: a L{SecurityOptions} only
+    ever allows more types, so a remembered decision does not go stale.
+
+    @ivar taster: The L{SecurityOptions} which made the decisions.
+
+    @ivar jellyTypes: Types of objects which the taster allowed to be jellied.
+    @type jellyTypes: L{set}
+
+    @ivar unjellyTypes: Type names which the taster allowed to be unjellied.
+    @type unjellyTypes: L{set} of L{bytes}
+
+    @ivar thunks: Maps type names to the C{_unjelly_*} method of
+        L{_Unjellier} which handles them, or to L{None} if there is none.
+    @type thunks: L{dict}
+
+    @ivar classes: Maps type names of instances of arbitrary classes to
+        those classes.
+    @type classes: L{dict}
+    """
+
+    def __init__(self, taster):
+        self.taster = taster
+        self.jellyTypes = set()
+        self.unjellyTypes = set()
+        self.thunks = {}
+        self.classes = {}
+
+
+
+def _typeCacheFor(taster, invoker):
+    """
+    Find the L{_TypeCache} to use for one call to L{jelly} or L{unjelly}.
+
+    @param taster: The L{SecurityOptions} for the call.
+
+    @param invoker: The invoker for the call, which may keep a cache for
+        C{taster} in its C{_jellyTypeCache} attribute.
+
+    @return: The invoker's cache if it has one for C{taster}, otherwise a new
+        cache for this call only.
+    @rtype: L{_TypeCache}
+    """
+    cache = getattr(invoker, '_jellyTypeCache', None)
+    if cache is None or cache.taster is not taster:
+        cache = _TypeCache(taster)
+    return cache
+
+
+
 class _Jellier:
     """
     (Internal) This class manages state for a call to jelly()
@@ -387,6 +445,7 @@ class _Jellier:
         Initialize.
         """
         self.taster = taster
+        self._allowedTypes = _typeCacheFor(taster, invoker).jellyTypes
         # `preserved' is a dict of previously seen instances.
         self.preserved = {}
         # `cooked' is a dict of previously backreferenced instances to their
@@ -487,7 +546,12 @@ class _Jellier:
                 return preRef
             return obj.jellyFor(self)
         objType = type(obj)
-        if self.taster.isTypeAllowed(qual(objType).encode('utf-8')):
+        allowed = objType in self._allowedTypes
+        if not allowed and self.taster.isTypeAllowed(
+                qual(objType).encode('utf-8')):
+            self._allowedTypes.add(objType)
+            allowed = True
+        if allowed:
             # "Immutable" Types
             if ((objType is bytes) or
                 (objType is int) or
@@ -632,6 +696,7 @@ class _Unjellier:
 
     def __init__(self, taster, persistentLoad, invoker):
         self.taster = taster
+        self._types = _typeCacheFor(taster, invoker)
         self.persistentLoad = persistentLoad
         self.references = {}
         self.postCallbacks = []
@@ -663,8 +728,11 @@ class _Unjellier:
         if type(obj) is not list:
             return obj
         jelTypeBytes = obj[0]
-        if not self.taster.isTypeAllowed(jelTypeBytes):
-            raise InsecureJelly(jelTypeBytes)
+        types = self._types
+        if jelTypeBytes not in types.unjellyTypes:
+            if not self.taster.isTypeAllowed(jelTypeBytes):
+                raise InsecureJelly(jelTypeBytes)
+            types.unjellyTypes.add(jelTypeBytes)
         regClass = unjellyableRegistry.get(jelTypeBytes)
         if regClass is not None:
             method = getattr(_createBlank(regClass), "unjellyFor", regClass)
@@ -673,17 +741,25 @@ class _Unjellier:
         if regFactory is not None:
             return self._maybePostUnjelly(regFactory(self.unjelly(obj[1])))
 
-        jelTypeText = nativeString(jelTypeBytes)
-        thunk = getattr(self, '_unjelly_%s' % jelTypeText, None)
+        try:
+            thunk = types.thunks[jelTypeBytes]
+        except KeyError:
+            thunk = types.thunks[jelTypeBytes] = getattr(
+                self.__class__,
+                '_unjelly_%s' % (nativeString(jelTypeBytes),), None)
         if thunk is not None:
-            return thunk(obj[1:])
+            return thunk(self, obj[1:])
         else:
+            jelTypeText = nativeString(jelTypeBytes)
             nameSplit = jelTypeText.split('.')
             modName = '.'.join(nameSplit[:-1])
             if not self.taster.isModuleAllowed(modName):
                 raise InsecureJelly(
                     "Module %s not allowed (in type %s)." % (modName, jelTypeText))
-            clz = namedObject(jelTypeText)
+            try:
+                clz = types.classes[jelTypeBytes]
+            except KeyError:
+                clz = types.classes[jelTypeBytes] = namedObject(jelTypeText)
             if not self.taster.isClassAllowed(clz):
                 raise InsecureJelly("Class %s not allowed." % jelTypeText)
             return self._genericUnjelly(clz, obj[1])
@@ -29,6 +29,7 @@ To get started, begin with L{PBClientFactory} and L{PBServerFactory}.
 
 from __future__ import absolute_import, division
 
+import bisect
 import random
 from hashlib import md5
 
@@ -47,6 +48,7 @@ from twisted.python.components import registerAdapter
 
 from twisted.spread.interfaces import IJellyable, IUnjellyable
 from twisted.spread.jelly import jelly, unjelly, globalSecurity, _newInstance
+from twisted.spread.jelly import _TypeCache
 from twisted.spread import banana
 
 from twisted.spread.flavors import Serializable
@@ -420,6 +422,7 @@ class CopyableFailure(failure.Failure, Copyable):
         state which cannot reasonably be serialized.
         """
         state = self.__dict__.copy()
+        state.pop('_stackOffset', None)
         state['tb'] = None
         state['frames'] = []
         state['stack'] = []
@@ -488,6 +491,124 @@ def failure2Copyable(fail, unsafeTracebacks=0):
 
 
 
+class CallMetrics(object):
+    """
+    Statistics about the remote calls made through a L{Broker}.
+
+    Assign an instance to L{Broker.metrics} to start collecting.
+
+    @cvar latencyBuckets: The upper bounds, in seconds, of the latency
+        histogram buckets.  A final bucket counts calls which took longer.
+
+    @ivar calls: A mapping from remote method names to the number of calls
+        sent.
+    @type calls: L{dict}
+
+    @ivar inFlight: The number of calls sent which are still waiting for an
+        answer.
+    @type inFlight: L{int}
+
+    @ivar latencies: A mapping from remote method names to a L{list} of
+        counts of answered calls, one per bucket of L{latencyBuckets} plus
+        one for calls which took longer.
+    @type latencies: L{dict}
+    """
+    latencyBuckets = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+    def __init__(self, clock=None):
+        """
+        @param clock: The clock used to time calls, defaulting to the global
+            reactor.
+        @type clock: L{twisted.internet.interfaces.IReactorTime}
+        """
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self.seconds = clock.seconds
+        self.started = self.seconds()
+        self.calls = {}
+        self.inFlight = 0
+        self.latencies = {}
+
+
+    def callsPerSecond(self, name=None):
+        """
+        Get the rate of calls sent since I was created.
+
+        @param name: A remote method name, or L{None} for all calls.
+
+        @return: The number of calls per second.
+        @rtype: L{float}
+        """
+        if name is None:
+            count = sum(self.calls.values())
+        else:
+            count = self.calls.get(name, 0)
+        elapsed = self.seconds() - self.started
+        if elapsed <= 0:
+            return 0.0
+        return count / elapsed
+
+
+    def callSent(self, name, answerRequired):
+        """
+        Record a call to the remote method C{name}.
+
+        @return: The time the call was sent if C{answerRequired}, to be
+            passed to L{callAnswered}.
+        """
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if answerRequired:
+            self.inFlight += 1
+            return self.seconds()
+
+
+    def callAnswered(self, result, name, sent):
+        """
+        Record the answer, or error, to a call to C{name} sent at C{sent}.
+
+        @return: C{result}, so that this may be used as a callback.
+        """
+        self.inFlight -= 1
+        latency = self.seconds() - sent
+        histogram = self.latencies.get(name)
+        if histogram is None:
+            histogram = self.latencies[name] = [0] * (
+                len(self.latencyBuckets) + 1)
+        histogram[bisect.bisect_left(self.latencyBuckets, latency)] += 1
+        return result
+
+
+
+class _BatchingTransport(object):
+    """
+    The transport of a L{Broker} which is batching.  It writes the current
+    batch before closing the connection, and is otherwise the same as the
+    transport it wraps.
+
+    @ivar _broker: The broker.
+    @type _broker: L{Broker}
+
+    @ivar _transport: The wrapped transport.
+    """
+
+    def __init__(self, broker, transport):
+        self._broker = broker
+        self._transport = transport
+
+
+    def __getattr__(self, name):
+        return getattr(self._transport, name)
+
+
+    def loseConnection(self):
+        """
+        Write the current batch, then close the connection.
+        """
+        self._broker.flushBatch()
+        self._transport.loseConnection()
+
+
+
 class Broker(banana.Banana):
     """I am a broker for objects.
     """
@@ -496,6 +617,14 @@ class Broker(banana.Banana):
     username = None
     factory = None
 
+    # Set to a CallMetrics instance to collect statistics about remote calls.
+    metrics = None
+
+    # While batching, the encoded expressions not yet written and the
+    # delayed call which will write them.
+    _batch = None
+    _batchCall = None
+
     def __init__(self, isClient=1, security=globalSecurity):
         banana.Banana.__init__(self, isClient)
         self.disconnected = 0
@@ -504,6 +633,8 @@ class Broker(banana.Banana):
         self.connects = []
         self.localObjects = {}
         self.security = security
+        # Type decisions made by jelly and unjelly for this connection.
+        self._jellyTypeCache = _TypeCache(security)
         self.pageProducers = []
         self.currentRequestID = 0
         self.currentLocalID = 0
@@ -544,6 +675,8 @@ class Broker(banana.Banana):
             pager.sendNextPage()
             if not pager.stillPaging():
                 del self.pageProducers[pageridx]
+        if self._batch is not None:
+            self.flushBatch()
         if not self.pageProducers:
             self.transport.unregisterProducer()
 
@@ -595,6 +728,68 @@ class Broker(banana.Banana):
         """
         self.sendEncoded(exp)
 
+
+    def sendEncoded(self, obj):
+        """
+        Send the encoded representation of the given object, or add it to
+        the current batch if L{startBatching} was called.
+        """
+        if self._batch is None:
+            banana.Banana.sendEncoded(self, obj)
+            return
+        buffer = bytearray()
+        self._encode(obj, buffer.extend)
+        self._batch += buffer
+        if self._batchCall is None:
+            self._batchCall = self._batchClock.callLater(0, self.flushBatch)
+
+
+    def startBatching(self, clock=None):
+        """
+        Group the expressions sent during one reactor iteration into a
+        single write to the transport.  Call this once connected.
+
+        While batching, the broker's transport is wrapped so that closing
+        the connection with its C{loseConnection} writes the current batch
+        first.
+
+        @param clock: The reactor used to schedule writes, defaulting to the
+            global reactor.
+        @type clock: L{twisted.internet.interfaces.IReactorTime}
+        """
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self._batchClock = clock
+        if self._batch is None:
+            self._batch = bytearray()
+            self.transport = _BatchingTransport(self, self.transport)
+
+
+    def stopBatching(self):
+        """
+        Write any expressions in the current batch, and write expressions
+        as they are sent from now on.
+        """
+        self.flushBatch()
+        if self._batch is not None:
+            self._batch = None
+            self.transport = self.transport._transport
+
+
+    def flushBatch(self):
+        """
+        Write the expressions in the current batch to the transport now.
+        """
+        if self._batchCall is not None:
+            if self._batchCall.active():
+                self._batchCall.cancel()
+            self._batchCall = None
+        if self._batch:
+            data = bytes(self._batch)
+            del self._batch[:]
+            self.transport.write(data)
+
+
     def proto_didNotUnderstand(self, command):
         """Respond to stock 'C{didNotUnderstand}' message.
 
@@ -632,6 +827,13 @@ class Broker(banana.Banana):
         """The connection was lost.
         """
         self.disconnected = 1
+        if self._batchCall is not None:
+            if self._batchCall.active():
+                self._batchCall.cancel()
+            self._batchCall = None
+        if self._batch is not None:
+            self._batch = None
+            self.transport = self.transport._transport
         # nuke potential circular references.
         self.luids = None
         if self.waitingForAnswers:
@@ -881,9 +1083,16 @@ class Broker(banana.Banana):
         except:
             return defer.fail(failure.Failure())
         requestID = self.newRequestID()
+        if self.metrics is not None:
+            name = message
+            if not isinstance(name, str):
+                name = name.decode('utf8')
+            sent = self.metrics.callSent(name, answerRequired)
         if answerRequired:
             rval = defer.Deferred()
             self.waitingForAnswers[requestID] = rval
+            if self.metrics is not None:
+                rval.addBoth(self.metrics.callAnswered, name, sent)
             if pbc or pbe:
                 log.msg('warning! using deprecated "pbcallback"')
                 rval.addCallbacks(pbc, pbe)
@@ -1453,6 +1662,6 @@ __all__ = [
     'ProtocolError', 'DeadReferenceError', 'Error', 'PBConnectionLost',
     'RemoteMethod', 'IPerspective', 'Avatar', 'AsReferenceable',
     'RemoteReference', 'CopyableFailure', 'CopiedFailure', 'failure2Copyable',
-    'Broker', 'respond', 'challenge', 'PBClientFactory', 'PBServerFactory',
+    'CallMetrics', 'Broker', 'respond', 'challenge', 'PBClientFactory', 'PBServerFactory',
     'IUsernameMD5Password',
     ]
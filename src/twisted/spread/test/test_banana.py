@@ -317,6 +317,72 @@ class BananaTests(BananaTestBase):
             self.enc.dataReceived(byte)
 
 
+    def test_sendEncodedSingleWrite(self):
+        """
+        L{banana.Banana.sendEncoded} writes the whole encoded expression to
+        its transport with a single call to C{write}.
+        """
+        writes = []
+        self.enc.transport = protocol.FileWrapper(BytesIO())
+        self.enc.transport.write = writes.append
+        foo = [b"a", 1, [b"b", -2, 3.5], list(range(1000))]
+        self.enc.sendEncoded(foo)
+        self.assertEqual(len(writes), 1)
+        self.assertIsInstance(writes[0], bytes)
+        self.enc.dataReceived(writes[0])
+        self.assertEqual(self.result, foo)
+
+
+    def test_listElementEncoding(self):
+        """
+        Elements of a list are encoded the same way as the same values sent
+        on their own.
+        """
+        elements = [b"", b"x" * 200, 0, 127, 128, 2 ** 31 - 1, 2 ** 31, -1,
+                    True, 1.5, [b"nested"]]
+        self.assertEqual(
+            self.encode(elements),
+            b"\x0b\x80" + b"".join(self.encode(e) for e in elements))
+
+
+    def test_bufferHoldsPartialElement(self):
+        """
+        After decoding the complete elements in the data it has received,
+        L{banana.Banana.dataReceived} keeps only the incomplete element which
+        follows them in C{buffer}.
+        """
+        self.enc.sendEncoded(b"complete")
+        partial = b"\x0a\x82abc"
+        self.enc.dataReceived(self.io.getvalue() + partial)
+        self.assertEqual(self.result, b"complete")
+        self.assertEqual(self.enc.buffer, partial)
+        self.enc.dataReceived(b"defghij")
+        self.assertEqual(self.result, b"abcdefghij")
+        self.assertEqual(self.enc.buffer, b"")
+
+
+    def test_largeListInChunks(self):
+        """
+        A list with many elements delivered in chunks which split elements is
+        decoded completely.
+        """
+        foo = [b"x" * (i % 50) for i in range(50000)] + [1, -1, 0.5]
+        self.enc.sendEncoded(foo)
+        data = self.io.getvalue()
+        for i in range(0, len(data), 4093):
+            self.enc.dataReceived(data[i:i + 4093])
+        self.assertEqual(self.result, foo)
+
+
+    def test_invalidTypeByte(self):
+        """
+        L{banana.Banana.dataReceived} raises L{NotImplementedError} if it
+        receives a type byte which no element type uses.
+        """
+        self.assertRaises(
+            NotImplementedError, self.enc.dataReceived, b"\x01\xff")
+
+
     def test_oversizedList(self):
         data = b'\x02\x01\x01\x01\x01\x80'
         # list(size=0x0101010102, about 4.3e9)
@@ -11,6 +11,7 @@ import datetime
 import decimal
 
 from twisted.python.compat import unicode
+from twisted.python.reflect import qual
 from twisted.spread import jelly, pb
 from twisted.trial import unittest
 from twisted.test.proto_helpers import StringTransport
@@ -105,6 +106,14 @@ class E(object):
 
 
 
+class DummyInvoker(object):
+    """
+    Dummy invoker which can hold a C{_jellyTypeCache}.
+    """
+    serializingPerspective = None
+
+
+
 class SimpleJellyTest:
     def __init__(self, x, y):
         self.x = x
@@ -434,6 +443,59 @@ class JellyTests(unittest.TestCase):
         self.assertRaises(jelly.InsecureJelly, jelly.unjelly, dct, taster)
 
 
+    def test_invokerTypeCache(self):
+        """
+        L{jelly.jelly} and L{jelly.unjelly} record the types they allow in
+        the C{_jellyTypeCache} of their invoker if it belongs to the taster
+        they are called with, and later calls sharing it give the same
+        results.
+        """
+        taster = jelly.SecurityOptions()
+        taster.allowInstancesOf(A)
+        invoker = DummyInvoker()
+        invoker._jellyTypeCache = jelly._TypeCache(taster)
+        for i in range(2):
+            a = A()
+            a.items = [1, b"two", {b"three": 3.0}]
+            result = jelly.unjelly(
+                jelly.jelly(a, taster, invoker=invoker), taster,
+                invoker=invoker)
+            self.assertIsInstance(result, A)
+            self.assertEqual(result.items, a.items)
+        cache = invoker._jellyTypeCache
+        self.assertIn(A, cache.jellyTypes)
+        self.assertIn(jelly.dictionary_atom, cache.unjellyTypes)
+        self.assertIs(A, cache.classes[qual(A).encode("utf-8")])
+
+
+    def test_invokerTypeCacheOtherTaster(self):
+        """
+        The C{_jellyTypeCache} of an invoker is not used for a call with a
+        different taster, so types allowed by its taster are still checked.
+        """
+        invoker = DummyInvoker()
+        invoker._jellyTypeCache = jelly._TypeCache(jelly.SecurityOptions())
+        invoker._jellyTypeCache.unjellyTypes.add(jelly.dictionary_atom)
+        self.assertRaises(
+            jelly.InsecureJelly, jelly.unjelly, jelly.jelly({}),
+            jelly.SecurityOptions(), invoker=invoker)
+
+
+    def test_typeCacheAllowedLater(self):
+        """
+        A type which a taster refused is allowed once the taster allows it,
+        even if the same L{jelly._TypeCache} is used.
+        """
+        taster = jelly.SecurityOptions()
+        invoker = DummyInvoker()
+        invoker._jellyTypeCache = jelly._TypeCache(taster)
+        dct = jelly.jelly({})
+        self.assertRaises(
+            jelly.InsecureJelly, jelly.unjelly, dct, taster, invoker=invoker)
+        taster.allowBasicTypes()
+        self.assertEqual({}, jelly.unjelly(dct, taster, invoker=invoker))
+
+
     def test_newStyleClasses(self):
         uj = jelly.unjelly(D)
         self.assertIs(D, uj)
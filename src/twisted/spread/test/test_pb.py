@@ -21,8 +21,9 @@ from zope.interface import implementer, Interface
 
 from twisted.trial import unittest
 from twisted.spread import pb, util, publish, jelly
-from twisted.internet import protocol, main, reactor, address
+from twisted.internet import protocol, main, reactor, address, interfaces
 from twisted.internet.error import ConnectionRefusedError
+from twisted.internet.task import Clock
 from twisted.internet.defer import Deferred, gatherResults, succeed
 from twisted.protocols.policies import WrappingFactory
 from twisted.python import failure, log
@@ -1056,6 +1057,355 @@ class PagingTests(unittest.TestCase):
 
 
 
+class Streamer(pb.Referenceable):
+    """
+    A referenceable which sends and receives L{util.Stream}s.
+    """
+    def __init__(self, source=None):
+        self.source = source
+
+
+    def remote_getStream(self):
+        return util.Stream(self.source, chunkSize=100)
+
+
+    def remote_collect(self, stream):
+        return stream.collect()
+
+
+
+@implementer(interfaces.IConsumer)
+class PausingConsumer(object):
+    """
+    A consumer which pauses its producer after each write.
+    """
+    producer = None
+
+    def __init__(self):
+        self.chunks = []
+
+
+    def registerProducer(self, producer, streaming):
+        self.producer = producer
+
+
+    def unregisterProducer(self):
+        self.producer = None
+
+
+    def write(self, chunk):
+        self.chunks.append(chunk)
+        self.producer.pauseProducing()
+
+
+
+class StreamTests(unittest.TestCase):
+    """
+    Tests for L{util.Stream}, sending data to the peer in chunks.
+    """
+
+    def setUp(self):
+        self.filename = self.mktemp()
+        with open(self.filename, 'wb') as f:
+            f.write(bigString)
+
+
+    def getStream(self, source):
+        """
+        Get a L{util.RemoteStream} for C{source} from the server.
+        """
+        c, s, pump = connectedServerAndClient(test=self)
+        s.setNameForLocal("foo", Streamer(source))
+        streams = []
+        c.remoteForName("foo").callRemote("getStream").addCallback(
+            streams.append)
+        pump.flush()
+        self.assertIsInstance(streams[0], util.RemoteStream)
+        return c, s, pump, streams[0]
+
+
+    def test_fileReturnValue(self):
+        """
+        A L{util.Stream} of a file returned from a remote method is received
+        as a L{util.RemoteStream} which collects the file's contents, and the
+        file is closed once it has been sent.
+        """
+        source = open(self.filename, 'rb')
+        c, s, pump, stream = self.getStream(source)
+        self.assertFalse(source.closed)
+        received = []
+        stream.collect().addCallback(received.append)
+        pump.flush()
+        self.assertEqual(received, [bigString])
+        self.assertTrue(source.closed)
+
+
+    def test_generatorArgument(self):
+        """
+        A L{util.Stream} of a generator can be passed as an argument to a
+        remote method, which receives the chunks it yields.
+        """
+        closed = []
+        def generate():
+            try:
+                for i in range(10):
+                    yield b''
+                    yield b'chunk%d ' % (i,)
+            finally:
+                closed.append(True)
+        c, s, pump = connectedServerAndClient(test=self)
+        s.setNameForLocal("foo", Streamer())
+        results = []
+        c.remoteForName("foo").callRemote(
+            "collect", util.Stream(generate())).addCallback(results.append)
+        pump.flush()
+        self.assertEqual(
+            results, [b''.join(b'chunk%d ' % (i,) for i in range(10))])
+        self.assertEqual(closed, [True])
+
+
+    def test_flowControl(self):
+        """
+        While the consumer of a L{util.RemoteStream} is paused, the sender
+        stops once C{window} chunks are outstanding, and it continues when
+        the consumer resumes.
+        """
+        c, s, pump, stream = self.getStream(open(self.filename, 'rb'))
+        consumer = PausingConsumer()
+        done = []
+        stream.consume(consumer, window=2).addCallback(done.append)
+        pump.flush()
+        self.assertEqual(len(consumer.chunks), 2)
+        while not done:
+            consumer.producer.resumeProducing()
+            pump.flush()
+        self.assertEqual(b''.join(consumer.chunks), bigString)
+        self.assertEqual(len(consumer.chunks), len(bigString) // 100)
+        self.assertEqual(done, [None])
+
+
+    def test_stopProducing(self):
+        """
+        If the consumer stops the L{util.RemoteStream}, no more chunks are
+        written to it, the source is closed and the L{Deferred} returned by
+        L{util.RemoteStream.consume} fails with L{util.StreamError}.
+        """
+        source = open(self.filename, 'rb')
+        c, s, pump, stream = self.getStream(source)
+        consumer = PausingConsumer()
+        d = stream.consume(consumer, window=2)
+        pump.flush()
+        consumer.producer.stopProducing()
+        pump.flush()
+        self.assertEqual(len(consumer.chunks), 2)
+        self.assertTrue(source.closed)
+        self.failureResultOf(d, util.StreamError)
+
+
+    def test_sourceError(self):
+        """
+        If reading the source fails, the error is logged and the receiving
+        side fails with L{util.StreamError}.
+        """
+        def generate():
+            yield b'x'
+            raise RuntimeError("broken source")
+        c, s, pump, stream = self.getStream(generate())
+        d = stream.collect()
+        pump.flush()
+        failure = self.failureResultOf(d, util.StreamError)
+        self.assertEqual(failure.value.args, ("broken source",))
+        self.assertEqual(len(self.flushLoggedErrors(RuntimeError)), 1)
+
+
+    def test_consumeTwice(self):
+        """
+        A L{util.RemoteStream} can be consumed only once.
+        """
+        c, s, pump, stream = self.getStream(iter([b'x']))
+        first = stream.collect()
+        second = stream.collect()
+        pump.flush()
+        self.assertEqual(self.successResultOf(first), b'x')
+        self.failureResultOf(second, util.StreamError)
+
+
+    def test_disconnect(self):
+        """
+        If the connection is lost while a stream is being received, the
+        L{Deferred} returned by L{util.RemoteStream.consume} fails with
+        L{pb.PBConnectionLost} and the source is closed.
+        """
+        source = open(self.filename, 'rb')
+        c, s, pump, stream = self.getStream(source)
+        d = stream.consume(PausingConsumer(), window=2)
+        pump.flush()
+        c.connectionLost(failure.Failure(main.CONNECTION_DONE))
+        s.connectionLost(failure.Failure(main.CONNECTION_DONE))
+        self.failureResultOf(d, pb.PBConnectionLost)
+        self.assertTrue(source.closed)
+
+
+
+class BatchingTests(unittest.TestCase):
+    """
+    Tests for L{pb.Broker.startBatching}.
+    """
+
+    def setUp(self):
+        self.clock = Clock()
+        self.client, self.server, self.pump = connectedServerAndClient(
+            test=self)
+        self.server.setNameForLocal("foo", SimpleRemote())
+        self.ref = self.client.remoteForName("foo")
+        self.writes = []
+        write = self.client.transport.write
+        def recordWrite(data):
+            self.writes.append(data)
+            write(data)
+        self.client.transport.write = recordWrite
+
+
+    def test_batchedInOneWrite(self):
+        """
+        Calls made while batching are written to the transport together when
+        the reactor next runs delayed calls.
+        """
+        self.client.startBatching(self.clock)
+        results = []
+        for i in range(3):
+            self.ref.callRemote("thunk", i).addCallback(results.append)
+        self.assertEqual(self.writes, [])
+        self.clock.advance(0)
+        self.assertEqual(len(self.writes), 1)
+        self.pump.flush()
+        self.assertEqual(results, [1, 2, 3])
+
+
+    def test_stopBatching(self):
+        """
+        L{pb.Broker.stopBatching} writes the current batch, and later calls
+        are written as they are made.
+        """
+        self.client.startBatching(self.clock)
+        self.ref.callRemote("thunk", 1)
+        self.ref.callRemote("thunk", 2)
+        self.client.stopBatching()
+        self.assertEqual(len(self.writes), 1)
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+        self.assertNotIsInstance(self.client.transport, pb._BatchingTransport)
+        self.ref.callRemote("thunk", 3)
+        self.assertEqual(len(self.writes), 2)
+        self.pump.flush()
+
+
+    def test_loseConnection(self):
+        """
+        Closing the connection with the transport's C{loseConnection} writes
+        the current batch first.
+        """
+        remote = SimpleRemote()
+        self.server.setNameForLocal("bar", remote)
+        self.pump.flush()
+        self.client.startBatching(self.clock)
+        self.client.remoteForName("bar").callRemote("thunk", 1).addErrback(
+            lambda f: None)
+        self.client.transport.loseConnection()
+        self.assertEqual(len(self.writes), 1)
+        self.server.dataReceived(self.writes[0])
+        self.assertEqual(remote.arg, 1)
+
+
+    def test_connectionLost(self):
+        """
+        The pending batch is discarded when the connection is lost.
+        """
+        self.client.startBatching(self.clock)
+        self.ref.callRemote("thunk", 1).addErrback(lambda f: None)
+        self.client.connectionLost(failure.Failure(main.CONNECTION_DONE))
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+        self.assertEqual(self.writes, [])
+
+
+
+class Answerer(pb.Referenceable):
+    """
+    A referenceable whose answers are fired by the test.
+    """
+    def remote_answerLater(self):
+        self.d = Deferred()
+        return self.d
+
+
+
+class CallMetricsTests(unittest.TestCase):
+    """
+    Tests for L{pb.CallMetrics}.
+    """
+
+    def setUp(self):
+        self.clock = Clock()
+        self.client, self.server, self.pump = connectedServerAndClient(
+            test=self)
+        self.remote = Answerer()
+        self.server.setNameForLocal("foo", self.remote)
+        self.ref = self.client.remoteForName("foo")
+        self.metrics = self.client.metrics = pb.CallMetrics(self.clock)
+
+
+    def test_inFlight(self):
+        """
+        L{pb.CallMetrics.inFlight} counts the calls still waiting for an
+        answer, and L{pb.CallMetrics.calls} counts calls per method name.
+        """
+        self.ref.callRemote("answerLater", pbanswer=False)
+        d = self.ref.callRemote("answerLater")
+        self.pump.flush()
+        self.assertEqual(self.metrics.calls, {"answerLater": 2})
+        self.assertEqual(self.metrics.inFlight, 1)
+        self.remote.d.callback(1)
+        self.pump.flush()
+        self.assertEqual(self.successResultOf(d), 1)
+        self.assertEqual(self.metrics.inFlight, 0)
+
+
+    def test_latencies(self):
+        """
+        Each answered call is counted in the latency histogram bucket for
+        the time it took.
+        """
+        d = self.ref.callRemote("answerLater")
+        self.pump.flush()
+        self.clock.advance(0.02)
+        self.remote.d.callback(1)
+        self.pump.flush()
+        self.successResultOf(d)
+        d = self.ref.callRemote("answerLater")
+        self.pump.flush()
+        self.clock.advance(10)
+        self.remote.d.callback(2)
+        self.pump.flush()
+        self.successResultOf(d)
+        self.assertEqual(
+            self.metrics.latencies,
+            {"answerLater": [0, 0, 0, 1, 0, 0, 0, 0, 1]})
+
+
+    def test_callsPerSecond(self):
+        """
+        L{pb.CallMetrics.callsPerSecond} is the rate of calls sent since the
+        metrics were created, in total or for one method.
+        """
+        self.assertEqual(self.metrics.callsPerSecond(), 0.0)
+        self.ref.callRemote("answerLater", pbanswer=False)
+        self.ref.callRemote("other", pbanswer=False)
+        self.clock.advance(4)
+        self.assertEqual(self.metrics.callsPerSecond(), 0.5)
+        self.assertEqual(self.metrics.callsPerSecond("answerLater"), 0.25)
+        self.assertEqual(self.metrics.callsPerSecond("missing"), 0.0)
+
+
+
 class DumbPublishable(publish.Publishable):
     def getStateToPublish(self):
         return {"yayIGotPublished": 1}
@@ -10,7 +10,7 @@ from StringIO import StringIO
 from twisted.trial import unittest
 from twisted.spread import pb, flavors, jelly
 from twisted.internet import reactor, defer
-from twisted.python import log
+from twisted.python import log, failure
 
 ##
 # test exceptions
@@ -453,6 +453,25 @@ class FailureJellyingTests(unittest.TestCase):
             copiedTwice.check(ArithmeticError), ArithmeticError)
 
 
+    def test_lazyTraceback(self):
+        """
+        A L{CopyableFailure} created with lazy tracebacks enabled is copied
+        without the state for extracting its frames, so the copy can be
+        cleaned.
+        """
+        self.addCleanup(
+            failure.setLazyTracebacks, failure.getLazyTracebacks())
+        failure.setLazyTracebacks(True)
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            original = pb.CopyableFailure()
+        copied = jelly.unjelly(jelly.jelly(original, invoker=DummyInvoker()))
+        copied.cleanFailure()
+        self.assertIs(copied.check(ZeroDivisionError), ZeroDivisionError)
+        self.assertEqual(copied.frames, [])
+
+
     def test_printTracebackIncludesValue(self):
         """
         When L{CopiedFailure.printTraceback} is used to print a copied failure
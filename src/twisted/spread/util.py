@@ -9,6 +9,7 @@ Utility classes for spread.
 """
 
 from twisted.internet import defer
+from twisted.python import log
 from twisted.python.failure import Failure
 from twisted.spread import pb
 from twisted.protocols import basic
@@ -213,3 +214,322 @@ def getAllPages(referenceable, methodName, *args, **kw):
     referenceable.callRemote(methodName, CallbackPageCollector(d.callback), *args, **kw)
     return d
 
+
+
+
+class StreamError(pb.Error):
+    """
+    A L{Stream} could not be transferred.
+    """
+
+
+
+class _StreamSender(pb.Referenceable):
+    """
+    I send the contents of a L{Stream} to a remote L{_StreamCollector}.
+
+    I am registered as a page producer with the collector's broker, so I
+    send a chunk only when the transport has room for it, and only while the
+    collector has granted me credit; the collector grants more credit as its
+    consumer accepts the chunks I have already sent.
+    """
+    collector = None
+
+    def __init__(self, source, chunkSize):
+        self.source = source
+        self.chunkSize = chunkSize
+        if hasattr(source, 'read'):
+            self._iterator = None
+        else:
+            self._iterator = iter(source)
+        self._credit = 0
+        self._paging = False
+        self._done = False
+
+
+    def remote_start(self, collector, window):
+        """
+        Start sending chunks to C{collector}, at most C{window} of them before
+        it grants more credit.
+        """
+        if self.collector is not None or self._done:
+            raise StreamError("Stream has already been consumed")
+        self.collector = collector
+        self._credit = window
+        collector.notifyOnDisconnect(self._disconnected)
+        self._register()
+
+
+    def remote_credit(self, count):
+        """
+        Allow C{count} more chunks to be sent.
+        """
+        self._credit += count
+        self._register()
+
+
+    def remote_stop(self):
+        """
+        The receiving side does not want any more chunks.
+        """
+        self._finish()
+
+
+    def _register(self):
+        if not self._paging and not self._done and self._credit > 0:
+            self._paging = True
+            self.collector.broker.registerPageProducer(self)
+
+
+    def _nextChunk(self):
+        """
+        Get the next non-empty chunk from my source, or L{None} once it is
+        exhausted.
+        """
+        if self._iterator is None:
+            return self.source.read(self.chunkSize) or None
+        for chunk in self._iterator:
+            if chunk:
+                return chunk
+        return None
+
+
+    def _finish(self):
+        if self._done:
+            return
+        self._done = True
+        if self.collector is not None and not self.collector.broker.disconnected:
+            self.collector.dontNotifyOnDisconnect(self._disconnected)
+        close = getattr(self.source, 'close', None)
+        self.source = self._iterator = None
+        if close is not None:
+            close()
+
+
+    def _disconnected(self, collector):
+        self._finish()
+
+
+    def stillPaging(self):
+        """
+        (internal) Method called by Broker.
+        """
+        self._paging = not self._done and self._credit > 0
+        return self._paging
+
+
+    def sendNextPage(self):
+        """
+        (internal) Method called by Broker.
+        """
+        if self._done or self._credit <= 0:
+            return
+        try:
+            chunk = self._nextChunk()
+        except:
+            f = Failure()
+            log.err(f, "Error reading stream source")
+            self._finish()
+            self.collector.callRemote(
+                "failed", f.getErrorMessage(), pbanswer=False)
+            return
+        if chunk is None:
+            self._finish()
+            self.collector.callRemote("end", pbanswer=False)
+        else:
+            self._credit -= 1
+            self.collector.callRemote("chunk", chunk, pbanswer=False)
+
+
+
+class Stream(pb.Copyable):
+    """
+    A value which can be passed to or returned from a remote method, and
+    whose contents are sent in chunks, with flow control, instead of being
+    jellied all at once.
+
+    The other side receives a L{RemoteStream}.  Nothing is sent until it
+    asks for the contents.  The source is closed, if it has a C{close}
+    method, once it has been sent or the transfer is abandoned.
+
+    A L{Stream} can be consumed only once.
+    """
+
+    def __init__(self, source, chunkSize=2 ** 16):
+        """
+        @param source: a file-like object with a C{read} method, or an
+            iterable (such as a generator) of L{bytes}.
+
+        @param chunkSize: the number of bytes read from a file-like
+            C{source} per chunk.  Chunks from an iterable are sent as they
+            are, so each must fit within the peer's Banana size limit.
+        @type chunkSize: L{int}
+        """
+        self.sender = _StreamSender(source, chunkSize)
+
+
+    def getStateToCopyFor(self, perspective):
+        return {'sender': self.sender}
+
+
+
+@implementer(interfaces.IConsumer)
+class _BytesConsumer(object):
+    """
+    An in-memory consumer for L{RemoteStream.collect}.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.write = self.chunks.append
+
+
+    def registerProducer(self, producer, streaming):
+        pass
+
+
+    def unregisterProducer(self):
+        pass
+
+
+
+@implementer(interfaces.IPushProducer)
+class _StreamCollector(pb.Referenceable):
+    """
+    I receive the chunks of a L{Stream} and write them to a consumer,
+    granting the sender more credit while the consumer is not paused.
+    """
+
+    def __init__(self, sender, consumer, window):
+        self.sender = sender
+        self.consumer = consumer
+        self.deferred = defer.Deferred()
+        self._batch = max(1, window // 2)
+        self._received = 0
+        self._paused = False
+        self._finished = False
+        sender.notifyOnDisconnect(self._disconnected)
+
+
+    def _grant(self):
+        if not self._paused and self._received >= self._batch:
+            count, self._received = self._received, 0
+            self.sender.callRemote("credit", count, pbanswer=False)
+
+
+    def _finish(self):
+        self._finished = True
+        if not self.sender.broker.disconnected:
+            self.sender.dontNotifyOnDisconnect(self._disconnected)
+
+
+    def _done(self, result):
+        self._finish()
+        self.consumer.unregisterProducer()
+        self.consumer = None
+        self.deferred.callback(result)
+
+
+    def remote_chunk(self, chunk):
+        if self._finished:
+            return
+        self._received += 1
+        self.consumer.write(chunk)
+        self._grant()
+
+
+    def remote_end(self):
+        if not self._finished:
+            self._done(None)
+
+
+    def remote_failed(self, message):
+        if not self._finished:
+            self._done(Failure(StreamError(message)))
+
+
+    def startFailed(self, reason):
+        """
+        The sender refused to start.
+        """
+        if not self._finished:
+            self._done(reason)
+
+
+    def _disconnected(self, sender):
+        if not self._finished:
+            self._finished = True
+            self.consumer.unregisterProducer()
+            self.consumer = None
+            self.deferred.errback(pb.PBConnectionLost(
+                "Connection lost while receiving a stream"))
+
+
+    def pauseProducing(self):
+        self._paused = True
+
+
+    def resumeProducing(self):
+        self._paused = False
+        self._grant()
+
+
+    def stopProducing(self):
+        if self._finished:
+            return
+        self._finish()
+        self.consumer = None
+        self.sender.callRemote("stop", pbanswer=False)
+        self.deferred.errback(StreamError("Stream stopped by its consumer"))
+
+
+
+class RemoteStream(pb.RemoteCopy):
+    """
+    I am what a L{Stream} becomes when it is received from the peer.
+
+    Call L{consume} or L{collect} to start receiving its contents.
+    """
+    _collector = None
+
+    def consume(self, consumer, window=8):
+        """
+        Receive the stream, writing each chunk to C{consumer}.
+
+        I register a push producer with C{consumer}; while it is paused, the
+        sender stops once C{window} chunks are outstanding.
+
+        @param consumer: the consumer to write chunks to.
+        @type consumer: L{twisted.internet.interfaces.IConsumer}
+
+        @param window: the number of chunks the sender may send ahead of
+            the consumer.
+        @type window: L{int}
+
+        @return: a L{Deferred} which fires with L{None} once the whole
+            stream has been written to C{consumer}, or fails with
+            L{StreamError} or L{pb.PBConnectionLost}.
+        """
+        if self._collector is not None:
+            return defer.fail(StreamError("Stream has already been consumed"))
+        self._collector = collector = _StreamCollector(
+            self.sender, consumer, window)
+        consumer.registerProducer(collector, True)
+        self.sender.callRemote("start", collector, window).addErrback(
+            collector.startFailed)
+        return collector.deferred
+
+
+    def collect(self, window=8):
+        """
+        Receive the whole stream into memory.
+
+        @return: a L{Deferred} which fires with the contents of the stream
+            as L{bytes}.
+        """
+        consumer = _BytesConsumer()
+        d = self.consume(consumer, window)
+        d.addCallback(lambda ignored: b''.join(consumer.chunks))
+        return d
+
+pb.setUnjellyableForClass(Stream, RemoteStream)
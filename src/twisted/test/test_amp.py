@@ -20,7 +20,7 @@ from twisted.python.failure import Failure
 from twisted.protocols import amp
 from twisted.trial import unittest
 from twisted.internet import (
-    address, protocol, defer, error, reactor, interfaces)
+    address, protocol, defer, error, reactor, interfaces, task)
 from twisted.test import iosim
 from twisted.test.proto_helpers import StringTransport
 
@@ -929,6 +929,69 @@ class BinaryProtocolTests(unittest.TestCase):
             b'\x00\x03foo\x00\x03bar\x00\x00')
 
 
+    def test_batchedBoxes(self):
+        """
+        After L{amp.BinaryBoxProtocol.startBatching}, boxes sent during one
+        reactor iteration are written with a single C{writeSequence} call
+        when the reactor next runs delayed calls.
+        """
+        clock = task.Clock()
+        transport = StringTransport()
+        sequences = []
+        transport.writeSequence = sequences.append
+        protocol = amp.BinaryBoxProtocol(self)
+        protocol.makeConnection(transport)
+        protocol.startBatching(clock)
+        protocol.sendBox(amp.Box({b'foo': b'bar'}))
+        protocol.sendBox(amp.Box({b'baz': b'quux'}))
+        self.assertEqual(sequences, [])
+        clock.advance(0)
+        self.assertEqual(
+            sequences,
+            [[b'\x00\x03foo\x00\x03bar\x00\x00',
+              b'\x00\x03baz\x00\x04quux\x00\x00']])
+
+
+    def test_batchFlushedBeforeOtherBoxes(self):
+        """
+        A box which is not a plain L{amp.AmpBox}, such as an L{amp.QuitBox},
+        is written immediately, after the boxes already in the batch.
+        """
+        clock = task.Clock()
+        transport = StringTransport()
+        protocol = amp.BinaryBoxProtocol(self)
+        protocol.makeConnection(transport)
+        protocol.startBatching(clock)
+        protocol.sendBox(amp.Box({b'foo': b'bar'}))
+        protocol.sendBox(amp.QuitBox({b'baz': b'quux'}))
+        self.assertEqual(
+            transport.value(),
+            b'\x00\x03foo\x00\x03bar\x00\x00'
+            b'\x00\x03baz\x00\x04quux\x00\x00')
+        self.assertEqual(clock.getDelayedCalls(), [])
+
+
+    def test_stopBatching(self):
+        """
+        L{amp.BinaryBoxProtocol.stopBatching} writes the current batch, and
+        later boxes are written as they are sent.
+        """
+        clock = task.Clock()
+        transport = StringTransport()
+        protocol = amp.BinaryBoxProtocol(self)
+        protocol.makeConnection(transport)
+        protocol.startBatching(clock)
+        protocol.sendBox(amp.Box({b'foo': b'bar'}))
+        protocol.stopBatching()
+        self.assertEqual(
+            transport.value(), b'\x00\x03foo\x00\x03bar\x00\x00')
+        self.assertEqual(clock.getDelayedCalls(), [])
+        transport.clear()
+        protocol.sendBox(amp.Box({b'baz': b'quux'}))
+        self.assertEqual(
+            transport.value(), b'\x00\x03baz\x00\x04quux\x00\x00')
+
+
     def test_receiveBoxStateMachine(self):
         """
         When a binary box protocol receives:
@@ -2500,6 +2563,78 @@ class CommandTests(unittest.TestCase):
             {'weird': (result, protocol)})
 
 
+    def test_argumentsRecompiled(self):
+        """
+        If a L{amp.Command}'s argument schema is replaced, later calls to
+        L{amp.Command.makeArguments} and L{amp.Command.parseArguments} use
+        the new schema.
+        """
+        class Replaced(amp.Command):
+            arguments = [(b'a', amp.Integer())]
+        self.assertEqual(
+            Replaced.makeArguments({'a': 1}, None), amp.AmpBox(a=b'1'))
+        Replaced.arguments = [(b'a', amp.Unicode())]
+        self.assertEqual(
+            Replaced.makeArguments({'a': u'\N{SNOWMAN}'}, None),
+            amp.AmpBox(a=u'\N{SNOWMAN}'.encode('utf-8')))
+        self.assertEqual(
+            Replaced.parseArguments(amp.AmpBox(a=b'1'), None), {'a': u'1'})
+
+
+    def test_subclassSchemas(self):
+        """
+        A subclass with its own argument schema does not share the parent's
+        compiled schema.
+        """
+        class Parent(amp.Command):
+            arguments = [(b'a', amp.Integer())]
+        class Child(Parent):
+            arguments = [(b'a', amp.String())]
+        Parent.makeArguments({'a': 1}, None)
+        self.assertEqual(
+            Child.parseArguments(amp.AmpBox(a=b'1'), None), {'a': b'1'})
+        self.assertEqual(
+            Parent.parseArguments(amp.AmpBox(a=b'1'), None), {'a': 1})
+
+
+    def test_overriddenRetrieve(self):
+        """
+        An argument which overrides L{amp.Argument.retrieve} has its
+        C{retrieve} used by L{amp.Command.makeArguments} and
+        L{amp.Command.parseArguments}.
+        """
+        class Stripped(amp.String):
+            def retrieve(self, d, name, proto):
+                return amp.String.retrieve(self, d, name, proto).strip()
+
+        class Retrieving(amp.Command):
+            arguments = [(b'a', Stripped()), (b'b', amp.Integer())]
+        self.assertEqual(
+            Retrieving.makeArguments({'a': b' x ', 'b': 1}, None),
+            amp.AmpBox(a=b'x', b=b'1'))
+        self.assertEqual(
+            Retrieving.parseArguments(amp.AmpBox(a=b' y ', b=b'2'), None),
+            {'a': b'y', 'b': 2})
+
+
+    def test_missingRequiredArgument(self):
+        """
+        L{amp.Command.makeArguments} raises L{KeyError} for a missing argument
+        which is not optional, and omits a missing optional argument.
+        """
+        class Optional(amp.Command):
+            arguments = [(b'a', amp.Integer()),
+                         (b'b', amp.Integer(optional=True))]
+        self.assertRaises(KeyError, Optional.makeArguments, {'b': 1}, None)
+        self.assertEqual(
+            Optional.makeArguments({'a': 1}, None), amp.AmpBox(a=b'1'))
+        self.assertRaises(
+            KeyError, Optional.parseArguments, amp.AmpBox(b=b'1'), None)
+        self.assertEqual(
+            Optional.parseArguments(amp.AmpBox(a=b'1'), None),
+            {'a': 1, 'b': None})
+
+
     def test_callRemoteCallsParseResponse(self):
         """
         Making a remote call on a L{amp.Command} subclass which
@@ -2961,6 +3096,309 @@ class FloatTests(unittest.TestCase):
 
 
 
+class BigEcho(amp.Command):
+    """
+    Echo a value which may be longer than L{amp.MAX_VALUE_LENGTH}.
+    """
+    arguments = [(b'data', amp.BigString()),
+                 (b'text', amp.BigUnicode(optional=True))]
+    response = [(b'data', amp.BigString()),
+                (b'text', amp.BigUnicode(optional=True))]
+
+
+
+class BigEchoProtocol(amp.AMP):
+    """
+    Respond to L{BigEcho}.
+    """
+    @BigEcho.responder
+    def echo(self, data, text):
+        return {'data': data, 'text': text}
+
+
+
+class BigStringTests(unittest.TestCase):
+    """
+    Tests for L{amp.BigString} and L{amp.BigUnicode}.
+    """
+
+    def test_shortValue(self):
+        """
+        A value no longer than L{amp.MAX_VALUE_LENGTH} is put in the box
+        exactly as L{amp.String} would put it.
+        """
+        value = b"x" * amp.MAX_VALUE_LENGTH
+        strings = amp.AmpBox()
+        amp.BigString().toBox(b'data', strings, {'data': value}, None)
+        self.assertEqual(strings, {b'data': value})
+
+
+    def test_longValueSplit(self):
+        """
+        A value longer than L{amp.MAX_VALUE_LENGTH} is split into chunks
+        under numbered keys, which are joined again by
+        L{amp.BigString.fromBox}.
+        """
+        value = b"abc" * amp.MAX_VALUE_LENGTH
+        strings = amp.AmpBox()
+        amp.BigString().toBox(b'data', strings, {'data': value}, None)
+        self.assertEqual(
+            sorted(strings), [b'data.1', b'data.2', b'data.3'])
+        self.assertEqual(strings[b'data.1'], value[:amp.MAX_VALUE_LENGTH])
+        objects = {}
+        amp.BigString().fromBox(b'data', strings, objects, None)
+        self.assertEqual(objects, {'data': value})
+        self.assertEqual(strings, {})
+
+
+    def test_longValueRejectedByString(self):
+        """
+        A peer which declares the argument as an L{amp.String} fails to parse
+        a split value instead of receiving part of it.
+        """
+        strings = amp.AmpBox()
+        amp.BigString().toBox(
+            b'data', strings, {'data': b"x" * (amp.MAX_VALUE_LENGTH + 1)},
+            None)
+        self.assertRaises(
+            KeyError, amp.String().fromBox, b'data', strings, {}, None)
+
+
+    def test_missing(self):
+        """
+        A missing value is L{None} if the argument is optional, and a
+        L{KeyError} otherwise.
+        """
+        objects = {}
+        amp.BigString(optional=True).fromBox(
+            b'data', amp.AmpBox(), objects, None)
+        self.assertEqual(objects, {'data': None})
+        self.assertRaises(
+            KeyError, amp.BigString().fromBox, b'data', amp.AmpBox(), {},
+            None)
+
+
+    def test_roundTrip(self):
+        """
+        Values longer than L{amp.MAX_VALUE_LENGTH} can be passed as command
+        arguments and responses.
+        """
+        c, s, p = connectedServerAndClient(
+            ServerClass=BigEchoProtocol, ClientClass=BigEchoProtocol)
+        data = b"".join(intToBytes(i) for i in range(100000))
+        text = u"\N{SNOWMAN}" * 100000
+        L = []
+        c.callRemote(BigEcho, data=data, text=text).addCallback(L.append)
+        p.flush()
+        self.assertEqual(L, [{'data': data, 'text': text}])
+
+
+
+class MultiplexedEchoProtocol(amp.MultiplexedAMP):
+    """
+    A L{amp.MultiplexedAMP} which responds to L{BigEcho}, and to L{Hello}
+    by failing unexpectedly.
+    """
+    @BigEcho.responder
+    def echo(self, data, text):
+        return {'data': data, 'text': text}
+
+
+    @Hello.responder
+    def hello(self, **kw):
+        raise ThingIDontUnderstandError()
+
+
+
+class MultiplexedAMPTests(unittest.TestCase):
+    """
+    Tests for L{amp.MultiplexedAMP}.
+    """
+
+    def connect(self, ServerClass=MultiplexedEchoProtocol):
+        """
+        Connect a L{MultiplexedEchoProtocol} client to a C{ServerClass}
+        server and ask it to multiplex.
+
+        @return: a 4-tuple of the client, the server, the pump and whether
+            the server agreed to multiplex.
+        """
+        c, s, p = connectedServerAndClient(
+            ServerClass=ServerClass, ClientClass=MultiplexedEchoProtocol)
+        results = []
+        c.startMultiplexing().addCallback(results.append)
+        p.flush()
+        return c, s, p, results[0]
+
+
+    def test_negotiated(self):
+        """
+        When both sides are L{amp.MultiplexedAMP},
+        L{amp.MultiplexedAMP.startMultiplexing} fires with L{True}, and
+        L{amp.MultiplexedAMP.channel} returns channels with the window the
+        peer advertised.
+        """
+        c, s, p, started = self.connect()
+        self.assertTrue(started)
+        channel = c.channel(b'bulk')
+        self.assertIsNot(channel, c)
+        self.assertIs(c.channel(b'bulk'), channel)
+        self.assertEqual(channel.credit, s.channelWindow)
+        self.assertEqual(s.channel(b'bulk').credit, c.channelWindow)
+
+
+    def test_plainPeer(self):
+        """
+        When the peer is plain AMP, L{amp.MultiplexedAMP.startMultiplexing}
+        fires with L{False} and L{amp.MultiplexedAMP.channel} returns the
+        connection itself, which still works.
+        """
+        c, s, p, started = self.connect(SimpleSymmetricCommandProtocol)
+        self.assertFalse(started)
+        self.assertIs(c.channel(b'bulk'), c)
+        L = []
+        c.channel(b'bulk').callRemote(
+            Hello, hello=b'world').addCallback(L.append)
+        p.flush()
+        self.assertEqual(L[0]['hello'], b'world')
+
+
+    def test_commandsOverChannels(self):
+        """
+        Commands sent over a channel are dispatched to the peer's responders,
+        and their answers come back over the same channel.
+        """
+        c, s, p, started = self.connect()
+        data = b'x' * 300000
+        L = []
+        for name in (b'one', b'two'):
+            c.channel(name).callRemote(
+                BigEcho, data=data + name).addCallback(L.append)
+        p.flush()
+        self.assertEqual(
+            sorted(result['data'] for result in L),
+            [data + b'one', data + b'two'])
+        self.assertEqual(sorted(s._channels), [b'one', b'two'])
+
+
+    def test_smallCommandNotBlocked(self):
+        """
+        A small command sent over one channel is answered while a large one
+        on another channel is still being transferred.
+        """
+        c, s, p, started = self.connect()
+        L = []
+        c.channel(b'bulk').callRemote(
+            BigEcho, data=b'x' * 1000000).addCallback(
+                lambda result: L.append('bulk'))
+        c.channel(b'control').callRemote(
+            BigEcho, data=b'ping').addCallback(
+                lambda result: L.append('control'))
+        p.flush()
+        self.assertEqual(L, ['control', 'bulk'])
+
+
+    def test_window(self):
+        """
+        A channel sends no more than the peer's window before the peer grants
+        it more credit.
+        """
+        c, s, p, started = self.connect()
+        channel = c.channel(b'bulk')
+        channel.callRemote(BigEcho, data=b'x' * 1000000)
+        self.assertEqual(channel.credit, 0)
+        self.assertLess(
+            len(b''.join(c.transport.stream)), s.channelWindow + 10000)
+        p.flush()
+        self.assertGreater(channel.credit, 0)
+
+
+    def test_transportProducer(self):
+        """
+        Channels send their data without registering a producer with the
+        transport, so one registered by the application is left in place.
+        """
+        class Producer(object):
+            def resumeProducing(self):
+                pass
+        c, s, p, started = self.connect()
+        producer = Producer()
+        c.transport.registerProducer(producer, True)
+        L = []
+        c.channel(b'bulk').callRemote(
+            BigEcho, data=b'x' * 300000).addCallback(L.append)
+        p.flush()
+        self.assertEqual(L[0]['data'], b'x' * 300000)
+        self.assertIs(c.transport.producer, producer)
+
+
+    def test_batching(self):
+        """
+        Channel fragments sent while the connection is batching are written
+        when the batch is.
+        """
+        c, s, p, started = self.connect()
+        clock = task.Clock()
+        c.startBatching(clock)
+        L = []
+        c.channel(b'bulk').callRemote(
+            BigEcho, data=b'x' * 100000).addCallback(L.append)
+        p.flush()
+        self.assertEqual(L, [])
+        while not L:
+            clock.advance(0)
+            p.flush()
+        self.assertEqual(L[0]['data'], b'x' * 100000)
+
+
+    def test_channelBeforeWindow(self):
+        """
+        A channel which the peer starts using before this side knows the
+        peer's window is granted that window once it is known.
+        """
+        c, s, p = connectedServerAndClient(
+            ServerClass=MultiplexedEchoProtocol,
+            ClientClass=MultiplexedEchoProtocol)
+        early = c._channelFor(b'early')
+        self.assertEqual(early.credit, 0)
+        c.startMultiplexing()
+        p.flush()
+        self.assertEqual(early.credit, s.channelWindow)
+        L = []
+        early.callRemote(BigEcho, data=b'x').addCallback(L.append)
+        p.flush()
+        self.assertEqual(L[0]['data'], b'x')
+
+
+    def test_connectionLost(self):
+        """
+        Commands waiting for answers on a channel fail when the connection is
+        lost.
+        """
+        c, s, p, started = self.connect()
+        d = c.channel(b'bulk').callRemote(BigEcho, data=b'x')
+        c.connectionLost(Failure(error.ConnectionDone("gone")))
+        self.failureResultOf(d, error.ConnectionDone)
+
+
+    def test_quitBoxOverChannel(self):
+        """
+        An unexpected error answered over a channel reaches the channel's
+        caller before the connection is closed.
+        """
+        c, s, p, started = self.connect()
+        failures = []
+        c.channel(b'bulk').callRemote(Hello, hello=b'world').addErrback(
+            failures.append)
+        p.flush()
+        self.assertEqual(len(failures), 1)
+        failures[0].trap(amp.UnknownRemoteError)
+        self.assertIsNone(s.transport)
+        self.assertEqual(
+            len(self.flushLoggedErrors(ThingIDontUnderstandError)), 1)
+
+
+
 class ListOfDateTimeTests(unittest.TestCase, ListOfTestsMixin):
     """
     Tests for L{ListOf} combined with L{amp.DateTime}.
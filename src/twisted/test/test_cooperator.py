@@ -709,3 +709,105 @@ class RunStateTests(unittest.TestCase):
 
 
 
+
+
+
+class SchedulingTests(unittest.TestCase):
+    """
+    Tests for the weights, CPU-time accounting and latency budget of
+    L{task.Cooperator}.
+    """
+
+    def setUp(self):
+        """
+        Create a L{task.Cooperator} with a fake scheduler and a fake clock.
+        """
+        self.clock = task.Clock()
+        self.scheduler = FakeScheduler()
+        self.work = []
+
+
+    def worker(self, name, cost=0):
+        """
+        Make an iterator which records its units of work, and which advances
+        the fake clock by C{cost} for each of them.
+
+        @param name: The name to record for each unit of work.
+
+        @param cost: How long each unit of work takes.
+        @type cost: C{float}
+
+        @return: The iterator.
+        """
+        while True:
+            self.work.append(name)
+            self.clock.advance(cost)
+            yield None
+
+
+    def test_weights(self):
+        """
+        Each time its turn comes round, a task does as many units of work in
+        a row as its weight.
+        """
+        units = iter(range(7))
+        def terminationPredicateFactory():
+            return lambda: next(units, None) is None
+        coop = task.Cooperator(terminationPredicateFactory, self.scheduler,
+                               seconds=self.clock.seconds)
+        self.addCleanup(coop.stop)
+        coop.cooperate(self.worker("a"))
+        coop.cooperate(self.worker("b"), weight=3)
+        self.scheduler.pump()
+        self.assertEqual(self.work, list("abbbabbb"))
+
+
+    def test_invalidWeight(self):
+        """
+        A task must have a weight of at least 1.
+        """
+        coop = task.Cooperator(scheduler=self.scheduler)
+        self.assertRaises(ValueError, coop.cooperate, iter(()), weight=0)
+        self.assertEqual(coop._tasks, [])
+
+
+    def test_cpuTime(self):
+        """
+        L{task.CooperativeTask.cpuTime} and
+        L{task.CooperativeTask.workUnits} count how long a task has spent
+        working, and how many units of work it has done.
+        """
+        units = iter(range(2))
+        def terminationPredicateFactory():
+            return lambda: next(units, None) is None
+        coop = task.Cooperator(terminationPredicateFactory, self.scheduler,
+                               seconds=self.clock.seconds)
+        self.addCleanup(coop.stop)
+        cheap = coop.cooperate(self.worker("cheap", 1))
+        costly = coop.cooperate(self.worker("costly", 5))
+        self.scheduler.pump()
+        self.assertEqual((cheap.cpuTime, cheap.workUnits), (2, 2))
+        self.assertEqual((costly.cpuTime, costly.workUnits), (5, 1))
+
+
+    def test_latency(self):
+        """
+        With a latency, each step works for whatever is left of the latency
+        after the time the reactor spent elsewhere since the last step, but at
+        least a tenth of the latency.
+        """
+        coop = task.Cooperator(scheduler=self.scheduler, latency=1.0,
+                               seconds=self.clock.seconds)
+        self.addCleanup(coop.stop)
+        coop.cooperate(self.worker("a", 0.25))
+
+        self.scheduler.pump()
+        self.assertEqual(len(self.work), 4)
+
+        self.clock.advance(0.5)
+        self.scheduler.pump()
+        self.assertEqual(len(self.work), 6)
+
+        self.clock.advance(2)
+        self.scheduler.pump()
+        self.assertEqual(len(self.work), 7)
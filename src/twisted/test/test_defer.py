@@ -17,6 +17,11 @@ from twisted.internet import defer, reactor
 from twisted.internet.task import Clock
 from twisted.trial import unittest
 
+try:
+    from asyncio import Future, new_event_loop as newEventLoop
+except ImportError:
+    newEventLoop = None
+
 
 
 class GenericError(Exception):
@@ -1151,6 +1156,18 @@ class DeferredTests(unittest.SynchronousTestCase, ImmediateFailureMixin):
         self.assertIsNone(a._chainedTo)
 
 
+    def test_explicitChainClearedWhenFiredDirectly(self):
+        """
+        Any recorded chaining is cleared if the chained L{Deferred} is given a
+        result directly, even when it has no callbacks to run.
+        """
+        a = defer.Deferred()
+        b = defer.Deferred()
+        b.chainDeferred(a)
+        a.callback(None)
+        self.assertIsNone(a._chainedTo)
+
+
     def test_chainDeferredRecordsImplicitChain(self):
         """
         We can chain L{Deferred}s implicitly by adding callbacks that return
@@ -1388,6 +1405,39 @@ class DeferredTests(unittest.SynchronousTestCase, ImmediateFailureMixin):
         self.assertNotEqual([], globalz)
 
 
+    def test_succeedWhenDebugging(self):
+        """
+        When C{Deferred.debug} is set, the L{Deferred} returned by
+        L{defer.succeed} records where it was given its result.
+        """
+        defer.setDebugging(True)
+        d = defer.succeed(None)
+        self.assertTrue(d._debugInfo.invoker)
+        self.assertIsNone(self.successResultOf(d))
+
+
+    def test_succeedWithFailure(self):
+        """
+        L{defer.succeed} gives a L{failure.Failure} to the errbacks of the
+        L{Deferred} it returns, like L{defer.Deferred.callback} does.
+        """
+        f = getDivisionFailure()
+        self.assertIs(self.failureResultOf(defer.succeed(f)), f)
+
+
+    def test_attributes(self):
+        """
+        Attributes other than those used by L{defer.Deferred} itself can be
+        set on a L{defer.Deferred}.
+        """
+        d = defer.Deferred()
+        d.debug = True
+        d.tag = "tag"
+        self.assertTrue(d.debug)
+        self.assertEqual(d.tag, "tag")
+        self.assertFalse(defer.Deferred.debug)
+
+
     def test_inlineCallbacksTracebacks(self):
         """
         L{defer.inlineCallbacks} that re-raise tracebacks into their deferred
@@ -2943,3 +2993,154 @@ class EnsureDeferredTests(unittest.TestCase):
         """
         with self.assertRaises(ValueError):
             defer.ensureDeferred("something")
+
+
+
+class DeferredFutureAdapterTests(unittest.SynchronousTestCase):
+    """
+    Tests for L{defer.Deferred.asFuture} and L{defer.Deferred.fromFuture}.
+    """
+    if newEventLoop is None:
+        skip = "asyncio is not available"
+
+    def setUp(self):
+        self.loop = newEventLoop()
+        self.addCleanup(self.loop.close)
+
+
+    def runCallbacks(self):
+        """
+        Run the callbacks which have been scheduled on the event loop.
+        """
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+
+
+    def test_asFuture(self):
+        """
+        The future returned by L{defer.Deferred.asFuture} gets the result of
+        the L{defer.Deferred} once it has one, and the L{defer.Deferred}'s
+        result is consumed.
+        """
+        d = defer.Deferred()
+        future = d.asFuture(self.loop)
+        self.assertFalse(future.done())
+        d.callback(13)
+        self.assertEqual(future.result(), 13)
+        self.assertIsNone(self.successResultOf(d))
+
+
+    def test_asFutureFired(self):
+        """
+        The future returned by L{defer.Deferred.asFuture} for a
+        L{defer.Deferred} which already has a result is already done.
+        """
+        future = defer.succeed(13).asFuture(self.loop)
+        self.assertEqual(future.result(), 13)
+
+
+    def test_asFutureFailure(self):
+        """
+        The future returned by L{defer.Deferred.asFuture} gets the exception
+        of a failed L{defer.Deferred}, and the failure is consumed.
+        """
+        d = defer.Deferred()
+        future = d.asFuture(self.loop)
+        exception = ZeroDivisionError()
+        d.errback(exception)
+        self.assertIs(future.exception(), exception)
+        self.assertIsNone(self.successResultOf(d))
+
+
+    def test_asFutureCancelFuture(self):
+        """
+        Cancelling the future returned by L{defer.Deferred.asFuture} cancels
+        the L{defer.Deferred}.
+        """
+        cancelled = []
+        d = defer.Deferred(cancelled.append)
+        future = d.asFuture(self.loop)
+        future.cancel()
+        self.runCallbacks()
+        self.assertEqual(cancelled, [d])
+        self.assertTrue(future.cancelled())
+
+
+    def test_asFutureWithoutCreateFuture(self):
+        """
+        L{defer.Deferred.asFuture} works with event loops which have no
+        C{create_future} method, as before Python 3.5.2.
+        """
+        class OldLoop(object):
+            def __init__(self, loop):
+                self._loop = loop
+            def __getattr__(self, name):
+                if name == 'create_future':
+                    raise AttributeError(name)
+                return getattr(self._loop, name)
+        d = defer.Deferred()
+        future = d.asFuture(OldLoop(self.loop))
+        d.callback(13)
+        self.assertEqual(future.result(), 13)
+
+
+    def test_fromFuture(self):
+        """
+        The L{defer.Deferred} returned by L{defer.Deferred.fromFuture} fires
+        with the result of the future once it has one.
+        """
+        future = Future(loop=self.loop)
+        d = defer.Deferred.fromFuture(future)
+        self.assertNoResult(d)
+        future.set_result(13)
+        self.assertNoResult(d)
+        self.runCallbacks()
+        self.assertEqual(self.successResultOf(d), 13)
+
+
+    def test_fromFutureDone(self):
+        """
+        The L{defer.Deferred} returned by L{defer.Deferred.fromFuture} for a
+        future which is already done has the future's result without the
+        event loop running.
+        """
+        future = Future(loop=self.loop)
+        future.set_result(13)
+        d = defer.Deferred.fromFuture(future)
+        self.assertEqual(self.successResultOf(d), 13)
+
+
+    def test_fromFutureFailure(self):
+        """
+        The L{defer.Deferred} returned by L{defer.Deferred.fromFuture} fails
+        with the exception of the future.
+        """
+        future = Future(loop=self.loop)
+        future.set_exception(ZeroDivisionError())
+        d = defer.Deferred.fromFuture(future)
+        self.failureResultOf(d, ZeroDivisionError)
+
+
+    def test_fromFutureCancelled(self):
+        """
+        The L{defer.Deferred} returned by L{defer.Deferred.fromFuture} fails
+        with L{defer.CancelledError} if the future is cancelled.
+        """
+        future = Future(loop=self.loop)
+        d = defer.Deferred.fromFuture(future)
+        future.cancel()
+        self.runCallbacks()
+        self.failureResultOf(d, defer.CancelledError)
+
+
+    def test_cancelFromFuture(self):
+        """
+        Cancelling the L{defer.Deferred} returned by
+        L{defer.Deferred.fromFuture} cancels the future.
+        """
+        future = Future(loop=self.loop)
+        d = defer.Deferred.fromFuture(future)
+        d.cancel()
+        self.assertTrue(future.cancelled())
+        self.failureResultOf(d, defer.CancelledError)
+        self.runCallbacks()
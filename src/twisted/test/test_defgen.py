@@ -296,6 +296,42 @@ class InlineCallbacksTests(BaseDefgenTests, unittest.TestCase):
         return _return().addCallback(self.assertEqual, 6)
 
 
+    def test_yieldFiredDeferred(self):
+        """
+        Yielding a L{Deferred} which already has a result resumes the
+        generator with that result straight away, and leaves the L{Deferred}
+        with a result of L{None}, as if a callback had consumed it.
+        """
+        fired = defer.succeed(1)
+        results = []
+        def _yieldFired():
+            results.append((yield fired))
+        _yieldFired = inlineCallbacks(_yieldFired)
+
+        d = _yieldFired()
+        self.assertEqual(results, [1])
+        self.assertIsNone(self.successResultOf(fired))
+        self.assertIsNone(self.successResultOf(d))
+
+
+    def test_yieldPausedDeferred(self):
+        """
+        Yielding a paused L{Deferred} which already has a result resumes the
+        generator only once the L{Deferred} is unpaused.
+        """
+        paused = defer.succeed(1)
+        paused.pause()
+        results = []
+        def _yieldPaused():
+            results.append((yield paused))
+        _yieldPaused = inlineCallbacks(_yieldPaused)
+
+        _yieldPaused()
+        self.assertEqual(results, [])
+        paused.unpause()
+        self.assertEqual(results, [1])
+
+
     def test_nonGeneratorReturn(self):
         """
         Ensure that C{TypeError} with a message about L{inlineCallbacks} is
@@ -884,6 +884,124 @@ class DebugModeTests(SynchronousTestCase):
 
 
 
+class LazyTracebackTests(SynchronousTestCase):
+    """
+    Tests for L{failure.setLazyTracebacks}.
+    """
+
+    def setUp(self):
+        self.addCleanup(
+            failure.setLazyTracebacks, failure.getLazyTracebacks()
+        )
+
+
+    def getFailures(self, **kwargs):
+        """
+        Make an eager and a lazy L{failure.Failure} of the same
+        divide-by-zero error.
+
+        @param kwargs: Any C{**kwargs} are passed to Failure's constructor.
+
+        @return: The eager and lazy failures.
+        """
+        try:
+            1/0
+        except:
+            failure.setLazyTracebacks(False)
+            eager = failure.Failure(**kwargs)
+            failure.setLazyTracebacks(True)
+            lazy = failure.Failure(**kwargs)
+        return eager, lazy
+
+
+    def test_disabledByDefault(self):
+        """
+        Lazy tracebacks are disabled by default.
+        """
+        self.assertFalse(failure.Failure._lazyTracebacks)
+        self.assertIn("frames", getDivisionFailure().__dict__)
+
+
+    def test_framesExtractedOnUse(self):
+        """
+        A L{failure.Failure} created with lazy tracebacks enabled extracts the
+        same C{frames} and C{stack} as an eager one when they are first used,
+        although the line numbers in C{stack} are those of its frames at that
+        time.
+        """
+        eager, lazy = self.getFailures()
+        self.assertTrue(failure.getLazyTracebacks())
+        self.assertNotIn("frames", lazy.__dict__)
+        self.assertNotIn("stack", lazy.__dict__)
+        self.assertEqual(lazy.frames, eager.frames)
+        self.assertEqual(lazy.stack[-1][:2], eager.stack[-1][:2])
+        self.assertEqual(len(lazy.stack), len(eager.stack))
+        self.assertIn("frames", lazy.__dict__)
+        self.assertEqual(
+            lazy.getTraceback(elideFrameworkCode=True),
+            eager.getTraceback(elideFrameworkCode=True)
+        )
+
+
+    def test_trap(self):
+        """
+        Trapping a lazy L{failure.Failure} does not extract its frames.
+        """
+        eager, lazy = self.getFailures()
+        self.assertEqual(lazy.trap(ZeroDivisionError), ZeroDivisionError)
+        self.assertNotIn("frames", lazy.__dict__)
+
+
+    def test_cleanFailure(self):
+        """
+        L{failure.Failure.cleanFailure} extracts the frames of a lazy failure
+        before discarding its traceback.
+        """
+        eager, lazy = self.getFailures()
+        lazy.cleanFailure()
+        self.assertIsNone(lazy.tb)
+        self.assertEqual(
+            [list(frame[:3]) for frame in lazy.frames],
+            [list(frame[:3]) for frame in eager.frames]
+        )
+        self.assertNotIn("_stackOffset", lazy.__dict__)
+        self.assertIsInstance(lazy.getTraceback(), str)
+
+
+    def test_tracebackDropped(self):
+        """
+        A lazy L{failure.Failure} whose traceback was dropped before its
+        frames were extracted has no frames.
+        """
+        eager, lazy = self.getFailures()
+        lazy.tb = None
+        self.assertEqual(lazy.frames, [])
+        self.assertEqual(lazy.stack, [])
+        lazy.cleanFailure()
+        self.assertNotIn("_stackOffset", lazy.__dict__)
+
+
+    def test_captureVars(self):
+        """
+        Failures which capture variables extract their frames immediately,
+        even with lazy tracebacks enabled.
+        """
+        eager, lazy = self.getFailures(captureVars=True)
+        self.assertIn("frames", lazy.__dict__)
+
+
+    def test_noTraceback(self):
+        """
+        A failure of an exception without a traceback has no frames, with
+        lazy tracebacks enabled.
+        """
+        failure.setLazyTracebacks(True)
+        f = failure.Failure(ZeroDivisionError())
+        self.assertEqual(f.frames, [])
+        self.assertEqual(f.stack, [])
+
+
+
 class ExtendedGeneratorTests(SynchronousTestCase):
     """
     Tests C{failure.Failure} support for generator features added in Python 2.5
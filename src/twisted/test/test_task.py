@@ -702,6 +702,20 @@ class LoopTests(unittest.TestCase):
         self.assertEqual(ran, [None])
 
 
+    def test_failureReturned(self):
+        """
+        If the function returns a L{failure.Failure}, L{LoopingCall} stops and
+        the L{defer.Deferred} returned by L{LoopingCall.start} fails with it.
+        """
+        clock = task.Clock()
+        theFailure = failure.Failure(TestException())
+        lc = TestableLoopingCall(clock, lambda: theFailure)
+        d = lc.start(1)
+        self.assertIs(self.failureResultOf(d), theFailure)
+        self.assertFalse(lc.running)
+        self.assertEqual(clock.getDelayedCalls(), [])
+
+
     def test_reprFunction(self):
         """
         L{LoopingCall.__repr__} includes the wrapped function's name.
@@ -739,6 +753,157 @@ class LoopTests(unittest.TestCase):
 
 
 
+class ScheduledLoopTests(LoopTests):
+    """
+    The tests for L{task.LoopingCall}, run with every L{task.LoopingCall}
+    scheduled by a L{task.LoopingCallScheduler}.
+    """
+
+    def setUp(self):
+        self.patch(task.LoopingCall, "scheduler", task.LoopingCallScheduler())
+
+
+
+class LoopingCallSchedulerTests(unittest.TestCase):
+    """
+    Tests for L{task.LoopingCallScheduler}.
+    """
+
+    def setUp(self):
+        self.clock = task.Clock()
+        self.calls = []
+
+
+    def loop(self, name, scheduler, interval, now=True, withCount=False):
+        """
+        Start a L{task.LoopingCall} run by a scheduler, which records its name
+        and the time for each call.
+
+        @param name: The name to record.
+
+        @param scheduler: The scheduler to use.
+        @type scheduler: L{task.LoopingCallScheduler}
+
+        @param interval: The interval of the call.
+
+        @param now: Whether to make the first call at once.
+
+        @param withCount: If C{True}, use L{task.LoopingCall.withCount}, and
+            also record the count for each call.
+
+        @return: The started call.
+        @rtype: L{task.LoopingCall}
+        """
+        if withCount:
+            call = task.LoopingCall.withCount(
+                lambda count: self.calls.append(
+                    (name, self.clock.seconds(), count)))
+        else:
+            call = task.LoopingCall(
+                lambda: self.calls.append((name, self.clock.seconds())))
+        call.clock = self.clock
+        call.scheduler = scheduler
+        call.start(interval, now)
+        return call
+
+
+    def test_sharedTimer(self):
+        """
+        L{task.LoopingCall}s with the same clock and interval share a single
+        delayed call on the clock, and run at their own times.
+        """
+        scheduler = task.LoopingCallScheduler()
+        self.loop("a", scheduler, 1, now=False)
+        self.clock.advance(0.25)
+        self.loop("b", scheduler, 1, now=False)
+        self.loop("c", scheduler, 1.5, now=False)
+        self.assertEqual(len(self.clock.getDelayedCalls()), 2)
+
+        self.clock.pump([0.75, 0.25, 0.5, 0.25, 0.25])
+        self.assertEqual(
+            self.calls,
+            [("a", 1), ("b", 1.25), ("c", 1.75), ("a", 2), ("b", 2.25)])
+        self.assertEqual(len(self.clock.getDelayedCalls()), 2)
+
+
+    def test_resolution(self):
+        """
+        With a resolution, each iteration is run at the first multiple of the
+        resolution at or after the time it is due, and the count passed to a
+        L{task.LoopingCall.withCount} callable is unaffected.
+        """
+        scheduler = task.LoopingCallScheduler(resolution=1)
+        self.clock.advance(0.2)
+        self.loop("a", scheduler, 1, now=False, withCount=True)
+        self.clock.advance(0.3)
+        self.loop("b", scheduler, 1, now=False, withCount=True)
+
+        self.clock.advance(1.4)
+        self.assertEqual(self.calls, [])
+        self.clock.advance(0.1)
+        self.assertEqual(self.calls, [("a", 2, 1), ("b", 2, 1)])
+        self.clock.advance(1)
+        self.assertEqual(
+            self.calls, [("a", 2, 1), ("b", 2, 1), ("a", 3, 1), ("b", 3, 1)])
+
+
+    def test_stop(self):
+        """
+        Once every L{task.LoopingCall} in a group has been stopped, the group's
+        delayed call is cancelled.
+        """
+        scheduler = task.LoopingCallScheduler()
+        a = self.loop("a", scheduler, 1)
+        b = self.loop("b", scheduler, 1)
+        a.stop()
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        b.stop()
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+        self.assertEqual(scheduler._groups, {})
+
+
+    def test_stopWhileRunning(self):
+        """
+        A L{task.LoopingCall} which is stopped by another one in the same group
+        is not called, even if it was due at the same time.
+        """
+        scheduler = task.LoopingCallScheduler()
+        b = []
+        def stopB():
+            self.calls.append("a")
+            b[0].stop()
+        a = task.LoopingCall(stopB)
+        a.clock = self.clock
+        a.scheduler = scheduler
+        a.start(1, now=False)
+        b.append(self.loop("b", scheduler, 1, now=False))
+
+        self.clock.advance(1)
+        self.assertEqual(self.calls, ["a"])
+        a.stop()
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+
+    def test_zeroInterval(self):
+        """
+        A L{task.LoopingCall} with an interval of zero is scheduled on its
+        clock directly.
+        """
+        scheduler = task.LoopingCallScheduler()
+        call = self.loop("a", scheduler, 0)
+        self.assertEqual(self.clock.getDelayedCalls(), [call.call])
+        self.assertEqual(scheduler._groups, {})
+        call.stop()
+
+
+    def test_negativeResolution(self):
+        """
+        A L{task.LoopingCallScheduler} cannot have a negative resolution.
+        """
+        self.assertRaises(ValueError, task.LoopingCallScheduler, -1)
+
+
+
 class ReactorLoopTests(unittest.TestCase):
     # Slightly inferior tests which exercise interactions with an actual
     # reactor.
@@ -0,0 +1 @@
+twisted.protocols.basic.LineReceiver now takes linear rather than quadratic time to deliver many lines received at once.
@@ -0,0 +1 @@
+twisted.protocols.basic.IntNStringReceiver and its subclasses no longer copy the data received so far each time more of a large string arrives.
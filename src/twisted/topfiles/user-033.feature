@@ -0,0 +1 @@
+twisted.spread.banana.Banana now takes linear rather than quadratic time to decode a large expression received at once.
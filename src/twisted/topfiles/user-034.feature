@@ -0,0 +1 @@
+twisted.spread.banana.Banana encodes expressions faster.
@@ -0,0 +1 @@
+twisted.spread.jelly now caches the security checks of the types it jellies and unjellies, and twisted.spread.pb.Broker keeps one such cache per connection.
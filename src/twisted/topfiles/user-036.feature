@@ -0,0 +1 @@
+twisted.spread.util.Stream can be passed to or returned from a remote method to send a file or other large data with flow control; the receiver gets a twisted.spread.util.RemoteStream whose consume and collect methods read it.
@@ -0,0 +1 @@
+twisted.spread.pb.Broker.startBatching groups the messages sent during one reactor iteration into a single write, and a twisted.spread.pb.CallMetrics assigned to Broker.metrics collects statistics about remote calls.
@@ -0,0 +1 @@
+twisted.protocols.amp.BigString and twisted.protocols.amp.BigUnicode are new argument types for values longer than twisted.protocols.amp.MAX_VALUE_LENGTH.
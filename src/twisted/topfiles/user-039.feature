@@ -0,0 +1 @@
+twisted.protocols.amp commands convert their arguments faster, and twisted.protocols.amp.BinaryBoxProtocol.startBatching groups the boxes sent during one reactor iteration into a single write.
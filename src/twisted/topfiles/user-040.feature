@@ -0,0 +1 @@
+twisted.protocols.amp.MultiplexedAMP is a new AMP protocol which carries several flow-controlled logical channels over one connection, and falls back to plain AMP when the peer does not support them.
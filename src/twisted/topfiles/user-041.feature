@@ -0,0 +1 @@
+twisted.logger.Logger now discards events below the minimum level for their namespace before building them; the levels are set on the new twisted.logger.globalLogLevelPredicate.
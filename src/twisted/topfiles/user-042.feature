@@ -0,0 +1 @@
+twisted.logger now caches parsed format strings, which makes formatting events faster.
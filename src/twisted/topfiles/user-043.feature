@@ -0,0 +1 @@
+twisted.logger.BatchingLogObserver is a new observer which delivers events to another observer in batches, from a background thread, with a bounded queue whose twisted.logger.OverflowPolicy decides which events to drop.
@@ -0,0 +1 @@
+twisted.logger.eventsFromMappedJSONLogFile reads and filters the events in a JSON log file through a memory map, and twisted.logger.jsonLogFileShards splits such a file into ranges which can be read in parallel.
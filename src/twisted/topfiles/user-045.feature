@@ -0,0 +1 @@
+twisted.python.failure.setLazyTracebacks(True) makes twisted.python.failure.Failure extract the frames of its traceback only when they are used.
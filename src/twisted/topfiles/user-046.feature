@@ -0,0 +1 @@
+twisted.internet.defer.Deferred uses less memory, and is faster to give a result when it has no callbacks.
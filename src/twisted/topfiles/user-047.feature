@@ -0,0 +1 @@
+twisted.internet.defer.inlineCallbacks and await on a twisted.internet.defer.Deferred resume immediately when the Deferred already has a result.
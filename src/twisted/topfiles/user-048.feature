@@ -0,0 +1 @@
+twisted.internet.defer.Deferred.asFuture and twisted.internet.defer.Deferred.fromFuture convert between Deferreds and asyncio futures, and twisted.internet.defer.ensureDeferred takes a loop argument to run a coroutine as an asyncio task.
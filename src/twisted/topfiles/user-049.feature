@@ -0,0 +1 @@
+twisted.internet.task.Cooperator accepts a latency argument to bound how long it runs tasks for in one go, task weights are accepted by cooperate and coiterate, and twisted.internet.task.CooperativeTask records the CPU time and work units each task used.
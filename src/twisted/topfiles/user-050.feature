@@ -0,0 +1 @@
+twisted.internet.task.LoopingCallScheduler runs many twisted.internet.task.LoopingCall instances with the same interval from shared timers; assign one to LoopingCall.scheduler.